@@ -0,0 +1,50 @@
+"""
+benchmarks reading the tags of a component in a repository with many other tags.
+
+usage: PYTHONPATH=src python benchmarks/tags.py [tags] [directory]
+"""
+
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+
+from git_release_tag.release_info import ReleaseInfo
+
+
+def measure(name: str, read):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = len(read())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:18} {count:>8} tags {elapsed:.3f}s, peak {peak / 1024 / 1024:.1f}MB")
+
+
+def main(number_of_tags: int = 300000, directory: str = ""):
+    directory = directory or f"/tmp/git-release-tag/benchmarks/{uuid.uuid4()}"
+    os.makedirs(f"{directory}/a", exist_ok=True)
+    ReleaseInfo(path=directory).git_init()
+    ReleaseInfo.initialize(
+        directory=f"{directory}/a",
+        semver="0.1.0",
+        base_tag="a-",
+        pre_tag_command="echo @@RELEASE@@ > release.txt",
+        dry_run=False,
+    )
+    head = subprocess.check_output(
+        ["git", "rev-parse", "HEAD"], cwd=directory, universal_newlines=True
+    ).strip()
+    with open(f"{directory}/.git/packed-refs", "a") as f:
+        for i in range(number_of_tags):
+            f.write(f"{head} refs/tags/build/{i:08d}-{uuid.uuid4()}\n")
+
+    measure("all tags", lambda: ReleaseInfo(path=f"{directory}/a").all_tags)
+    measure("release tags", lambda: ReleaseInfo(path=f"{directory}/a").release_tags)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]), *sys.argv[2:3])
@@ -0,0 +1,61 @@
+"""
+benchmarks the attribution of changed paths to components through the PathTrie.
+
+usage: PYTHONPATH=src python benchmarks/trie.py [paths] [components]
+"""
+
+import random
+import sys
+import time
+
+from git_release_tag.trie import PathTrie
+
+
+def main(number_of_paths: int = 1000000, number_of_components: int = 1000):
+    random.seed(0)
+    top = "/src/monorepo"
+    components = [
+        f"{top}/group-{i % 37}/component-{i}" for i in range(number_of_components)
+    ]
+    dependencies = {c: [c] + random.sample(components, 2) for c in components}
+
+    start = time.perf_counter()
+    trie = PathTrie()
+    for component, directories in dependencies.items():
+        for directory in directories:
+            trie.add(directory, component)
+    build = time.perf_counter() - start
+
+    paths = [
+        f"{random.choice(components)}/src/module-{i % 97}/file-{i}.py"
+        for i in range(number_of_paths)
+    ]
+
+    start = time.perf_counter()
+    attributed = 0
+    for path in paths:
+        attributed += len(trie.lookup(path))
+    lookup = time.perf_counter() - start
+
+    sample = paths[: max(1, number_of_paths // 1000)]
+    start = time.perf_counter()
+    for path in sample:
+        [
+            c
+            for c, directories in dependencies.items()
+            if any(path.startswith(d + "/") for d in directories)
+        ]
+    scan = (time.perf_counter() - start) * len(paths) / len(sample)
+
+    print(f"components         {number_of_components}")
+    print(f"paths              {number_of_paths}")
+    print(f"attributions       {attributed}")
+    print(f"build trie         {build:.3f}s")
+    print(
+        f"trie lookup        {lookup:.3f}s ({lookup / number_of_paths * 1e6:.2f}us/path)"
+    )
+    print(f"prefix scan (est.) {scan:.3f}s ({scan / lookup:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
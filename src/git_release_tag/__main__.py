@@ -1,5 +1,10 @@
+import functools
+import glob
+import json
 import logging
 import os
+from contextlib import ExitStack
+
 import click
 from pathlib import Path
 from os.path import relpath
@@ -10,20 +15,79 @@ from git_release_tag.click_parameter_types import (
     ReleaseLevel,
     OrderedGroup,
 )
+from git_release_tag import batch as batch_processing
+from git_release_tag import graph as graphs
+from git_release_tag import hook as hooks
+from git_release_tag import push as pushes
+from git_release_tag.cache import RepositoryCache
+from git_release_tag.exceptions import ReleaseTagError
 from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.repository import Repository
+from git_release_tag.transaction import Transaction
+from git_release_tag.watch import VersionMonitor
 from git_release_tag.logger import log
 
 
+def exit_on_error(command):
+    """
+    reports a ReleaseTagError raised by the `command` and exits with its exit code.
+    """
+
+    @functools.wraps(command)
+    def wrapper(*args, **kwargs):
+        try:
+            return command(*args, **kwargs)
+        except ReleaseTagError as error:
+            log.error(str(error))
+            exit(error.exit_code)
+
+    return wrapper
+
+
 @click.group(cls=OrderedGroup)
 @click.option("--dry-run", is_flag=True, default=False, help="do not change anything")
 @click.option("--verbose", is_flag=True, default=False, help="output")
+@click.option(
+    "--cache/--no-cache",
+    default=Repository.cache_enabled,
+    help="share git query results between processes and worktrees",
+)
+@click.option(
+    "--abbrev",
+    type=click.IntRange(min=4, max=40),
+    default=None,
+    help="minimum length of the commit hashes in versions, defaults to GIT_RELEASE_TAG_ABBREV",
+)
+@click.option(
+    "--cache-pre-tag-command/--no-cache-pre-tag-command",
+    default=Repository.pre_tag_command_cache_enabled,
+    help="replay the changes of a pre tag command which ran on the same input before",
+)
+@click.option(
+    "--read-index/--no-read-index",
+    default=Repository.index_reader_enabled,
+    help="skip git status for components without changes, by reading the git index",
+)
+@click.option(
+    "--shallow",
+    type=click.Choice(Repository.SHALLOW_STRATEGIES),
+    default=Repository.shallow_strategy,
+    help="when a tag is not in the history of a shallow clone",
+)
 @click.pass_context
-def main(ctx, dry_run, verbose):
+def main(
+    ctx, dry_run, verbose, cache, abbrev, cache_pre_tag_command, read_index, shallow
+):
     """
     semantic version tag support for components in git repositories.
     """
     if verbose:
         log.setLevel(logging.DEBUG)
+    Repository.cache_enabled = cache
+    Repository.abbrev = abbrev
+    Repository.pre_tag_command_cache_enabled = cache_pre_tag_command
+    Repository.index_reader_enabled = read_index
+    Repository.shallow_strategy = shallow
     ctx.obj = ctx.params
 
 
@@ -51,12 +115,32 @@ def main(ctx, dry_run, verbose):
     multiple=True,
     help="bumps the release when there are changes in dependent directories",
 )
+@click.option(
+    "--glob",
+    "patterns",
+    multiple=True,
+    help="of the directories to initialize, directories with a .release are skipped",
+)
+@click.option(
+    "--manifest",
+    type=click.Path(dir_okay=False, exists=True),
+    required=False,
+    help="listing the directories to initialize, one per line",
+)
 @click.argument(
-    "directory", type=click.Path(file_okay=False, exists=True), required=True, nargs=-1
+    "directory", type=click.Path(file_okay=False, exists=True), required=False, nargs=-1
 )
 @click.pass_context
+@exit_on_error
 def initialize(
-    ctx, initial_release, tag_prefix, pre_tag_command, tag_on_changes_in, directory
+    ctx,
+    initial_release,
+    tag_prefix,
+    pre_tag_command,
+    tag_on_changes_in,
+    patterns,
+    manifest,
+    directory,
 ):
     """
     directory with release configuration.
@@ -74,7 +158,25 @@ def initialize(
     the specified `tag`.
 
     The directories must be in a git workspace.
+
+    The directories can also be found with `--glob` patterns, or listed in a `--manifest`.
+    Multiple directories are initialized together: the tag prefixes are checked against
+    the existing tags up front, and all components are committed in a single commit.
     """
+    directory = list(directory)
+    for pattern in patterns:
+        directory.extend(
+            d
+            for d in sorted(glob.glob(pattern, recursive=True))
+            if os.path.isdir(d) and not os.path.exists(os.path.join(d, ".release"))
+        )
+    if manifest:
+        directory.extend(batch_processing.read_manifest(manifest))
+    directory = list({os.path.abspath(d): d for d in directory}.values())
+    if not directory:
+        log.error("no directories to initialize")
+        exit(1)
+
     directories = sorted(
         directory, key=lambda p: len(os.path.abspath(p).split("/")), reverse=True
     )
@@ -90,6 +192,16 @@ def initialize(
         )
         exit(1)
 
+    if len(directories) > 1:
+        result = ReleaseInfo.initialize_all(
+            directories,
+            semver=initial_release,
+            pre_tag_command=pre_tag_command,
+            tag_on_changes_in=tag_on_changes_in,
+            dry_run=ctx.obj["dry_run"],
+        )
+        exit(not result)
+
     for path in directories:
         component = ReleaseInfo(path)
         if not component.is_inside_work_tree:
@@ -119,19 +231,70 @@ def initialize(
 @main.command("show")
 @click.option("--recursive", "-r", is_flag=True, default=False, help="all directories")
 @click.option("--with-tags", is_flag=True, default=False, help="of the latest release")
+@click.option(
+    "--branch-aware",
+    is_flag=True,
+    default=False,
+    help="base the version on the commits since the tag on this branch",
+)
+@click.option(
+    "--unreleased",
+    is_flag=True,
+    default=False,
+    help="only components with unreleased commits on this branch",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    default=False,
+    help="keep running and show every version change",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.1),
+    default=1.0,
+    help="between polls, when file system events are not available",
+)
 @click.argument(
     "directory", type=click.Path(file_okay=False, exists=True), required=False, nargs=-1
 )
 @click.pass_context
-def show(ctx, recursive, with_tags, directory):
+@exit_on_error
+def show(
+    ctx, recursive, with_tags, branch_aware, unreleased, watch, interval, directory
+):
     """
     current release version.
 
     If a single directory is specified, it will print out the current release version in the
     form of `<release>[<-sha-commit>[-dirty]]`. If multiple directories are specified, it will print out the
     directory name followed by the release version.
+
+    With `--branch-aware`, a release tagged on another branch is never reported as the
+    current version. With `--unreleased`, only the components with commits since their
+    tag on this branch are shown.
+
+    With `--watch`, the directory name and version of each component are printed, followed
+    by the directory name and new version whenever the version of a component changes.
     """
     release_infos = ReleaseInfo.find_all(directory, recursive, ctx.obj["dry_run"])
+    if watch:
+        unconfigured = [r for r in release_infos if not r.has_release_configuration]
+        if unconfigured:
+            log.error(
+                f"directory {unconfigured[0].directory} has no release configuration"
+            )
+            exit(1)
+
+        def emit(release_info: ReleaseInfo, version: str):
+            print(f"{release_info.directory}\t{version}", flush=True)
+
+        try:
+            VersionMonitor(release_infos).watch(emit, interval=interval)
+        except KeyboardInterrupt:
+            pass
+        return
+
     for release_info in release_infos:
         if not release_info.has_release_configuration:
             log.error(
@@ -139,15 +302,21 @@ def show(ctx, recursive, with_tags, directory):
             )
             exit(1)
 
+        if unreleased and not release_info.has_unreleased_commits:
+            continue
+
+        if branch_aware:
+            version = release_info.branch_aware_version
+        else:
+            version = release_info.current_version
+
         if recursive:
             if with_tags:
-                print(
-                    f"{release_info.directory}\t{release_info.current_version}\t{release_info.tag}"
-                )
+                print(f"{release_info.directory}\t{version}\t{release_info.tag}")
             else:
-                print(f"{release_info.directory}\t{release_info.current_version}")
+                print(f"{release_info.directory}\t{version}")
         else:
-            print(release_info.current_version)
+            print(version)
 
 
 @main.command("bump")
@@ -156,11 +325,34 @@ def show(ctx, recursive, with_tags, directory):
 @click.option(
     "--force", is_flag=True, default=False, help="even if there are no changes"
 )
+@click.option(
+    "--lock-timeout",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="seconds to wait for a concurrent bump, defaults to GIT_RELEASE_TAG_LOCK_TIMEOUT or to wait indefinitely",
+)
+@click.option("--push", "remote", required=False, help="the releases to this remote")
+@click.option(
+    "--push-retries",
+    type=click.IntRange(min=0),
+    default=3,
+    help="when the remote was updated concurrently",
+)
 @click.argument(
     "directory", type=click.Path(file_okay=False, exists=True), required=False, nargs=-1
 )
 @click.pass_context
-def bump(ctx, recursive: bool, force: bool, level: int, directory):
+@exit_on_error
+def bump(
+    ctx,
+    recursive: bool,
+    force: bool,
+    level: int,
+    lock_timeout,
+    remote,
+    push_retries: int,
+    directory,
+):
     """
     semantic version and tags the commit.
 
@@ -168,15 +360,55 @@ def bump(ctx, recursive: bool, force: bool, level: int, directory):
     `--force` will update the semantic version, even if there are no changes since the previous release.
 
     The `pre-tag-command` is executed and any outstanding changes are committed and tagged with
-    the specified `tag`.
+    the specified `tag`. The tags of all components are created at once: if one of the
+    components fails, the repository is reset to its original state.
+
+    Concurrent bumps in the same repository, or in worktrees of it, wait for each other
+    for at most `--lock-timeout` seconds.
+
+    With `--push`, the new tags and the branch update are pushed to the remote in a
+    single atomic push. If the remote was updated concurrently, the releases are undone,
+    the branch is rebased and the bumped components are released again.
     """
     release_infos = ReleaseInfo.find_all(directory, recursive, ctx.obj["dry_run"])
 
-    if not ReleaseInfo.validate(release_infos):
-        exit(1)
+    with ExitStack() as stack:
+        if not ctx.obj["dry_run"]:
+            repositories = set(r.repository for r in release_infos if r.repository)
+            for repository in sorted(repositories, key=lambda r: r.common_dir):
+                stack.enter_context(repository.lock(lock_timeout))
+                repository.refresh()
+            for release_info in release_infos:
+                release_info.refresh()
 
-    for release_info in release_infos:
-        release_info.tag_next_release(level, force=force)
+        if not ReleaseInfo.validate(release_infos):
+            exit(1)
+
+        if remote:
+            top_levels = {}
+            for release_info in release_infos:
+                top_levels.setdefault(release_info.top_level, []).append(release_info)
+            for top_level, infos in top_levels.items():
+                pushes.bump_and_push(
+                    top_level,
+                    infos,
+                    level,
+                    force,
+                    remote,
+                    push_retries,
+                    ctx.obj["dry_run"],
+                )
+            return
+
+        transactions = {}
+        for release_info in release_infos:
+            transaction = transactions.get(release_info.top_level)
+            if not transaction:
+                transaction = stack.enter_context(
+                    Transaction(release_info.top_level, ctx.obj["dry_run"])
+                )
+                transactions[release_info.top_level] = transaction
+            release_info.tag_next_release(level, force=force, transaction=transaction)
 
 
 @main.command("validate")
@@ -187,27 +419,191 @@ def bump(ctx, recursive: bool, force: bool, level: int, directory):
     default=False,
     help="all directories",
 )
+@click.option(
+    "--deep",
+    is_flag=True,
+    default=False,
+    help="check the .release in the tagged commits",
+)
 @click.argument(
     "directory", type=click.Path(file_okay=False, exists=True), required=False, nargs=-1
 )
 @click.pass_context
-def validate(ctx, recursive: bool, directory):
+@exit_on_error
+def validate(ctx, recursive: bool, deep: bool, directory):
     """
     integrity of release configuration.
 
     checks whether the specified directories use a unique tag prefix and
     whether the specified tag exists in the git repository.
+
+    With `--deep`, it also checks that the .release in each tagged commit contains the
+    same release and tag as the working copy.
     """
-    try:
-        release_infos = ReleaseInfo.find_all(directory, recursive, True)
-        if ReleaseInfo.validate(release_infos):
-            logging.info("ok")
-        else:
-            exit(1)
-    except ValueError as error:
-        logging.error(str(error))
+    release_infos = ReleaseInfo.find_all(directory, recursive, True)
+    if ReleaseInfo.validate(release_infos, deep):
+        logging.info("ok")
+    else:
         exit(1)
 
 
+@main.command("graph")
+@click.option(
+    "--output",
+    type=click.Choice(["json", "dot"]),
+    default="json",
+    help="format of the graph",
+)
+@click.option(
+    "--versions/--no-versions",
+    default=True,
+    help="include the current version of each component",
+)
+@click.argument(
+    "directory", type=click.Path(file_okay=False, exists=True), required=False
+)
+@click.pass_context
+@exit_on_error
+def graph(ctx, output, versions, directory):
+    """
+    dependency graph of all components.
+
+    Exports the components below the directory, the directories in their
+    tag_on_changes_in and their level: components only depend on components on a
+    lower level, so all components on the same level can be built in parallel. The
+    directories are relative to the top level of the repository.
+
+    With `--cache`, the structure of the graph is only computed again when a .release
+    file changes; the versions are always read from the repository.
+    """
+    directory = directory or "."
+    component_graph = graphs.load_graph(directory, ctx.obj["dry_run"], versions)
+
+    if output == "dot":
+        print(graphs.to_dot(component_graph))
+    else:
+        print(json.dumps(component_graph, indent=2))
+
+
+@main.group("hook")
+def hook():
+    """
+    git hooks.
+    """
+
+
+@hook.command("pre-receive")
+@click.option(
+    "--git-dir",
+    type=click.Path(file_okay=False, exists=True),
+    default=".",
+    help="of the repository receiving the push",
+)
+@exit_on_error
+def pre_receive(git_dir):
+    """
+    rejects pushed release tags which do not match their .release.
+
+    Reads the `<old> <new> <ref>` lines of a pre-receive hook from stdin. A pushed tag of a
+    component is rejected if the .release in the tagged commit has another tag, or if the
+    component has a release with the same or a higher version in the history of the tagged
+    commit. Works in bare repositories. To install it, add to hooks/pre-receive:
+
+        #!/bin/sh
+        exec git-release-tag hook pre-receive
+    """
+    if not hooks.pre_receive(click.get_text_stream("stdin"), git_dir):
+        exit(1)
+
+
+@main.command("batch")
+@click.option(
+    "--action",
+    type=click.Choice(batch_processing.ACTIONS),
+    default="show",
+    help="to execute on each repository",
+)
+@click.option("--level", type=ReleaseLevel(), required=False, help="to bump")
+@click.option(
+    "--force", is_flag=True, default=False, help="even if there are no changes"
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="number of worker processes, defaults to the number of cpus",
+)
+@click.option(
+    "--output",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="format of the report",
+)
+@click.argument("manifest", type=click.Path(dir_okay=False, exists=True))
+@click.pass_context
+@exit_on_error
+def batch(ctx, action, level, force, workers, output, manifest):
+    """
+    show, validate or bump all repositories in the manifest.
+
+    The manifest lists the directories of the repositories, one per line. Relative
+    directories are relative to the manifest. All components in each repository are
+    processed in a pool of worker processes and the results are reported together.
+    """
+    if action == "bump" and level is None:
+        raise click.UsageError("--level is required to bump")
+
+    results = batch_processing.process_repositories(
+        batch_processing.read_manifest(manifest),
+        action,
+        level=level,
+        force=force,
+        dry_run=ctx.obj["dry_run"],
+        workers=workers,
+    )
+
+    if output == "json":
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            for component in result["components"]:
+                print(
+                    f"{result['repository']}\t{component['directory']}\t{component['version']}"
+                )
+            if not result["ok"]:
+                print(f"{result['repository']}\tfailed")
+
+    failed = [r["repository"] for r in results if not r["ok"]]
+    if failed:
+        log.error(f"{len(failed)} of {len(results)} repositories failed")
+        exit(1)
+
+
+@main.group("cache")
+def cache():
+    """
+    the cache of git query results.
+    """
+
+
+@cache.command("clear")
+@click.argument(
+    "directory", type=click.Path(file_okay=False, exists=True), required=False, nargs=-1
+)
+@exit_on_error
+def clear(directory):
+    """
+    removes the cached results of the repositories.
+
+    Removes the entries stored with `--cache`, `--cache-pre-tag-command` and `--read-index`
+    in the common git directory, and in the git directory of the worktree.
+    """
+    for d in directory if directory else ["."]:
+        repository = Repository(d)
+        for git_dir in sorted({repository.common_dir, repository.git_dir}):
+            RepositoryCache(git_dir).clear()
+            log.info(f"cleared the cache in {git_dir}")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,163 @@
+"""
+asyncio counterparts of the git queries of a ReleaseInfo.
+
+The functions in this module never block the event loop and never call exit: a
+failing git command raises a GitError. The number of git processes running
+concurrently is bounded by a semaphore, so that many repositories can be queried
+from a single process.
+
+The queries are the plain git queries of a single component: `--abbrev`, the cache and
+the index reader of Repository are not used.
+"""
+
+import asyncio
+import weakref
+from typing import List, Tuple
+
+from git_release_tag.exceptions import GitError
+from git_release_tag.git import _to_cli
+from git_release_tag.logger import log
+from git_release_tag.release_info import ReleaseInfo, add_arguments
+
+max_concurrency = 16
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def set_max_concurrency(value: int):
+    """
+    sets the maximum number of git processes running concurrently in an event loop.
+    """
+    global max_concurrency
+    if value < 1:
+        raise ValueError("the maximum concurrency must be at least 1")
+    max_concurrency = value
+    _semaphores.clear()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def exec(
+    cmd: List[str], cwd: str, dry_run: bool = False, fail_on_error: bool = True
+) -> Tuple[Tuple[str, str], asyncio.subprocess.Process]:
+    """
+    executes the git command `cmd` in `cwd`, like git.exec. Raises a GitError instead of exiting.
+    """
+    log.debug("$ %s  #cwd = %s", _to_cli(cmd), cwd)
+
+    if dry_run:
+        return ("", ""), None
+
+    async with _semaphore():
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+
+    out = (stdout.decode("utf-8"), stderr.decode("utf-8"))
+    log.debug("returncode = %s", process.returncode)
+    log.debug("stdout = %s", out[0])
+    log.debug("stderr = %s", out[1])
+    if fail_on_error and process.returncode != 0:
+        raise GitError(cmd, cwd, process.returncode, out[0] + out[1])
+
+    return out, process
+
+
+async def release_info(path: str) -> ReleaseInfo:
+    """
+    the ReleaseInfo of `path`, read in a thread as reading it runs git.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, ReleaseInfo, path)
+
+
+async def git_query(
+    release_info: ReleaseInfo, cmd: List[str], fail_on_error: bool = True
+) -> str:
+    out, _ = await exec(
+        cmd, release_info.directory, dry_run=False, fail_on_error=fail_on_error
+    )
+    return out[0]
+
+
+async def all_tags(release_info: ReleaseInfo) -> List[str]:
+    return list(
+        filter(
+            lambda l: l,
+            map(
+                lambda l: l.strip(),
+                (await git_query(release_info, ["git", "tag"])).split("\n"),
+            ),
+        )
+    )
+
+
+async def short_revision(release_info: ReleaseInfo) -> str:
+    return (
+        await git_query(
+            release_info,
+            add_arguments(
+                ["git", "log", "-n", "1", "--format=%h", "--"],
+                release_info.tag_on_changes_in,
+            ),
+        )
+    ).rstrip()
+
+
+async def changes_since_tag(release_info: ReleaseInfo) -> str:
+    return (
+        await git_query(
+            release_info,
+            add_arguments(
+                ["git", "diff", "--shortstat", "-r", release_info.tag, "--"],
+                release_info.tag_on_changes_in,
+            ),
+        )
+    ).rstrip()
+
+
+async def change_list(release_info: ReleaseInfo) -> List[str]:
+    return list(
+        filter(
+            lambda c: c,
+            (
+                await git_query(
+                    release_info,
+                    add_arguments(
+                        ["git", "status", "-s", "--"], release_info.tag_on_changes_in
+                    ),
+                )
+            ).split("\n"),
+        )
+    )
+
+
+async def current_version(release_info: ReleaseInfo) -> str:
+    """
+    the current version of the component, like ReleaseInfo.current_version.
+    """
+    changes, since_tag = await asyncio.gather(
+        change_list(release_info), changes_since_tag(release_info)
+    )
+    if changes:
+        return f"{release_info.semver}-{await short_revision(release_info)}-dirty"
+    elif since_tag:
+        return f"{release_info.semver}-{await short_revision(release_info)}"
+    else:
+        return release_info.semver
@@ -0,0 +1,159 @@
+"""
+processing of many repositories in a pool of worker processes.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import List, Optional
+
+from git_release_tag.exceptions import ConfigurationError, ReleaseTagError
+from git_release_tag.logger import log
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.repository import Repository
+from git_release_tag.transaction import Transaction
+
+ACTIONS = ["show", "validate", "bump"]
+
+SETTINGS = [
+    "cache_enabled",
+    "abbrev",
+    "pre_tag_command_cache_enabled",
+    "index_reader_enabled",
+    "shallow_strategy",
+    "lock_timeout",
+]
+
+
+class _Messages(logging.Handler):
+    """
+    collects the warnings and errors logged while processing a repository.
+    """
+
+    def __init__(self):
+        super(_Messages, self).__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord):
+        self.messages.append(f"{record.levelname}: {record.getMessage()}")
+
+
+def read_manifest(path: str) -> List[str]:
+    """
+    reads the repository directories from the manifest file, one per line. Empty lines
+    and lines starting with # are ignored. Relative paths are relative to the manifest.
+    """
+    result = []
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line and line[0] != "#":
+                result.append(os.path.normpath(os.path.join(base, line)))
+    return result
+
+
+def process_repository(
+    repository: str,
+    action: str,
+    level: Optional[int] = None,
+    force: bool = False,
+    dry_run: bool = False,
+) -> dict:
+    """
+    executes the `action` on all components in the `repository` and returns the outcome.
+    The releases of each git repository in it are tagged in a transaction of their own.
+    Any error fails the outcome of the `repository`, and not the other repositories.
+    """
+    result = {"repository": repository, "ok": True, "components": [], "messages": []}
+    messages = _Messages()
+    log.addHandler(messages)
+    try:
+        if not os.path.isdir(repository):
+            raise ConfigurationError(f"repository {repository} is not a directory")
+
+        release_infos = ReleaseInfo.find_all(
+            [repository], True, dry_run or action != "bump"
+        )
+        with ExitStack() as stack:
+            if action == "bump" and not dry_run:
+                repositories = set(r.repository for r in release_infos if r.repository)
+                for locked in sorted(repositories, key=lambda r: r.common_dir):
+                    stack.enter_context(locked.lock())
+                    locked.refresh()
+                for release_info in release_infos:
+                    release_info.refresh()
+
+            if action in ["validate", "bump"]:
+                result["ok"] = ReleaseInfo.validate(release_infos)
+
+            if result["ok"] and action == "bump":
+                transactions = {}
+                for release_info in release_infos:
+                    transaction = transactions.get(release_info.top_level)
+                    if not transaction:
+                        transaction = stack.enter_context(
+                            Transaction(release_info.top_level, dry_run)
+                        )
+                        transactions[release_info.top_level] = transaction
+                    release_info.tag_next_release(
+                        level, force=force, transaction=transaction
+                    )
+
+        for release_info in release_infos:
+            result["components"].append(
+                {
+                    "directory": os.path.relpath(release_info.directory, repository),
+                    "version": release_info.current_version,
+                    "tag": release_info.tag,
+                }
+            )
+    except ReleaseTagError as error:
+        log.error(str(error))
+        result["ok"] = False
+    except Exception as error:
+        log.error(f"failed to process {repository}, {error!r}")
+        result["ok"] = False
+    finally:
+        log.removeHandler(messages)
+
+    result["messages"] = messages.messages
+    return result
+
+
+def _configure(settings: dict):
+    """
+    applies the settings of Repository in a worker process, which does not inherit them
+    when processes are spawned.
+    """
+    for name, value in settings.items():
+        setattr(Repository, name, value)
+
+
+def process_repositories(
+    repositories: List[str],
+    action: str,
+    level: Optional[int] = None,
+    force: bool = False,
+    dry_run: bool = False,
+    workers: Optional[int] = None,
+) -> List[dict]:
+    """
+    executes the `action` on all repositories in a pool of worker processes. The results
+    are returned in the order of the specified repositories.
+    """
+    if not repositories:
+        return []
+
+    settings = {name: getattr(Repository, name) for name in SETTINGS}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_configure, initargs=(settings,)
+    ) as executor:
+        futures = [
+            executor.submit(
+                process_repository, repository, action, level, force, dry_run
+            )
+            for repository in repositories
+        ]
+        return [future.result() for future in futures]
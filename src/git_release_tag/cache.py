@@ -0,0 +1,186 @@
+"""
+a persistent cache of git query results, stored in the common git directory.
+
+As all worktrees of a repository share the common git directory, parallel jobs on
+different worktrees share the cache. Entries are written atomically and guarded by
+a file lock per namespace, so that concurrent processes compute an entry only once.
+
+The cache does not grow without bound: when a process starts writing to a namespace, the
+least recently used entries beyond `max_entries`, or beyond `max_bytes` in total, are
+removed.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+from git_release_tag.exceptions import ConfigurationError
+from git_release_tag.lock import FileLock
+from git_release_tag.logger import log
+
+
+def _limit(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        result = int(value)
+    except ValueError:
+        result = -1
+    if result < 0:
+        raise ConfigurationError(f"{name} must be a non-negative integer, not {value}")
+    return result
+
+
+class RepositoryCache(object):
+    """
+    a cache of JSON values by namespace and key. An entry may carry a `version`: an
+    entry of another version is absent, and is overwritten by the next `put`.
+    """
+
+    max_entries: Optional[int] = None
+
+    max_bytes: Optional[int] = None
+
+    PRUNE_INTERVAL = 1000
+
+    def __init__(self, common_dir: str):
+        super(RepositoryCache, self).__init__()
+        self.directory = os.path.join(common_dir, "git-release-tag", "cache")
+        self._writes: Dict[str, int] = {}
+
+    def __repr__(self):
+        return self.directory
+
+    def _path(self, namespace: str, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, namespace, digest[:2], digest[2:] + ".json")
+
+    def _lock(self, namespace: str, shared: bool) -> FileLock:
+        return FileLock(
+            os.path.join(self.directory, namespace + ".lock"), shared=shared
+        )
+
+    def get(
+        self, namespace: str, key: str, version: Optional[str] = None
+    ) -> Optional[Any]:
+        """
+        returns the cached value of `key` in `namespace` or None if it is absent, or
+        has another `version`.
+        """
+        path = self._path(namespace, key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != key or entry.get("version") != version:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def put(self, namespace: str, key: str, value: Any, version: Optional[str] = None):
+        """
+        stores the `value` of `key` in `namespace`. The namespace is pruned on the first
+        write of this cache, and after every `PRUNE_INTERVAL` writes.
+        """
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"key": key, "version": version, "value": value}, f)
+            os.replace(tmp, path)
+        except OSError as error:
+            log.debug("failed to write cache entry %s, %s", path, error)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        writes = self._writes.get(namespace, 0)
+        self._writes[namespace] = writes + 1
+        if writes % self.PRUNE_INTERVAL == 0:
+            self.prune(namespace)
+
+    def prune(
+        self,
+        namespace: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """
+        removes the least recently used entries of `namespace` beyond `max_entries`, or
+        beyond `max_bytes` in total. The most recently used entry is always kept. An
+        entry removed while another process reads it, is computed again.
+        """
+        if max_entries is None:
+            max_entries = self.max_entries
+        if max_entries is None:
+            max_entries = _limit("GIT_RELEASE_TAG_CACHE_MAX_ENTRIES", 10000)
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        if max_bytes is None:
+            max_bytes = _limit("GIT_RELEASE_TAG_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+        entries = []
+        for root, _, files in os.walk(os.path.join(self.directory, namespace)):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime_ns, stat.st_size, path))
+                except OSError:
+                    pass
+
+        entries.sort(reverse=True)
+        size = 0
+        pruned = []
+        for n, (_, entry_size, path) in enumerate(entries):
+            size += entry_size
+            if n > 0 and (n >= max_entries or size > max_bytes):
+                pruned.append(path)
+        if not pruned:
+            return
+
+        log.debug("pruning %d entries from %s", len(pruned), namespace)
+        for path in pruned:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """
+        removes all entries of the cache.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        key: str,
+        compute: Callable[[], Any],
+        version: Optional[str] = None,
+    ) -> Any:
+        """
+        returns the cached value of `key` in `namespace`, computing and storing it if absent
+        or of another `version`. Concurrent processes wait for the one that computes the value.
+        """
+        with self._lock(namespace, shared=True):
+            value = self.get(namespace, key, version)
+        if value is not None:
+            return value
+
+        with self._lock(namespace, shared=False):
+            value = self.get(namespace, key, version)
+            if value is None:
+                value = compute()
+                self.put(namespace, key, value, version)
+        return value
@@ -0,0 +1,80 @@
+from typing import List
+
+
+class ReleaseTagError(Exception):
+    """
+    base class of all errors raised by git-release-tag. The command line interface
+    exits with the `exit_code` of the error.
+    """
+
+    exit_code = 1
+
+
+class ConfigurationError(ReleaseTagError, ValueError):
+    """
+    the release configuration is invalid.
+    """
+
+    exit_code = 3
+
+
+class GitError(ReleaseTagError):
+    """
+    a git command returned a non-zero exit code.
+    """
+
+    exit_code = 4
+
+    def __init__(self, cmd: List[str], cwd: str, returncode: int, output: str):
+        super(GitError, self).__init__(
+            f"{' '.join(cmd)} failed in {cwd}, {output}".rstrip()
+        )
+        self.cmd = cmd
+        self.cwd = cwd
+        self.returncode = returncode
+        self.output = output
+
+
+class TagConflictError(ReleaseTagError):
+    """
+    the tag of the release already exists in the repository.
+    """
+
+    exit_code = 5
+
+
+class PreTagCommandError(ReleaseTagError):
+    """
+    the pre tag command returned a non-zero exit code.
+    """
+
+    exit_code = 6
+
+    def __init__(self, message: str, returncode: int, output: str):
+        super(PreTagCommandError, self).__init__(message)
+        self.returncode = returncode
+        self.output = output
+
+
+class LockTimeoutError(ReleaseTagError):
+    """
+    a lock on the repository could not be acquired in time.
+    """
+
+    exit_code = 7
+
+
+class ShallowHistoryError(ReleaseTagError):
+    """
+    the tag of the release is not in the history of a shallow clone.
+    """
+
+    exit_code = 8
+
+
+class PushRejectedError(ReleaseTagError):
+    """
+    the remote kept rejecting the push of the releases, as it was updated concurrently.
+    """
+
+    exit_code = 9
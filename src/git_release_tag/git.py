@@ -1,15 +1,27 @@
-from typing import List
+from typing import Dict, Iterator, List, Optional
+import os
 import re
+from git_release_tag.exceptions import GitError
 from git_release_tag.logger import log
 import subprocess
+import tempfile
 
 
 def _to_cli(cmd: List[str]):
     return " ".join(map(lambda s: f"'{s}'" if re.findall(r"\s", s) else s, cmd))
 
 
-def exec(cmd: List[str], cwd: str, dry_run: bool = False, fail_on_error: bool = True):
+def exec(
+    cmd: List[str],
+    cwd: str,
+    dry_run: bool = False,
+    fail_on_error: bool = True,
+    input: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+):
     log.debug("$ %s  #cwd = %s", _to_cli(cmd), cwd)
+    if input is not None:
+        log.debug("stdin = %s", input)
 
     if dry_run:
         return ("", ""), None
@@ -17,16 +29,85 @@ def exec(cmd: List[str], cwd: str, dry_run: bool = False, fail_on_error: bool =
     process = subprocess.Popen(
         cmd,
         cwd=cwd,
+        stdin=subprocess.PIPE if input is not None else None,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         universal_newlines=True,
+        env=dict(os.environ, **env) if env else None,
     )
-    out = process.communicate()
+    out = process.communicate(input)
     log.debug("returncode = %s", process.returncode)
     log.debug("stdout = %s", out[0])
     log.debug("stderr = %s", out[1])
     if fail_on_error and process.returncode != 0:
-        log.error("%s failed in %s, %s", " ".join(cmd), cwd, (out[0] + out[1]))
-        exit(1)
+        raise GitError(cmd, cwd, process.returncode, out[0] + out[1])
 
     return out, process
+
+
+def stream(cmd: List[str], cwd: str) -> Iterator[str]:
+    """
+    executes the command and yields its output line by line, without reading all of it
+    in memory. If the iteration is stopped early, the command is terminated.
+    """
+    log.debug("$ %s  #cwd = %s", _to_cli(cmd), cwd)
+
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            universal_newlines=True,
+        )
+        completed = False
+        try:
+            for line in process.stdout:
+                yield line[:-1] if line.endswith("\n") else line
+            completed = True
+        finally:
+            if not completed:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+
+        log.debug("returncode = %s", process.returncode)
+        if process.returncode != 0:
+            stderr.seek(0)
+            raise GitError(
+                cmd, cwd, process.returncode, stderr.read().decode("utf-8", "replace")
+            )
+
+
+def cat_file(objects: List[str], cwd: str) -> List[Optional[bytes]]:
+    """
+    the contents of the `objects`, read in a single `git cat-file --batch`. The content
+    of a missing object is None.
+    """
+    cmd = ["git", "cat-file", "--batch"]
+    log.debug("$ %s  #cwd = %s", _to_cli(cmd), cwd)
+    process = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    out, err = process.communicate("".join(f"{o}\n" for o in objects).encode("utf-8"))
+    log.debug("returncode = %s", process.returncode)
+    if process.returncode != 0:
+        raise GitError(cmd, cwd, process.returncode, err.decode("utf-8", "replace"))
+
+    result = []
+    offset = 0
+    for _ in objects:
+        end = out.index(b"\n", offset)
+        header = out[offset:end].split(b" ")
+        offset = end + 1
+        if header[-1] == b"missing" or header[-1] == b"ambiguous":
+            result.append(None)
+            continue
+        size = int(header[2])
+        result.append(out[offset : offset + size])
+        offset += size + 1
+    return result
@@ -0,0 +1,173 @@
+"""
+exports the dependency graph of the components in a repository.
+
+The graph lists the components below a directory, the directories in their
+tag_on_changes_in, and the level of each component: components on the same level do
+not depend on each other, and only depend on components on lower levels. When the
+repository cache is enabled, the structure of the graph is stored under the blob shas of
+the .release files, so that it is only computed again when a configuration changes. The
+versions depend on the commits and the working tree, and are computed on every call.
+"""
+
+import json
+import os
+from typing import Dict, List, Tuple
+
+from git_release_tag import git
+from git_release_tag.exceptions import ConfigurationError
+from git_release_tag.release_info import ReleaseInfo, dependency_graph
+from git_release_tag.repository import Repository
+
+FORMAT = 1
+
+
+def release_blobs(repository: Repository, directory: str) -> List[Tuple[str, str]]:
+    """
+    the paths relative to the top level and the blob shas of the .release files below
+    `directory`, including the changes which are not committed.
+    """
+    prefix = os.path.relpath(os.path.realpath(directory), repository.directory)
+    pathspec = ":(glob)**/.release" if prefix == "." else f":(glob){prefix}/**/.release"
+
+    out, _ = git.exec(
+        ["git", "ls-files", "-s", "-z", "--", pathspec], repository.directory
+    )
+    blobs = {}
+    for entry in filter(None, out[0].split("\0")):
+        info, path = entry.split("\t", 1)
+        blobs[path] = info.split()[1]
+
+    out, _ = git.exec(
+        ["git", "ls-files", "-m", "-o", "--exclude-standard", "-z", "--", pathspec],
+        repository.directory,
+    )
+    changed = sorted(set(filter(None, out[0].split("\0"))))
+    for path in changed:
+        blobs.pop(path, None)
+    changed = [
+        p for p in changed if os.path.isfile(os.path.join(repository.directory, p))
+    ]
+    if changed:
+        out, _ = git.exec(
+            ["git", "hash-object", "--stdin-paths"],
+            repository.directory,
+            input="\n".join(changed) + "\n",
+        )
+        blobs.update(zip(changed, out[0].split()))
+    return sorted(blobs.items())
+
+
+def component_graph(release_infos: List[ReleaseInfo], top_level: str) -> Dict:
+    """
+    the graph of the `release_infos`, with directories relative to `top_level`.
+    """
+
+    def relative(directory: str) -> str:
+        return os.path.relpath(os.path.realpath(directory), top_level)
+
+    graph = dependency_graph(release_infos)
+    infos = {os.path.abspath(r.directory): r for r in release_infos}
+    levels: Dict[str, int] = {}
+
+    def level(directory: str, path: Tuple[str, ...] = ()) -> int:
+        if directory in path:
+            raise ConfigurationError(f"cycle detected on {directory}")
+        if directory not in levels:
+            dependencies = [d for d in graph[directory] if d in infos]
+            levels[directory] = 1 + max(
+                (level(d, path + (directory,)) for d in dependencies), default=-1
+            )
+        return levels[directory]
+
+    components = []
+    for directory in sorted(infos, key=lambda d: (level(d), relative(d))):
+        info = infos[directory]
+        components.append(
+            {
+                "directory": relative(directory),
+                "base_tag": info.base_tag,
+                "release": info.semver,
+                "tag": info.tag,
+                "tag_on_changes_in": info.tag_on_changes_in,
+                "depends_on": sorted(relative(d) for d in graph[directory]),
+                "level": levels[directory],
+            }
+        )
+
+    edges = sorted(
+        [c["directory"], dependency]
+        for c in components
+        for dependency in c["depends_on"]
+    )
+    return {"format": FORMAT, "components": components, "edges": edges}
+
+
+def load_graph(directory: str, dry_run: bool = False, versions: bool = False) -> Dict:
+    """
+    the graph of all components below `directory`, from the repository cache if enabled.
+    With `versions`, the current version of each component is added after the structure
+    is read from the cache.
+    """
+    top_level = ReleaseInfo.git_top_level(directory)
+    if not top_level:
+        raise ConfigurationError(f"{directory} is not inside a git repository")
+    repository = Repository(top_level)
+
+    def compute() -> Dict:
+        release_infos = ReleaseInfo.find_all([directory], True, dry_run)
+        return component_graph(release_infos, top_level)
+
+    if not repository.cache:
+        graph = compute()
+    else:
+        key = json.dumps(
+            [
+                FORMAT,
+                os.path.relpath(os.path.realpath(directory), top_level),
+                release_blobs(repository, directory),
+            ]
+        )
+        graph = repository.cache.get_or_compute("graph", key, compute)
+
+    if versions:
+        add_versions(graph, top_level, dry_run)
+    return graph
+
+
+def add_versions(graph: Dict, top_level: str, dry_run: bool = False) -> Dict:
+    """
+    adds the current version of each component to the `graph`.
+    """
+    release_infos = [
+        ReleaseInfo(os.path.join(top_level, c["directory"]), dry_run=dry_run)
+        for c in graph["components"]
+    ]
+    Repository.attach(release_infos)
+    for component, release_info in zip(graph["components"], release_infos):
+        component["version"] = release_info.current_version
+    return graph
+
+
+def to_dot(graph: Dict) -> str:
+    """
+    the `graph` in the Graphviz dot language. Edges point from a component to the
+    directories it depends on; directories which are not components are dashed.
+    """
+    lines = ["digraph components {", "  rankdir=BT;"]
+    levels: Dict[int, List[str]] = {}
+    for component in graph["components"]:
+        directory = component["directory"]
+        levels.setdefault(component["level"], []).append(directory)
+        label = directory + "\n" + component.get("version", component["release"])
+        lines.append(f"  {json.dumps(directory)} [label={json.dumps(label)}];")
+    components = set(d for directories in levels.values() for d in directories)
+    for directory in sorted(set(d for _, d in graph["edges"]) - components):
+        lines.append(f"  {json.dumps(directory)} [style=dashed];")
+    for directory, dependency in graph["edges"]:
+        lines.append(f"  {json.dumps(directory)} -> {json.dumps(dependency)};")
+    for level in sorted(levels):
+        lines.append(
+            "  {rank=same; " + " ".join(json.dumps(d) for d in levels[level]) + "}"
+        )
+    lines.append("}")
+    return "\n".join(lines)
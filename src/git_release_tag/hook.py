@@ -0,0 +1,238 @@
+"""
+validates pushed release tags in a server side pre-receive hook.
+
+Only the pushed tags are inspected. The .release files changed by the tagged commits are
+read in a single batch and matched with the tags. A release tag is rejected if its .release
+does not contain the release, or if the component has a release with the same or a higher
+version in the history of the tagged commit, and if a .release read for it cannot be
+parsed. Tags which do not belong to a component are accepted. The hook does not need a
+working directory, so it works in bare repositories.
+"""
+
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from git_release_tag import git
+from git_release_tag.exceptions import ConfigurationError
+from git_release_tag.logger import log
+from git_release_tag.release_info import parse_release
+
+
+class Update(NamedTuple):
+    old: str
+    new: str
+    ref: str
+
+    @property
+    def is_deletion(self) -> bool:
+        """
+        true if the reference is deleted: the new object id is the null id, which has the
+        length of the object ids of the repository.
+        """
+        return not self.new.strip("0")
+
+
+def read_updates(lines: Iterable[str]) -> List[Update]:
+    """
+    the reference updates in the `<old> <new> <ref>` lines passed to a pre-receive hook.
+    """
+    result = []
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 3:
+            result.append(Update(*fields))
+    return result
+
+
+def parse_version(value: str) -> Optional[Tuple[int, ...]]:
+    """
+    the version in `value`, or None if it is not a <major.minor.patch> version.
+    """
+    parts = value.split(".")
+    if len(parts) != 3 or not all(p.isdigit() for p in parts):
+        return None
+    return tuple(map(int, parts))
+
+
+class TagValidator(object):
+    def __init__(self, git_dir: str):
+        super(TagValidator, self).__init__()
+        self.git_dir = git_dir
+        self.errors: List[str] = []
+
+    def _error(self, message: str):
+        if message not in self.errors:
+            log.error(message)
+            self.errors.append(message)
+
+    def _changed_releases(self, commits: List[str]) -> Dict[str, List[str]]:
+        """
+        the .release files changed by each of the `commits`, in a single diff-tree.
+        """
+        result = {c: [] for c in commits}
+        out, _ = git.exec(
+            [
+                "git",
+                "diff-tree",
+                "--stdin",
+                "--root",
+                "-r",
+                "--name-only",
+                "--no-renames",
+            ],
+            self.git_dir,
+            input="".join(f"{c}\n" for c in sorted(set(commits))),
+        )
+        commit = None
+        for line in out[0].split("\n"):
+            if line in result:
+                commit = line
+            elif commit and os.path.basename(line) == ".release":
+                result[commit].append(line)
+        return result
+
+    def _all_releases(self, commit: str) -> List[str]:
+        out, _ = git.exec(
+            ["git", "ls-tree", "-r", "-z", "--name-only", commit], self.git_dir
+        )
+        return [p for p in out[0].split("\0") if os.path.basename(p) == ".release"]
+
+    def _read_releases(self, objects: List[Tuple[str, str]]) -> List[Optional[Dict]]:
+        """
+        the parsed .release files at the (commit, path) `objects`. A file which cannot be
+        parsed is reported as an error.
+        """
+        result = []
+        contents = git.cat_file([f"{c}:{p}" for c, p in objects], self.git_dir)
+        for (commit, path), content in zip(objects, contents):
+            try:
+                result.append(
+                    parse_release(content.decode("utf-8"), f"{path} in {commit}")
+                    if content is not None
+                    else None
+                )
+            except ConfigurationError as error:
+                self._error(str(error))
+                result.append(None)
+            except UnicodeDecodeError as error:
+                self._error(f"{path} in {commit} is not valid UTF-8, {error}")
+                result.append(None)
+        return result
+
+    @staticmethod
+    def _match(
+        tag: str, candidates: List[Tuple[str, Optional[Dict]]]
+    ) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        the path and content of the .release of the component of `tag` among the
+        `candidates`: the one with the tag, or otherwise the one with a base tag that is a
+        prefix of the tag.
+        """
+        for path, release in candidates:
+            if release and release["tag"] == tag:
+                return path, release
+        for path, release in candidates:
+            if (
+                release
+                and release["base_tag"]
+                and tag.startswith(release["base_tag"])
+                and parse_version(tag[len(release["base_tag"]) :])
+            ):
+                return path, release
+        return None, None
+
+    def _existing_releases(
+        self, base_tags: List[str]
+    ) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        the existing tags and their commits for each of the `base_tags`, in a single call.
+        """
+        result = {b: [] for b in base_tags}
+        if not base_tags:
+            return result
+        for line in git.stream(
+            [
+                "git",
+                "for-each-ref",
+                "--format=%(refname:strip=2) %(objectname) %(*objectname)",
+            ]
+            + sorted(set(f"refs/tags/{b}*" for b in base_tags)),
+            self.git_dir,
+        ):
+            name, objectname, peeled = line.split(" ")
+            for base_tag in base_tags:
+                if name.startswith(base_tag) and parse_version(name[len(base_tag) :]):
+                    result[base_tag].append((name, peeled or objectname))
+        return result
+
+    def _is_ancestor(self, commit: str, head: str) -> bool:
+        _, process = git.exec(
+            ["git", "merge-base", "--is-ancestor", commit, head],
+            self.git_dir,
+            fail_on_error=False,
+        )
+        return process.returncode == 0
+
+    def validate(self, updates: List[Update]) -> bool:
+        """
+        validates the pushed tags and reports all errors.
+        """
+        tags = [
+            (u.ref[len("refs/tags/") :], u.new)
+            for u in updates
+            if u.ref.startswith("refs/tags/") and not u.is_deletion
+        ]
+        if not tags:
+            return True
+
+        out, _ = git.exec(
+            ["git", "rev-parse"] + [f"{new}^{{commit}}" for _, new in tags],
+            self.git_dir,
+        )
+        commits = out[0].split()
+        changed = self._changed_releases(commits)
+        objects = sorted(set((c, p) for c in commits for p in changed[c]))
+        contents = dict(zip(objects, self._read_releases(objects)))
+
+        releases = []
+        for (tag, _), commit in zip(tags, commits):
+            path, release = self._match(
+                tag, [(p, contents[(commit, p)]) for p in changed[commit]]
+            )
+            if not release:
+                paths = self._all_releases(commit)
+                path, release = self._match(
+                    tag,
+                    list(zip(paths, self._read_releases([(commit, p) for p in paths]))),
+                )
+            if not release:
+                log.debug(f"{tag} is not the tag of a component")
+                continue
+            if release["tag"] != tag:
+                self._error(
+                    f"tag {tag} does not match {path} in {commit}, which has tag {release['tag']}"
+                )
+                continue
+            releases.append((tag, commit, release))
+
+        existing = self._existing_releases(
+            list(set(r["base_tag"] for _, _, r in releases))
+        )
+        for tag, commit, release in releases:
+            version = parse_version(release["release"])
+            for name, existing_commit in existing[release["base_tag"]]:
+                existing_version = parse_version(name[len(release["base_tag"]) :])
+                if name == tag or existing_version < version:
+                    continue
+                if self._is_ancestor(existing_commit, commit):
+                    self._error(
+                        f"tag {tag} is not newer than release {name} in its history"
+                    )
+        return not self.errors
+
+
+def pre_receive(lines: Iterable[str], git_dir: str) -> bool:
+    """
+    validates the tags in the reference updates passed to a pre-receive hook.
+    """
+    return TagValidator(git_dir).validate(read_updates(lines))
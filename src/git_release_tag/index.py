@@ -0,0 +1,515 @@
+"""
+reads the git index in-process, to detect outstanding changes without running git.
+
+The index lists the tracked files with the stat data they had when git last compared
+them with their content. A tracked file whose stat data still matches is unchanged.
+Changes to the index itself and untracked files are detected by comparing with the
+state of the worktree when git last reported no outstanding changes: HEAD, the index
+file, the modification times of the directories, the .gitignore files down to the
+directories, the excludes files and the git configuration. The excludes file is looked up
+in the git configuration files. Whenever the answer is not certain, like for racily clean
+entries, unsupported index features or configuration includes, git is asked.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import re
+import stat
+import struct
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from git_release_tag.cache import RepositoryCache
+from git_release_tag.logger import log
+
+_HEADER = struct.Struct(">4sII")
+_ENTRY = struct.Struct(">IIIIIIIIII20sH")
+_EXTENDED = struct.Struct(">H")
+_HASH_SIZE = 20
+
+_ASSUME_VALID = 0x8000
+_EXTENDED_FLAG = 0x4000
+_STAGE_MASK = 0x3000
+_NAME_MASK = 0x0FFF
+_SKIP_WORKTREE = 0x4000
+_INTENT_TO_ADD = 0x2000
+
+_UNSUPPORTED_EXTENSIONS = [b"link", b"sdir"]
+_GIT_ENVIRONMENT = [
+    "GIT_DIR",
+    "GIT_WORK_TREE",
+    "GIT_INDEX_FILE",
+    "GIT_COMMON_DIR",
+    "GIT_OBJECT_DIRECTORY",
+    "GIT_CONFIG_GLOBAL",
+    "GIT_CONFIG_SYSTEM",
+    "GIT_CONFIG_NOSYSTEM",
+    "GIT_CONFIG_PARAMETERS",
+    "GIT_CONFIG_COUNT",
+    "GIT_CEILING_DIRECTORIES",
+]
+
+_CONFIG_SECTION = re.compile(r'\[\s*([-.\w]+)\s*(?:"((?:[^"\\]|\\.)*)")?\s*\](.*)')
+
+NAMESPACE = "clean-worktree"
+
+
+class IndexEntry(NamedTuple):
+    path: bytes
+    ctime: Tuple[int, int]
+    mtime: Tuple[int, int]
+    dev: int
+    ino: int
+    mode: int
+    uid: int
+    gid: int
+    size: int
+    flags: int
+    extended_flags: int
+
+
+def _varint(buffer, offset: int) -> Tuple[int, int]:
+    c = buffer[offset]
+    offset += 1
+    value = c & 0x7F
+    while c & 0x80:
+        c = buffer[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (c & 0x7F)
+    return value, offset
+
+
+class GitIndex(object):
+    """
+    the entries of a git index file of version 2, 3 or 4. The file is memory mapped and
+    only the paths are decoded up front: entries are decoded when they are looked up.
+    Raises a ValueError if the index uses features which are not supported.
+    """
+
+    def __init__(self, path: str):
+        super(GitIndex, self).__init__()
+        self.path = path
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        signature, self.version, count = _HEADER.unpack_from(self._buffer, 0)
+        if signature != b"DIRC" or self.version not in [2, 3, 4]:
+            raise ValueError(f"unsupported index {path}, version {self.version}")
+
+        self.paths: List[bytes] = []
+        self._offsets: List[int] = []
+        offset = _HEADER.size
+        previous = b""
+        for _ in range(count):
+            flags = _ENTRY.unpack_from(self._buffer, offset)[-1]
+            name_offset = offset + _ENTRY.size
+            if flags & _EXTENDED_FLAG:
+                if self.version < 3:
+                    raise ValueError(f"extended flags in index {path} version 2")
+                name_offset += _EXTENDED.size
+
+            if self.version == 4:
+                strip, name_offset = _varint(self._buffer, name_offset)
+                end = self._buffer.find(b"\0", name_offset)
+                name = previous[: len(previous) - strip] + self._buffer[name_offset:end]
+                next_offset = end + 1
+            else:
+                length = flags & _NAME_MASK
+                if length == _NAME_MASK:
+                    end = self._buffer.find(b"\0", name_offset)
+                else:
+                    end = name_offset + length
+                name = self._buffer[name_offset:end]
+                next_offset = offset + ((end - offset + 8) & ~7)
+
+            self.paths.append(name)
+            self._offsets.append(offset)
+            previous = name
+            offset = next_offset
+
+        while offset + 8 <= len(self._buffer) - _HASH_SIZE:
+            extension, size = struct.unpack_from(">4sI", self._buffer, offset)
+            if extension in _UNSUPPORTED_EXTENSIONS:
+                raise ValueError(f"unsupported extension {extension} in index {path}")
+            offset += 8 + size
+
+    def close(self):
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def entry(self, i: int) -> IndexEntry:
+        fields = _ENTRY.unpack_from(self._buffer, self._offsets[i])
+        flags = fields[11]
+        extended_flags = 0
+        if flags & _EXTENDED_FLAG:
+            (extended_flags,) = _EXTENDED.unpack_from(
+                self._buffer, self._offsets[i] + _ENTRY.size
+            )
+        return IndexEntry(
+            path=self.paths[i],
+            ctime=(fields[0], fields[1]),
+            mtime=(fields[2], fields[3]),
+            dev=fields[4],
+            ino=fields[5],
+            mode=fields[6],
+            uid=fields[7],
+            gid=fields[8],
+            size=fields[9],
+            flags=flags,
+            extended_flags=extended_flags,
+        )
+
+    def entries(self, directory: bytes) -> List[IndexEntry]:
+        """
+        the entries below `directory`, relative to the top level, found by binary search.
+        An empty `directory` is the top level.
+        """
+        if not directory:
+            return [self.entry(i) for i in range(len(self.paths))]
+        start = bisect.bisect_left(self.paths, directory + b"/")
+        end = bisect.bisect_left(self.paths, directory + b"0")
+        return [self.entry(i) for i in range(start, end)]
+
+
+def _split_seconds(ns: int) -> Tuple[int, int]:
+    return (ns // 1000000000) & 0xFFFFFFFF, ns % 1000000000
+
+
+def is_unchanged(
+    entry: IndexEntry, top_level: str, index_mtime: Tuple[int, int]
+) -> bool:
+    """
+    true if the stat data of the file matches the `entry`, and the entry is not racily
+    clean: modified in the same second as the index was written, or later.
+    """
+    if entry.flags & (_ASSUME_VALID | _STAGE_MASK):
+        return False
+    if entry.extended_flags & (_SKIP_WORKTREE | _INTENT_TO_ADD):
+        return False
+    if entry.mtime[0] >= index_mtime[0]:
+        return False
+    if stat.S_IFMT(entry.mode) not in [stat.S_IFREG, stat.S_IFLNK]:
+        return False
+
+    try:
+        st = os.lstat(os.path.join(top_level, os.fsdecode(entry.path)))
+    except OSError:
+        return False
+    if stat.S_IFMT(st.st_mode) != stat.S_IFMT(entry.mode):
+        return False
+    if stat.S_ISREG(st.st_mode) and (st.st_mode & 0o100) != (entry.mode & 0o100):
+        return False
+    return (
+        _split_seconds(st.st_mtime_ns) == entry.mtime
+        and _split_seconds(st.st_ctime_ns) == entry.ctime
+        and st.st_ino & 0xFFFFFFFF == entry.ino
+        and st.st_uid & 0xFFFFFFFF == entry.uid
+        and st.st_gid & 0xFFFFFFFF == entry.gid
+        and st.st_size & 0xFFFFFFFF == entry.size
+    )
+
+
+def find_git_dir(directory: str) -> Optional[Tuple[str, str]]:
+    """
+    the top level and git directory of the worktree containing `directory`, found
+    without running git, or None if the git environment variables are used.
+    """
+    if any(name in os.environ for name in _GIT_ENVIRONMENT):
+        return None
+    current = os.path.realpath(directory)
+    while True:
+        dot_git = os.path.join(current, ".git")
+        if os.path.isdir(dot_git):
+            return current, dot_git
+        if os.path.isfile(dot_git):
+            with open(dot_git, "r") as f:
+                content = f.read().strip()
+            if not content.startswith("gitdir: "):
+                return None
+            return current, os.path.realpath(os.path.join(current, content[8:]))
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def common_dir(git_dir: str) -> str:
+    """
+    the git directory shared by all worktrees, of the git directory of a worktree.
+    """
+    relative_common_dir = _read(os.path.join(git_dir, "commondir"))
+    if relative_common_dir:
+        return os.path.realpath(os.path.join(git_dir, relative_common_dir))
+    return git_dir
+
+
+def _config_home() -> str:
+    return os.environ.get("XDG_CONFIG_HOME") or os.path.join(
+        os.path.expanduser("~"), ".config"
+    )
+
+
+def config_files(git_dir: str) -> List[str]:
+    """
+    the git configuration files of the repository, which may configure the excludes file.
+    """
+    return [
+        "/etc/gitconfig",
+        os.path.join(_config_home(), "git", "config"),
+        os.path.join(os.path.expanduser("~"), ".gitconfig"),
+        os.path.join(common_dir(git_dir), "config"),
+        os.path.join(git_dir, "config.worktree"),
+    ]
+
+
+def _config_string(value: str) -> str:
+    result = []
+    quoted = False
+    escaped = False
+    for c in value:
+        if escaped:
+            result.append({"n": "\n", "t": "\t", "b": "\b"}.get(c, c))
+            escaped = False
+        elif c == "\\":
+            escaped = True
+        elif c == '"':
+            quoted = not quoted
+        elif c in "#;" and not quoted:
+            break
+        else:
+            result.append(c)
+    if escaped or quoted:
+        raise ValueError(f"unsupported configuration value {value}")
+    return "".join(result).strip()
+
+
+def config_entries(paths: List[str]) -> Iterator[Tuple[str, str]]:
+    """
+    the variables of the configuration files as name and value, in order of precedence.
+    The section and key of the names are lower case, like remote.origin.promisor. Missing
+    files are skipped. Raises a ValueError if a file includes other files.
+    """
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                content = f.read()
+        except OSError:
+            continue
+        section = None
+        for line in content.splitlines():
+            line = line.strip()
+            match = _CONFIG_SECTION.match(line)
+            if match:
+                section = match.group(1).lower()
+                if section in ["include", "includeif"]:
+                    raise ValueError(f"unsupported include in {path}")
+                if match.group(2) is not None:
+                    section += "." + re.sub(r"\\(.)", r"\1", match.group(2))
+                line = match.group(3).strip()
+            if section is None or not line or line[0] in "#;":
+                continue
+            key, has_value, value = line.partition("=")
+            key = key.strip().lower()
+            yield f"{section}.{key}", _config_string(value) if has_value else "true"
+
+
+def config_value(paths: List[str], name: str) -> Optional[str]:
+    """
+    the value of the configuration variable `name` without subsection, like
+    core.excludesFile, read from the configuration files in order of precedence. Raises a
+    ValueError if a file includes other files.
+    """
+    name = name.lower()
+    result = None
+    for variable, value in config_entries(paths):
+        if variable == name:
+            result = value
+    return result
+
+
+def excludes_file(git_dir: str, top_level: str) -> str:
+    """
+    the path of the excludes file configured by core.excludesFile, or its default.
+    """
+    path = config_value(config_files(git_dir), "core.excludesFile")
+    if not path:
+        return os.path.join(_config_home(), "git", "ignore")
+    return os.path.join(top_level, os.path.expanduser(path))
+
+
+def resolve_head(git_dir: str) -> Optional[str]:
+    """
+    the commit of HEAD, read from the loose or packed references.
+    """
+    shared_dir = common_dir(git_dir)
+
+    head = _read(os.path.join(git_dir, "HEAD"))
+    if not head:
+        return None
+    if not head.startswith("ref: "):
+        return head
+    ref = head[5:]
+    for base in [git_dir, shared_dir]:
+        value = _read(os.path.join(base, ref))
+        if value:
+            return None if value.startswith("ref: ") else value
+
+    packed_refs = os.path.join(shared_dir, "packed-refs")
+    if os.path.exists(packed_refs):
+        with open(packed_refs, "r") as f:
+            for line in f:
+                if line.rstrip("\n").endswith(" " + ref):
+                    return line.split(" ")[0]
+    return None
+
+
+def _stamp(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+class WorktreeState(object):
+    """
+    the state of the directories of a component in a worktree, determined without
+    running git.
+    """
+
+    def __init__(self, top_level: str, git_dir: str, directories: List[str]):
+        super(WorktreeState, self).__init__()
+        self.top_level = top_level
+        self.git_dir = git_dir
+        self.directories = directories
+        self.cache = RepositoryCache(git_dir)
+        self.key = json.dumps(directories)
+        self.index_path = os.path.join(git_dir, "index")
+        self.excludes_file = excludes_file(git_dir, top_level)
+        self.state = {
+            "head": resolve_head(git_dir),
+            "index": _stamp(self.index_path),
+            "exclude": _stamp(os.path.join(git_dir, "info", "exclude")),
+            "configs": [_stamp(p) for p in config_files(git_dir)],
+            "excludes_file": [self.excludes_file, _stamp(self.excludes_file)],
+            "ignores": self._ignore_files(),
+            "directories": self._directory_times(),
+        }
+        self._remembered: Optional[dict] = None
+
+    @staticmethod
+    def capture(directory: str, paths: List[str]) -> Optional["WorktreeState"]:
+        """
+        the state of the `paths` of the component in `directory`, or None if the worktree
+        cannot be read without git.
+        """
+        found = find_git_dir(directory)
+        if not found:
+            return None
+        top_level, git_dir = found
+        directories = []
+        for path in paths:
+            relative = os.path.relpath(
+                os.path.realpath(os.path.join(directory, path)), top_level
+            )
+            if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+                return None
+            directories.append("" if relative == "." else relative)
+        try:
+            return WorktreeState(top_level, git_dir, sorted(set(directories)))
+        except (OSError, ValueError) as error:
+            log.debug(f"failed to read the configuration of {top_level}, {error}")
+            return None
+
+    def _ignore_files(self) -> Dict[str, Optional[List[int]]]:
+        """
+        the stamps of the .gitignore files in the top level and in the parent directories
+        of the directories. Those in the directories are stamped by _directory_times.
+        """
+        result = {}
+        for directory in self.directories:
+            parent = ""
+            for part in [""] + directory.split(os.sep)[:-1]:
+                parent = os.path.join(parent, part)
+                path = os.path.join(parent, ".gitignore")
+                result[path] = _stamp(os.path.join(self.top_level, path))
+        return result
+
+    def _directory_times(self) -> Dict[str, object]:
+        result = {}
+        for directory in self.directories:
+            for root, subdirectories, files in os.walk(
+                os.path.join(self.top_level, directory)
+            ):
+                subdirectories[:] = [d for d in subdirectories if d != ".git"]
+                relative = os.path.relpath(root, self.top_level)
+                try:
+                    result[relative] = os.stat(root).st_mtime_ns
+                except OSError:
+                    pass
+                if ".gitignore" in files:
+                    result[os.path.join(relative, ".gitignore")] = _stamp(
+                        os.path.join(root, ".gitignore")
+                    )
+        return result
+
+    def is_clean(self) -> bool:
+        """
+        true if the directories are known to have no outstanding changes: the worktree is
+        in the state in which git last reported no changes, and the stat data of all
+        tracked files still match the index.
+        """
+        if not self.state["head"] or not self.state["index"]:
+            return False
+        self._remembered = self.cache.get(NAMESPACE, self.key)
+        if self._remembered != self.state:
+            return False
+
+        try:
+            with GitIndex(self.index_path) as index:
+                index_mtime = _split_seconds(index.stat.st_mtime_ns)
+                for directory in self.directories:
+                    for entry in index.entries(os.fsencode(directory)):
+                        if not is_unchanged(entry, self.top_level, index_mtime):
+                            log.debug(f"{entry.path} may have changed")
+                            return False
+        except (OSError, ValueError, struct.error) as error:
+            log.debug(f"failed to read {self.index_path}, {error}")
+            return False
+        return True
+
+    def remember_clean(self):
+        """
+        records the state, after git reported that there are no outstanding changes. As git
+        status refreshes the index, the state is captured again, and only recorded if
+        nothing but the index changed while git ran. The state is only written if it
+        differs from the recorded one, like when git was asked because of a racily clean
+        entry.
+        """
+        try:
+            after = WorktreeState(self.top_level, self.git_dir, self.directories)
+        except (OSError, ValueError) as error:
+            log.debug(f"failed to read the configuration of {self.top_level}, {error}")
+            return
+        if any(after.state[k] != v for k, v in self.state.items() if k != "index"):
+            return
+        self.state = after.state
+        if self._remembered != self.state:
+            self.cache.put(NAMESPACE, self.key, self.state)
+            self._remembered = self.state
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from git_release_tag.exceptions import LockTimeoutError
+
+
+class FileLock(object):
+    """
+    an advisory lock on a file, shared between processes and threads. The lock is
+    reentrant within a thread: nested acquisitions only release the lock when the
+    outermost is released. Each thread locks its own file descriptor, so threads exclude
+    each other like processes do.
+
+    On platforms without fcntl, the lock is a no-op.
+    """
+
+    def __init__(
+        self, path: str, shared: bool = False, timeout: Optional[float] = None
+    ):
+        super(FileLock, self).__init__()
+        self.path = path
+        self.shared = shared
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __repr__(self):
+        return self.path
+
+    @property
+    def _count(self) -> int:
+        return getattr(self._local, "count", 0)
+
+    @_count.setter
+    def _count(self, value: int):
+        self._local.count = value
+
+    @property
+    def _fd(self) -> Optional[int]:
+        return getattr(self._local, "fd", None)
+
+    @_fd.setter
+    def _fd(self, value: Optional[int]):
+        self._local.fd = value
+
+    @property
+    def is_locked(self) -> bool:
+        return self._count > 0
+
+    @property
+    def depth(self) -> int:
+        """
+        the number of nested acquisitions of the lock in this thread.
+        """
+        return self._count
+
+    def acquire(self):
+        if self._count > 0:
+            self._count += 1
+            return
+
+        if fcntl:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            operation = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+            deadline = None if self.timeout is None else time.time() + self.timeout
+            while True:
+                try:
+                    fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                    break
+                except (BlockingIOError, PermissionError):
+                    if deadline is not None and time.time() >= deadline:
+                        os.close(fd)
+                        raise LockTimeoutError(
+                            f"timed out after {self.timeout}s waiting for lock {self.path}"
+                        )
+                    time.sleep(0.05)
+            self._fd = fd
+        self._count = 1
+
+    def release(self):
+        if self._count == 0:
+            return
+        self._count -= 1
+        if self._count == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
@@ -0,0 +1,155 @@
+"""
+caches the file changes made by pre tag commands.
+
+A pre tag command is keyed on the command after substitution of the release, and on
+the tree shas of the tag_on_changes_in directories in the working tree, just before the
+command runs. When the same command runs on the same input again, like in a retried
+build, the recorded file changes are replayed instead of running the command.
+"""
+
+import base64
+import json
+import os
+import shutil
+import stat
+import tempfile
+from typing import Callable, Dict, List, Optional
+
+from git_release_tag import git
+from git_release_tag.cache import RepositoryCache
+from git_release_tag.logger import log
+from git_release_tag.repository import Repository
+
+NAMESPACE = "pre-tag-command"
+
+
+class PreTagCommandCache(object):
+    def __init__(self, repository: Repository):
+        super(PreTagCommandCache, self).__init__()
+        self.repository = repository
+        self.cache = RepositoryCache(repository.common_dir)
+
+    def _relative_paths(self, directory: str, paths: List[str]) -> List[str]:
+        top_level = os.path.realpath(self.repository.directory)
+        return [
+            os.path.relpath(os.path.realpath(os.path.join(directory, p)), top_level)
+            for p in paths
+        ]
+
+    def write_tree(self, directory: str, paths: List[str]) -> str:
+        """
+        the tree of the repository with the `paths` as they are in the working tree. It is
+        written through a temporary index, so the index of the worktree is not changed. The
+        copy keeps the modification time of the index, which git needs to detect files
+        changed in the same second as the index was written.
+        """
+        out, _ = git.exec(["git", "rev-parse", "--git-path", "index"], directory)
+        index = os.path.join(directory, out[0].strip())
+        fd, tmp = tempfile.mkstemp(prefix="index-", dir=os.path.dirname(index))
+        os.close(fd)
+        try:
+            if os.path.exists(index):
+                shutil.copy2(index, tmp)
+            else:
+                os.remove(tmp)
+            env = {"GIT_INDEX_FILE": tmp}
+            git.exec(["git", "add", "-A", "--"] + paths, directory, env=env)
+            out, _ = git.exec(["git", "write-tree"], directory, env=env)
+            return out[0].strip()
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def key(self, command: str, tree: str, directory: str, paths: List[str]) -> str:
+        """
+        the key of the `command` on the content of the `paths` in the `tree`.
+        """
+        relative_paths = sorted(set(self._relative_paths(directory, paths)))
+        out, _ = git.exec(
+            ["git", "cat-file", "--batch-check=%(objectname)"],
+            self.repository.directory,
+            input="".join(
+                f"{tree}\n" if p == "." else f"{tree}:{p}\n" for p in relative_paths
+            ),
+        )
+        shas = [
+            "" if line.endswith(" missing") else line
+            for line in out[0].split("\n")[:-1]
+        ]
+        return json.dumps([command, list(zip(relative_paths, shas))])
+
+    def record(
+        self, before: str, directory: str, paths: List[str], output: bytes
+    ) -> Dict:
+        """
+        the changes to the `paths` in the working tree since the tree `before`.
+        """
+        after = self.write_tree(directory, paths)
+        out, _ = git.exec(
+            ["git", "diff-tree", "-r", "-z", "--no-renames", "--name-status"]
+            + [before, after, "--"]
+            + self._relative_paths(directory, paths),
+            self.repository.directory,
+        )
+        fields = out[0].split("\0")
+        changes = []
+        for status, path in zip(fields[0::2], fields[1::2]):
+            full_path = os.path.join(self.repository.directory, path)
+            if status == "D":
+                changes.append({"path": path, "deleted": True})
+                continue
+            with open(full_path, "rb") as f:
+                content = f.read()
+            changes.append(
+                {
+                    "path": path,
+                    "content": base64.b64encode(content).decode("ascii"),
+                    "executable": bool(os.stat(full_path).st_mode & stat.S_IXUSR),
+                }
+            )
+        return {
+            "changes": changes,
+            "output": base64.b64encode(output or b"").decode("ascii"),
+        }
+
+    def replay(self, entry: Dict) -> bytes:
+        for change in entry["changes"]:
+            path = os.path.join(self.repository.directory, change["path"])
+            if change.get("deleted"):
+                log.debug(f"removing {path}")
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            log.debug(f"writing {path}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(base64.b64decode(change["content"]))
+            mode = os.stat(path).st_mode
+            if change["executable"]:
+                mode |= stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+            else:
+                mode &= ~(stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+            os.chmod(path, mode)
+        return base64.b64decode(entry["output"])
+
+    def run(
+        self,
+        command: str,
+        directory: str,
+        paths: List[str],
+        execute: Callable[[], Optional[bytes]],
+    ) -> Optional[bytes]:
+        """
+        replays the changes of the `command` if it ran on the same input before, otherwise
+        calls `execute` and records the changes it made.
+        """
+        before = self.write_tree(directory, paths)
+        key = self.key(command, before, directory, paths)
+        entry = self.cache.get(NAMESPACE, key)
+        if entry is not None:
+            log.info(f"replaying the recorded changes of {command} in {directory}")
+            return self.replay(entry)
+
+        output = execute()
+        self.cache.put(NAMESPACE, key, self.record(before, directory, paths, output))
+        return output
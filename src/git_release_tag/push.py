@@ -0,0 +1,94 @@
+"""
+bumps the components in a repository and pushes the releases in a single atomic push.
+
+Only the tags created by the bump and the update of the current branch are pushed. If
+the remote rejects the push because it was updated concurrently, the releases are
+undone, the branch is rebased on the remote branch and only the components which were
+bumped are planned again, up to `retries` times.
+"""
+
+from typing import List
+
+from git_release_tag import git
+from git_release_tag.exceptions import ConfigurationError, GitError, PushRejectedError
+from git_release_tag.logger import log
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.transaction import Transaction
+
+
+def update_from_remote(
+    transaction: Transaction, remote: str, release_infos: List[ReleaseInfo]
+):
+    """
+    fetches the branch and the release tags of the `release_infos` from `remote`, and
+    rebases the branch on the remote branch.
+    """
+    directory = transaction.directory
+    branch = transaction.branch
+    if not branch:
+        raise ConfigurationError(f"cannot rebase {directory}, HEAD is detached")
+
+    log.info(f"fetching {branch} from {remote}")
+    git.exec(
+        ["git", "fetch", "-q", "--no-tags", remote, f"refs/heads/{branch}"], directory
+    )
+    out, _ = git.exec(["git", "rev-parse", "FETCH_HEAD"], directory)
+    commit = out[0].strip()
+
+    base_tags = sorted(set(r.base_tag for r in release_infos))
+    git.exec(
+        ["git", "fetch", "-q", "--no-tags", remote]
+        + [f"refs/tags/{b}*:refs/tags/{b}*" for b in base_tags],
+        directory,
+    )
+
+    _, process = git.exec(
+        ["git", "rebase", "-q", "--autostash", commit], directory, fail_on_error=False
+    )
+    if process.returncode != 0:
+        git.exec(["git", "rebase", "--abort"], directory, fail_on_error=False)
+        raise GitError(
+            ["git", "rebase", commit], directory, process.returncode, "rebase failed"
+        )
+
+
+def bump_and_push(
+    top_level: str,
+    release_infos: List[ReleaseInfo],
+    level: int,
+    force: bool,
+    remote: str,
+    retries: int = 3,
+    dry_run: bool = False,
+):
+    """
+    bumps the `release_infos` in the repository at `top_level` and pushes the releases to
+    `remote`.
+    """
+    planned = release_infos
+    for attempt in range(retries + 1):
+        with Transaction(top_level, dry_run) as transaction:
+            for release_info in planned:
+                release_info.tag_next_release(
+                    level, force=force, transaction=transaction
+                )
+        if transaction.push(remote):
+            return
+
+        tags = set(tag for tag, _ in transaction.tags)
+        planned = [r for r in planned if r.tag in tags]
+        transaction.undo()
+        if attempt == retries:
+            raise PushRejectedError(
+                f"{remote} rejected the releases of {top_level} {retries + 1} times"
+            )
+
+        log.info(
+            f"rebasing {top_level} and planning {', '.join(r.directory for r in planned)} again"
+        )
+        update_from_remote(transaction, remote, planned)
+        repositories = set(r.repository for r in planned if r.repository)
+        for repository in repositories:
+            repository.refresh()
+        for release_info in planned:
+            release_info.read()
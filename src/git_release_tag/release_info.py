@@ -2,11 +2,21 @@ import fnmatch
 import os
 import re
 import subprocess
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 
 from git_release_tag import git
+from git_release_tag.exceptions import (
+    ConfigurationError,
+    GitError,
+    PreTagCommandError,
+    TagConflictError,
+)
+from git_release_tag.index import WorktreeState, find_git_dir
 from git_release_tag.logger import log
+from git_release_tag.repository import Repository
+from git_release_tag.transaction import Transaction
 
 
 class ReleaseInfo(object):
@@ -19,18 +29,21 @@ class ReleaseInfo(object):
         self.dry_run = dry_run
         self.directory = path
         self.path = os.path.join(os.path.abspath(self.directory), ".release")
-        self.tag_on_changes_in = ["."]
+        self.repository: Optional[Repository] = None
+        self.top_level = None
 
         self.base_tag = None
         self._semver = None
         self._pre_tag_command = None
+        self._read_stamp = None
 
         if not os.path.isdir(self.directory):
-            log.error(f"directory {self.directory} does not exist")
-            exit(1)
+            raise ConfigurationError(f"directory {self.directory} does not exist")
 
         if self.has_release_configuration:
             self.read()
+        else:
+            self.tag_on_changes_in = ["."]
 
     @property
     def tag_on_changes_in(self) -> [str]:
@@ -43,18 +56,19 @@ class ReleaseInfo(object):
     def tag_on_changes_in(self, directories: [str]):
         self._compare_directories = directories if directories else ["."]
         root = self.git_top_level(Path(self.directory).absolute())
+        self.top_level = root
 
         relative_directories = []
         for directory in self._compare_directories:
             absolute_path = Path(self.directory).absolute().joinpath(directory)
             if not absolute_path.is_dir():
-                raise ValueError(
+                raise ConfigurationError(
                     f"dependency {directory} of {self.directory} is not a directory"
                 )
 
             toplevel = self.git_top_level(absolute_path)
             if toplevel != root:
-                raise ValueError(
+                raise ConfigurationError(
                     f"dependency {directory} is not in the same git repository as {self.directory}"
                 )
 
@@ -75,7 +89,7 @@ class ReleaseInfo(object):
     @semver.setter
     def semver(self, value):
         if value and not re.fullmatch(r"[0-9]+\.[0-9]+\.[0-9]+", value):
-            raise ValueError(
+            raise ConfigurationError(
                 f"semantic version of release '{self.semver}' does not match release <major>.<minor>.<patch>"
             )
         self._semver = value
@@ -91,9 +105,9 @@ class ReleaseInfo(object):
             refs = set(re.findall(r"@@([a-zA-Z_]+)@@", value))
             unsupported = refs.difference(allowed)
             if unsupported:
-                raise ValueError(f"found unsupported references {unsupported}")
+                raise ConfigurationError(f"found unsupported references {unsupported}")
             if "RELEASE" not in refs:
-                raise ValueError(
+                raise ConfigurationError(
                     f"expected at least a @@RELEASE@@ reference in pre tag command: '{value}' of {self.directory}"
                 )
 
@@ -104,51 +118,41 @@ class ReleaseInfo(object):
         return f"{self.base_tag}{self.semver}"
 
     @property
-    def all_tags(self) -> List[str]:
-        return list(
-            map(lambda l: l.strip(), self.git_query(["git", "tag"]).split("\n"))
-        )
-
-    def read(self):
-        result = {}
-        with open(self.path, "r") as f:
-            for line in f:
-                line = line.rstrip()
-                if len(line) > 0 and line[0] != "#":
-                    value = line.split("=", 1)
-                    result[value[0].strip()] = value[1].strip()
-        if not ("release" in result and "tag" in result):
-            log.error(f"{self.path} does not contain release and/or tag values")
-            exit(1)
-
-        if not re.fullmatch(r"[0-9]+\.[0-9]+\.[0-9]+", result["release"]):
-            log.error(
-                f"ERROR: incorrect format of release in {self.path}, expected <major.minor.patch>"
-            )
-            exit(1)
-        self.semver = result["release"]
-
-        match = re.search(r"(?P<release>[0-9]+\.[0-9]+\.[0-9]+$)", result["tag"])
-        if match:
-            self.base_tag = result["tag"][: match.start()]
-            if match.group("release") != self.semver:
-                log.warning(
-                    f"tag {self.tag} in {self.path} does not match specified release {match.group('release')}"
-                )
+    def release_tags(self) -> Set[str]:
+        """
+        the tags in the repository starting with the base tag of the release.
+        """
+        return self._get_repository().release_tags(self.base_tag)
 
-        else:
-            log.error(
-                f"ERROR: incorrect format old the tag in {self.path}, expected tag <base>{self.semver}"
-            )
-            exit(1)
+    @property
+    def all_tags(self) -> List[str]:
+        if self.repository:
+            return self.repository.tags
+        return list(git.stream(["git", "tag"], self.directory))
 
+    def _stamp(self) -> Optional[tuple]:
         try:
-            self.tag_on_changes_in = result.get("tag_on_changes_in", ".").split()
-        except ValueError as error:
-            log.error(error)
-            exit(1)
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
 
-        self.pre_tag_command = result.get("pre_tag_command")
+    def refresh(self):
+        """
+        re-reads the release configuration, if it was changed since it was read or written.
+        """
+        if self.has_release_configuration and self._stamp() != self._read_stamp:
+            log.debug(f"{self.path} changed, reading it again")
+            self.read()
+
+    def read(self):
+        self._read_stamp = self._stamp()
+        with open(self.path, "r") as f:
+            configuration = parse_release(f.read(), self.path)
+        self.semver = configuration["release"]
+        self.base_tag = configuration["base_tag"]
+        self.tag_on_changes_in = configuration["tag_on_changes_in"]
+        self.pre_tag_command = configuration["pre_tag_command"]
 
     def __repr__(self):
         return self.path
@@ -173,6 +177,7 @@ class ReleaseInfo(object):
                 f.write(
                     "tag_on_changes_in={}\n".format(" ".join(self.tag_on_changes_in))
                 )
+        self._read_stamp = self._stamp()
 
     def next_version(self, level):
         assert self.semver
@@ -187,8 +192,7 @@ class ReleaseInfo(object):
             release[ReleaseInfo.MINOR] = 0
             release[ReleaseInfo.PATCH] = 0
         else:
-            log.error("I can only bump PATCH, MINOR or MAJOR levels")
-            exit(1)
+            raise ConfigurationError("I can only bump PATCH, MINOR or MAJOR levels")
 
         self.semver = "%d.%d.%d" % (release[0], release[1], release[2])
 
@@ -206,6 +210,17 @@ class ReleaseInfo(object):
 
     @staticmethod
     def git_top_level(directory) -> str:
+        """
+        the top level of the worktree containing `directory`, found without running git
+        unless the git environment variables are used or `directory` is inside the git
+        directory. Returns an empty string outside of a worktree.
+        """
+        directory = str(directory)
+        found = find_git_dir(directory) if os.path.isdir(directory) else None
+        if found and os.path.isdir(found[1]):
+            path = os.path.realpath(directory)
+            if os.path.commonpath([path, found[1]]) != found[1]:
+                return found[0]
         out, _ = git.exec(
             ["git", "rev-parse", "--show-toplevel"],
             directory,
@@ -228,6 +243,16 @@ class ReleaseInfo(object):
 
     @property
     def short_revision(self) -> str:
+        """
+        the abbreviated commit which last changed the component. In a shallow clone, the
+        commit is fetched according to the shallow strategy of the repository.
+        """
+        return self._get_repository().short_revision(self)
+
+    def query_short_revision(self) -> str:
+        """
+        the abbreviated commit which last changed the component, queried from git.
+        """
         return self.git_query(
             add_arguments(
                 ["git", "log", "-n", "1", "--format=%h", "--"],
@@ -235,18 +260,49 @@ class ReleaseInfo(object):
             )
         ).rstrip()
 
-    @property
-    def changes_since_tag(self) -> str:
+    def query_revision(self) -> str:
+        """
+        the commit which last changed the component, queried from git.
+        """
         return self.git_query(
             add_arguments(
-                ["git", "diff", "--shortstat", "-r", self.tag, "--"],
+                ["git", "log", "-n", "1", "--format=%H", "--"],
                 self.tag_on_changes_in,
             )
         ).rstrip()
 
+    @property
+    def changes_since_tag(self) -> str:
+        """
+        the shortstat of the changes since the tag. In a shallow clone without the tag,
+        the tag is fetched according to the shallow strategy of the repository.
+        """
+        repository = self._get_repository()
+        try:
+            return repository.diff_summary(
+                self.directory, [self.tag], self.tag_on_changes_in
+            )
+        except GitError:
+            if not repository.is_shallow:
+                raise
+        repository.fetch_tag(self.tag)
+        return repository.diff_summary(
+            self.directory, [self.tag], self.tag_on_changes_in
+        )
+
     @property
     def change_list(self) -> List[str]:
-        return list(
+        """
+        the outstanding changes in the working tree. With `index_reader_enabled`, a
+        worktree without changes is recognized without running git.
+        """
+        state = None
+        if Repository.index_reader_enabled:
+            state = WorktreeState.capture(self.directory, self.tag_on_changes_in)
+            if state and state.is_clean():
+                return []
+
+        result = list(
             filter(
                 lambda c: c,
                 self.git_query(
@@ -254,17 +310,119 @@ class ReleaseInfo(object):
                 ).split("\n"),
             )
         )
+        if state and not result:
+            state.remember_clean()
+        return result
+
+    @property
+    def has_outstanding_changes(self) -> bool:
+        """
+        true if the working tree has outstanding changes in the directories of the
+        component. The components attached to a repository share a single git status.
+        """
+        if not self.repository or len(self.repository.release_infos) < 2:
+            return bool(self.change_list)
+        return self.repository.outstanding_changes(self)[self]
+
+    def _committed_changes_since_tag(self) -> str:
+        """
+        the changes since the tag in a worktree without outstanding changes. These are the
+        changes between the tagged commit and HEAD, which are cached by the repository.
+        """
+        if self.repository and self.repository.cache:
+            tag_commit = self.repository.tag_commit(self.tag)
+            head = self.repository.head
+            if tag_commit and head:
+                return self.repository.diff_shortstat(
+                    self.directory, tag_commit, head, self.tag_on_changes_in
+                )
+        return self.changes_since_tag
 
     @property
     def current_version(self):
-        if self.change_list:
+        if self.has_outstanding_changes:
+            return f"{self.semver}-{self.short_revision}-dirty"
+        elif self._committed_changes_since_tag():
+            return f"{self.semver}-{self.short_revision}"
+        else:
+            return self.semver
+
+    def _get_repository(self) -> Repository:
+        if not self.repository:
+            self.repository = Repository(self.top_level or self.directory)
+        return self.repository
+
+    @property
+    def is_released_on_branch(self) -> bool:
+        """
+        true if the tag of the release is an ancestor of HEAD.
+        """
+        repository = self._get_repository()
+        tag_commit = repository.tag_commit(self.tag)
+        head = repository.head
+        return bool(tag_commit and head and repository.is_ancestor(tag_commit, head))
+
+    @property
+    def has_unreleased_commits(self) -> bool:
+        """
+        true if the tag is not an ancestor of HEAD, or if there are commits
+        since the tag which touch the component.
+        """
+        if not self.is_released_on_branch:
+            return True
+        return bool(
+            self.git_query(
+                add_arguments(
+                    ["git", "rev-list", "-n", "1", f"{self.tag}..HEAD", "--"],
+                    self.tag_on_changes_in,
+                )
+            ).strip()
+        )
+
+    @property
+    def branch_aware_version(self):
+        """
+        the current version, based on the commits on this branch. If the tag of the release is
+        not an ancestor of HEAD, the release was made on another branch and the version includes
+        the revision, without comparing the working tree to the tag.
+        """
+        if self.has_outstanding_changes:
             return f"{self.semver}-{self.short_revision}-dirty"
-        elif self.changes_since_tag:
+        elif self.has_unreleased_commits:
             return f"{self.semver}-{self.short_revision}"
         else:
             return self.semver
 
-    def tag_next_release(self, level, message: str = None, force: bool = False):
+    def tag_next_release(
+        self,
+        level,
+        message: str = None,
+        force: bool = False,
+        transaction: Optional[Transaction] = None,
+    ):
+        """
+        bumps the release at `level` and tags it, if there are changes since the tag or if
+        `force` is set. Concurrent releases in the repository are serialized by the lock of
+        the repository. If the configuration was changed while waiting for the lock, it is
+        read again.
+        """
+        if self.dry_run:
+            return self._tag_next_release(level, message, force, transaction)
+
+        repository = self._get_repository()
+        with repository.lock() as lock:
+            if lock.depth == 1:
+                repository.refresh()
+                self.refresh()
+            return self._tag_next_release(level, message, force, transaction)
+
+    def _tag_next_release(
+        self,
+        level,
+        message: str = None,
+        force: bool = False,
+        transaction: Optional[Transaction] = None,
+    ):
         if not force:
             changes = self.changes_since_tag
             if changes:
@@ -274,30 +432,49 @@ class ReleaseInfo(object):
                 return
 
         self.next_version(level)
-        if self.tag in self.all_tags:
-            log.error(f"tag {self.tag} already exists")
-            exit(1)
+        if self.tag in self.release_tags:
+            raise TagConflictError(f"tag {self.tag} already exists")
 
         self.write()
+        if transaction:
+            transaction.record([self.path])
         if not message:
             message = f"bumped {self.git_prefix} to release {self.semver}"
-        self.commit_and_tag(message)
+        self.commit_and_tag(message, transaction)
 
     def git_init(self):
         self.git_update(["git", "init"])
 
-    def commit_and_tag(self, message: str):
-        self.exec_pre_tag_command()
+    def commit_and_tag(self, message: str, transaction: Optional[Transaction] = None):
+        """
+        commits the outstanding changes and tags the commit. If a `transaction` is specified,
+        the tag is created when the transaction is committed.
+        """
+        with (
+            transaction.recording(self.directory, self.tag_on_changes_in)
+            if transaction
+            else nullcontext()
+        ):
+            self.exec_pre_tag_command()
 
-        changes = list(map(lambda s: s[3:], self.change_list))
-        if changes:
-            log.info(f"commit changes to {', '.join(changes)} in {self.directory}")
-            self.git_update(add_arguments(["git", "add"], self.tag_on_changes_in))
-            self.git_update(["git", "commit", "-m", message])
-        else:
-            log.info(f"no changes to commit in {self.directory}")
+            changes = list(map(lambda s: s[3:], self.change_list))
+            if changes:
+                log.info(f"commit changes to {', '.join(changes)} in {self.directory}")
+                self.git_update(add_arguments(["git", "add"], self.tag_on_changes_in))
+                self.git_update(["git", "commit", "-m", message])
+                if self.repository:
+                    self.repository.refresh_revisions()
+            else:
+                log.info(f"no changes to commit in {self.directory}")
 
-        self.git_update(["git", "tag", self.tag])
+        if transaction:
+            transaction.tag(
+                self.tag, self.git_query(["git", "rev-parse", "HEAD"]).strip()
+            )
+        else:
+            self.git_update(["git", "tag", self.tag])
+        if self.repository and not self.dry_run:
+            self.repository.add_tag(self.tag)
         log.info(f"release {self.semver} of {self.directory} tagged by {self.tag}")
 
     @staticmethod
@@ -310,8 +487,7 @@ class ReleaseInfo(object):
         dry_run: bool = False,
     ) -> bool:
         if not os.path.isdir(directory):
-            log.error(f"{directory} is not a directory.")
-            exit(1)
+            raise ConfigurationError(f"{directory} is not a directory.")
 
         path = os.path.join(directory, ".release")
         if os.path.exists(path):
@@ -324,9 +500,10 @@ class ReleaseInfo(object):
         info.pre_tag_command = pre_tag_command
         info.tag_on_changes_in = tag_on_changes_in
 
-        if info.is_inside_work_tree and info.tag in info.all_tags:
-            log.error(f"tag {info.tag} already exist in git repository for {info.path}")
-            exit(1)
+        if info.is_inside_work_tree and info.tag in info.release_tags:
+            raise TagConflictError(
+                f"tag {info.tag} already exist in git repository for {info.path}"
+            )
 
         info.write()
         if info.is_inside_work_tree:
@@ -338,6 +515,115 @@ class ReleaseInfo(object):
 
         return True
 
+    @staticmethod
+    def initialize_all(
+        directories: List[str],
+        semver: str = "0.0.0",
+        base_tags: Optional[List[str]] = None,
+        pre_tag_command: str = "",
+        tag_on_changes_in=["."],
+        dry_run: bool = False,
+    ) -> bool:
+        """
+        initializes the release configuration of many components at once. The tag prefixes
+        are validated against a single snapshot of the tags of each repository, and the
+        components of a repository are committed in a single commit and tagged in a single
+        reference transaction. The `base_tags` default to the directory names.
+        """
+        if base_tags is None:
+            base_tags = [
+                f"{os.path.basename(os.path.abspath(d))}-" for d in directories
+            ]
+
+        result = True
+        release_infos = []
+        for directory, base_tag in zip(directories, base_tags):
+            if not os.path.isdir(directory):
+                raise ConfigurationError(f"{directory} is not a directory.")
+            if os.path.exists(os.path.join(directory, ".release")):
+                log.error(f"{directory} is ready initialized.")
+                result = False
+                continue
+
+            info = ReleaseInfo(path=directory, dry_run=dry_run)
+            if not info.top_level:
+                raise ConfigurationError(f"{directory} is not inside a git workspace")
+            info.semver = semver
+            info.base_tag = base_tag
+            info.pre_tag_command = pre_tag_command
+            info.tag_on_changes_in = tag_on_changes_in
+            release_infos.append(info)
+
+        directories_by_base_tag: Dict[str, List[str]] = {}
+        for info in release_infos:
+            directories_by_base_tag.setdefault(info.base_tag, []).append(info.directory)
+        for base_tag, tagged in directories_by_base_tag.items():
+            if len(tagged) > 1:
+                raise ConfigurationError(
+                    f"tag prefix {base_tag} is used by {', '.join(tagged)}"
+                )
+
+        Repository.attach(release_infos)
+        repositories = {i.repository.directory: i.repository for i in release_infos}
+        for top_level, repository in sorted(repositories.items()):
+            components = [i for i in release_infos if i.repository is repository]
+            prefixes = set()
+            for tag in repository.tags:
+                match = re.fullmatch(r"(.*?)[0-9]+\.[0-9]+\.[0-9]+", tag)
+                if match:
+                    prefixes.add(match.group(1))
+            for info in components:
+                if info.base_tag in prefixes:
+                    raise TagConflictError(
+                        f"tag prefix {info.base_tag} of {info.directory} is already used in {top_level}"
+                    )
+
+            with Transaction(top_level, dry_run) as transaction:
+                paths = sorted(
+                    set(
+                        os.path.relpath(
+                            os.path.realpath(os.path.join(i.directory, d)),
+                            os.path.realpath(top_level),
+                        )
+                        for i in components
+                        for d in i.tag_on_changes_in
+                    )
+                )
+                with transaction.recording(top_level, paths):
+                    for info in components:
+                        info.write()
+                        transaction.record([info.path])
+                        info.exec_pre_tag_command()
+
+                    log.info(
+                        f"commit the release configuration of {len(components)} components"
+                    )
+                    git.exec(["git", "add", "--"] + paths, top_level, dry_run=dry_run)
+                    git.exec(
+                        [
+                            "git",
+                            "commit",
+                            "-q",
+                            "-m",
+                            f"initialized {len(components)} components",
+                        ],
+                        top_level,
+                        dry_run=dry_run,
+                    )
+                head = (
+                    "HEAD"
+                    if dry_run
+                    else repository.git_query(["git", "rev-parse", "HEAD"]).strip()
+                )
+                for info in components:
+                    transaction.tag(info.tag, head)
+                    log.info(
+                        f"release {info.semver} of {info.directory} tagged by {info.tag}"
+                    )
+            repository.refresh()
+
+        return result
+
     def process_pre_tag_command(self):
         result = self.pre_tag_command.replace("@@RELEASE@@", self.semver)
         result = result.replace("@@TAG@@", self.tag)
@@ -350,25 +636,44 @@ class ReleaseInfo(object):
 
         if self.pre_tag_command:
             cmd = self.process_pre_tag_command()
-            process = subprocess.Popen(
-                cmd,
-                shell=True,
-                cwd=self.directory,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            out = process.communicate()
-            if process.returncode != 0:
-                log.error(
-                    f"{self.pre_tag_command} in {self.directory}, returned {process.returncode}, output {out[1]}"
+            if Repository.pre_tag_command_cache_enabled:
+                from git_release_tag.pre_tag_cache import PreTagCommandCache
+
+                return PreTagCommandCache(self._get_repository()).run(
+                    cmd,
+                    self.directory,
+                    self.tag_on_changes_in,
+                    lambda: self._run_pre_tag_command(cmd),
                 )
-                exit(1)
-            return out[0]
+            return self._run_pre_tag_command(cmd)
+
+    def _run_pre_tag_command(self, cmd: str) -> bytes:
+        process = subprocess.Popen(
+            cmd,
+            shell=True,
+            cwd=self.directory,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        out = process.communicate()
+        if process.returncode != 0:
+            raise PreTagCommandError(
+                f"{self.pre_tag_command} in {self.directory}, returned {process.returncode}, output {out[1]}",
+                process.returncode,
+                out[1],
+            )
+        return out[0]
 
     @staticmethod
-    def validate(release_infos: List["ReleaseInfo"]) -> bool:
+    def validate(release_infos: List["ReleaseInfo"], deep: bool = False) -> bool:
+        """
+        checks that the base tags are unique and that the tags exist. If `deep` is set, it
+        also checks that the .release in each tagged commit matches the working copy. All
+        inconsistencies are reported.
+        """
         result = True
         base_tags = {}
+        tagged = []
         for release_info in release_infos:
             base_tag = release_info.base_tag
             existing = base_tags.get(base_tag)
@@ -380,16 +685,68 @@ class ReleaseInfo(object):
             else:
                 base_tags[base_tag] = release_info
 
-            if not release_info.is_inside_work_tree:
+            if not (release_info.top_level or release_info.is_inside_work_tree):
                 log.error(f"{release_info.directory} is not inside a git workspace")
                 result = False
             else:
-                if release_info.tag not in release_info.all_tags:
+                if release_info.tag not in release_info.release_tags:
                     log.error(
                         f"tag {release_info.tag} in {release_info.path} does not exist in repository"
                     )
                     result = False
+                else:
+                    tagged.append(release_info)
+
+        if deep:
+            result = ReleaseInfo._validate_tagged_releases(tagged) and result
+        return result
+
+    @staticmethod
+    def _validate_tagged_releases(release_infos: List["ReleaseInfo"]) -> bool:
+        """
+        checks that the .release in the tagged commit of each release info matches the
+        working copy. The .release files of each repository are read in a single batch.
+        """
+        result = True
+        repositories: Dict[Repository, List[ReleaseInfo]] = {}
+        for release_info in release_infos:
+            repositories.setdefault(release_info._get_repository(), []).append(
+                release_info
+            )
 
+        for repository, infos in repositories.items():
+            top_level = os.path.realpath(repository.directory)
+            paths = [
+                os.path.relpath(os.path.realpath(info.path), top_level)
+                for info in infos
+            ]
+            contents = git.cat_file(
+                [f"refs/tags/{info.tag}:{path}" for info, path in zip(infos, paths)],
+                repository.directory,
+            )
+            for info, path, content in zip(infos, paths, contents):
+                location = f"{path} in tag {info.tag}"
+                if content is None:
+                    log.error(f"{location} does not exist")
+                    result = False
+                    continue
+                try:
+                    tagged = parse_release(content.decode("utf-8"), location)
+                except (ConfigurationError, UnicodeDecodeError) as error:
+                    log.error(str(error))
+                    result = False
+                    continue
+
+                for name, expected in [
+                    ("release", info.semver),
+                    ("tag", info.tag),
+                    ("base_tag", info.base_tag),
+                ]:
+                    if tagged[name] != expected:
+                        log.error(
+                            f"{location} has {name} {tagged[name]}, {info.path} has {expected}"
+                        )
+                        result = False
         return result
 
     # staticmethod
@@ -411,19 +768,58 @@ class ReleaseInfo(object):
                 for root, _, files in os.walk(dir, topdown=False):
                     for item in fnmatch.filter(files, ".release"):
                         info = ReleaseInfo(path=os.path.join(root), dry_run=dry_run)
-                        info.read()
                         result.append(info)
         else:
             for dir in directories:
                 result.append(ReleaseInfo(dir, dry_run=dry_run))
 
+        Repository.attach(result)
         return order_release_infos(result)
 
 
-def order_release_infos(release_infos: [ReleaseInfo]) -> [ReleaseInfo]:
+def parse_release(content: str, path: str) -> Dict:
     """
-    sort the release infos in the order in which they can be processed without causing an
-    endless tagging loop due to the tag_on_changes_in directory.
+    parses the content of the .release file at `path` into its release, base_tag,
+    tag_on_changes_in and pre_tag_command.
+    """
+    result = {}
+    for line in content.splitlines():
+        line = line.rstrip()
+        if len(line) > 0 and line[0] != "#":
+            value = line.split("=", 1)
+            result[value[0].strip()] = value[1].strip()
+    if not ("release" in result and "tag" in result):
+        raise ConfigurationError(f"{path} does not contain release and/or tag values")
+
+    if not re.fullmatch(r"[0-9]+\.[0-9]+\.[0-9]+", result["release"]):
+        raise ConfigurationError(
+            f"incorrect format of release in {path}, expected <major.minor.patch>"
+        )
+
+    match = re.search(r"(?P<release>[0-9]+\.[0-9]+\.[0-9]+$)", result["tag"])
+    if not match:
+        raise ConfigurationError(
+            f"incorrect format of the tag in {path}, expected tag <base>{result['release']}"
+        )
+    if match.group("release") != result["release"]:
+        log.warning(
+            f"tag {result['tag']} in {path} does not match specified release {result['release']}"
+        )
+
+    return {
+        "release": result["release"],
+        "tag": result["tag"],
+        "base_tag": result["tag"][: match.start()],
+        "tag_on_changes_in": result.get("tag_on_changes_in", ".").split(),
+        "pre_tag_command": result.get("pre_tag_command"),
+    }
+
+
+def dependency_graph(release_infos: [ReleaseInfo]) -> Dict[str, List[str]]:
+    """
+    maps the absolute directory of each release info to the absolute directories in
+    its tag_on_changes_in, other than itself. The dependent directories which do not
+    contain a release info are included without dependencies.
     """
     infos = {os.path.abspath(r.directory): r for r in release_infos}
 
@@ -438,6 +834,16 @@ def order_release_infos(release_infos: [ReleaseInfo]) -> [ReleaseInfo]:
                 graph[dependent_directory] = []
             if dependent_directory != directory:
                 graph[directory].append(dependent_directory)
+    return graph
+
+
+def order_release_infos(release_infos: [ReleaseInfo]) -> [ReleaseInfo]:
+    """
+    sort the release infos in the order in which they can be processed without causing an
+    endless tagging loop due to the tag_on_changes_in directory.
+    """
+    infos = {os.path.abspath(r.directory): r for r in release_infos}
+    graph = dependency_graph(release_infos)
 
     def visit(directory, stack, visited):
         visited.add(directory)
@@ -445,7 +851,7 @@ def order_release_infos(release_infos: [ReleaseInfo]) -> [ReleaseInfo]:
             if dep not in visited:
                 visit(dep, stack, visited)
             else:
-                raise ValueError(f"cycle detected on {dep} from {directory}")
+                raise ConfigurationError(f"cycle detected on {dep} from {directory}")
         visited.remove(directory)
         if directory not in stack:
             stack.append(directory)
@@ -0,0 +1,823 @@
+import codecs
+import os
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from git_release_tag import git
+from git_release_tag.cache import RepositoryCache
+from git_release_tag.exceptions import (
+    ConfigurationError,
+    GitError,
+    ShallowHistoryError,
+)
+from git_release_tag.index import (
+    WorktreeState,
+    common_dir,
+    config_entries,
+    find_git_dir,
+    resolve_head,
+)
+from git_release_tag.lock import FileLock
+from git_release_tag.logger import log
+
+_locks: Dict[str, FileLock] = {}
+
+
+def _setting(name: str, parse: Callable[[str], Any], minimum, maximum=None) -> Any:
+    """
+    the value of the environment variable `name`, or None if it is not set. It is read
+    when it is used, so that an invalid value raises a ConfigurationError.
+    """
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        result = parse(value)
+    except ValueError:
+        result = None
+    if result is None or result < minimum or (maximum is not None and result > maximum):
+        limits = f"at least {minimum}" if maximum is None else f"{minimum} to {maximum}"
+        raise ConfigurationError(f"{name} must be {limits}, not {value}")
+    return result
+
+
+class Repository(object):
+    """
+    a snapshot of the state of a git repository, shared by all components in it.
+
+    It is read once and kept up to date with the changes made through the components,
+    so that processing many components does not query git for each of them. When
+    `cache_enabled` is set, the tag index and the differences between commits are
+    stored in the common git directory and shared with other processes and worktrees.
+
+    Unless set, the `abbrev` and `lock_timeout` are read from GIT_RELEASE_TAG_ABBREV and
+    GIT_RELEASE_TAG_LOCK_TIMEOUT when they are used.
+    """
+
+    cache_enabled = os.getenv("GIT_RELEASE_TAG_CACHE", "") not in ["", "0", "false"]
+
+    abbrev: Optional[int] = None
+
+    lock_timeout: Optional[float] = None
+
+    pre_tag_command_cache_enabled = os.getenv(
+        "GIT_RELEASE_TAG_PRE_TAG_COMMAND_CACHE", ""
+    ) not in ["", "0", "false"]
+
+    index_reader_enabled = os.getenv("GIT_RELEASE_TAG_READ_INDEX", "") not in [
+        "",
+        "0",
+        "false",
+    ]
+
+    SHALLOW_STRATEGIES = ["error", "fetch", "deepen"]
+
+    shallow_strategy: str = os.getenv("GIT_RELEASE_TAG_SHALLOW", "error")
+
+    def __init__(self, directory: str):
+        super(Repository, self).__init__()
+        self.directory = directory
+        self._tags: Optional[List[str]] = None
+        self._tag_index: Optional[Dict[str, str]] = None
+        self._common_dir: Optional[str] = None
+        self._cache: Optional[RepositoryCache] = None
+        self._ancestry: Dict[tuple, bool] = {}
+        self._merged_tag_commits: Dict[str, Set[str]] = {}
+        self._last_changes: Optional[Dict["ReleaseInfo", Tuple[str, str]]] = None
+        self._outstanding_changes: Optional[Dict["ReleaseInfo", bool]] = None
+        self._promisor_remote: Optional[List[Optional[str]]] = None
+        self._release_tags: Optional[Set[str]] = None
+        self._release_tag_prefixes: Set[str] = set()
+        self.release_infos: List["ReleaseInfo"] = []
+
+    def __repr__(self):
+        return self.directory
+
+    def git_query(self, cmd: List[str]) -> str:
+        out, _ = git.exec(cmd, self.directory)
+        return out[0]
+
+    @property
+    def common_dir(self) -> str:
+        """
+        the git directory shared by all worktrees of the repository. It is found without
+        git, unless the git environment variables are used.
+        """
+        if self._common_dir is None:
+            found = find_git_dir(self.directory)
+            if found:
+                self._common_dir = common_dir(found[1])
+            else:
+                out = self.git_query(["git", "rev-parse", "--git-common-dir"])
+                self._common_dir = os.path.abspath(
+                    os.path.join(self.directory, out.strip())
+                )
+        return self._common_dir
+
+    @property
+    def git_dir(self) -> str:
+        """
+        the git directory of the worktree, which contains HEAD.
+        """
+        return self.git_query(["git", "rev-parse", "--absolute-git-dir"]).strip()
+
+    def lock(self, timeout: Optional[float] = None) -> FileLock:
+        """
+        the advisory lock which serializes releases in all worktrees of the repository.
+        The lock waits at most `timeout` seconds, or `lock_timeout`. If both are None,
+        it waits until the lock is available. Reading the repository does not require the lock.
+        """
+        path = os.path.join(self.common_dir, "git-release-tag", "release.lock")
+        lock = _locks.get(path)
+        if lock is None:
+            lock = FileLock(path)
+            _locks[path] = lock
+        if timeout is None:
+            timeout = self.lock_timeout
+        if timeout is None:
+            timeout = _setting("GIT_RELEASE_TAG_LOCK_TIMEOUT", float, 0)
+        lock.timeout = timeout
+        return lock
+
+    @property
+    def cache(self) -> Optional[RepositoryCache]:
+        if not self.cache_enabled:
+            return None
+        if self._cache is None:
+            self._cache = RepositoryCache(self.common_dir)
+        return self._cache
+
+    @property
+    def tags(self) -> List[str]:
+        """
+        all tags in the repository.
+        """
+        if self._tags is None:
+            if self.cache:
+                self._tags = list(self.tag_index.keys())
+            else:
+                self._tags = list(git.stream(["git", "tag"], self.directory))
+        return self._tags
+
+    def release_tags(self, base_tag: str) -> Set[str]:
+        """
+        the tags starting with `base_tag`. The tags of the base tags of all components in
+        the repository are read together, and streamed from git, so that other tags in the
+        repository are never held in memory. A directory without a release configuration
+        has no base tag, and no release tags.
+        """
+        if base_tag is None:
+            return set()
+        if self._tag_index is not None:
+            return set(t for t in self._tag_index if t.startswith(base_tag))
+
+        if self._release_tags is None or base_tag not in self._release_tag_prefixes:
+            prefixes = set(self._release_tag_prefixes)
+            prefixes.update(
+                r.base_tag for r in self.release_infos if r.base_tag is not None
+            )
+            prefixes.add(base_tag)
+            patterns = (
+                ["refs/tags"]
+                if "" in prefixes
+                else sorted(f"refs/tags/{p}*" for p in prefixes)
+            )
+            self._release_tags = set(
+                git.stream(
+                    ["git", "for-each-ref", "--format=%(refname:strip=2)"] + patterns,
+                    self.directory,
+                )
+            )
+            self._release_tag_prefixes = prefixes
+        return set(t for t in self._release_tags if t.startswith(base_tag))
+
+    def _refs_fingerprint(self) -> str:
+        """
+        a fingerprint of the tag references, which changes whenever a tag is created,
+        moved or deleted.
+        """
+        result = []
+        packed_refs = os.path.join(self.common_dir, "packed-refs")
+        if os.path.exists(packed_refs):
+            stat = os.stat(packed_refs)
+            result.append(f"packed-refs {stat.st_mtime_ns} {stat.st_size}")
+
+        tags_dir = os.path.join(self.common_dir, "refs", "tags")
+        for root, _, files in os.walk(tags_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                result.append(
+                    f"{os.path.relpath(path, tags_dir)} {stat.st_mtime_ns} {stat.st_size}"
+                )
+        return "\n".join(sorted(result))
+
+    def _read_tag_index(self) -> Dict[str, str]:
+        result = {}
+        for line in git.stream(
+            [
+                "git",
+                "for-each-ref",
+                "--format=%(refname:strip=2) %(objectname) %(*objectname)",
+                "refs/tags",
+            ],
+            self.directory,
+        ):
+            if line:
+                fields = line.split(" ")
+                result[fields[0]] = fields[2] if fields[2] else fields[1]
+        return result
+
+    @property
+    def tag_index(self) -> Dict[str, str]:
+        """
+        maps all tags in the repository to the commit they point to. The cache keeps a
+        single tag index per repository, replaced whenever the tag references change.
+        """
+        if self._tag_index is None:
+            if self.cache:
+                self._tag_index = self.cache.get_or_compute(
+                    "tag-index",
+                    "refs/tags",
+                    self._read_tag_index,
+                    version=self._refs_fingerprint(),
+                )
+            else:
+                self._tag_index = self._read_tag_index()
+        return self._tag_index
+
+    def tag_commit(self, tag: str) -> Optional[str]:
+        """
+        the commit the tag points to, or None if the tag does not exist.
+        """
+        commit = self.tag_index.get(tag)
+        if commit is None and tag in self.tag_index:
+            out, process = git.exec(
+                ["git", "rev-parse", "--verify", "-q", f"{tag}^{{commit}}"],
+                self.directory,
+                fail_on_error=False,
+            )
+            commit = out[0].strip() if process.returncode == 0 else None
+            self._tag_index[tag] = commit
+        return commit
+
+    @property
+    def head(self) -> Optional[str]:
+        """
+        the commit of HEAD, read from the references without running git when possible.
+        """
+        found = find_git_dir(self.directory)
+        commit = resolve_head(found[1]) if found else None
+        if commit:
+            return commit
+        out, process = git.exec(
+            ["git", "rev-parse", "--verify", "-q", "HEAD"],
+            self.directory,
+            fail_on_error=False,
+        )
+        return out[0].strip() if process.returncode == 0 else None
+
+    def diff_shortstat(
+        self, directory: str, from_commit: str, to_commit: str, paths: List[str]
+    ) -> str:
+        """
+        the shortstat of the differences in `paths` between two commits. As commits
+        are immutable, the result is cached without expiry.
+        """
+
+        def compute() -> str:
+            return self.diff_summary(directory, [from_commit, to_commit], paths)
+
+        if not self.cache:
+            return compute()
+
+        relative_paths = sorted(
+            os.path.relpath(
+                os.path.realpath(os.path.join(directory, p)),
+                os.path.realpath(self.directory),
+            )
+            for p in paths
+        )
+        key = " ".join([from_commit, to_commit, "--"] + relative_paths)
+        namespace = "diff-name-only" if self.is_partial_clone else "diff-shortstat"
+        return self.cache.get_or_compute(namespace, key, compute)
+
+    @property
+    def has_commit_graph(self) -> bool:
+        """
+        true if the repository has a commit-graph file, which makes individual ancestry
+        checks cheap.
+        """
+        info = os.path.join(self.common_dir, "objects", "info")
+        return os.path.exists(os.path.join(info, "commit-graph")) or os.path.exists(
+            os.path.join(info, "commit-graphs", "commit-graph-chain")
+        )
+
+    def diff_summary(
+        self, directory: str, revisions: List[str], paths: List[str]
+    ) -> str:
+        """
+        the shortstat of the differences in `paths` between the `revisions`, or between a
+        revision and the working tree. In a partial clone, the blobs are not fetched to
+        count the changed lines: only the number of changed files is reported.
+        """
+        if not self.is_partial_clone:
+            out, _ = git.exec(
+                ["git", "diff", "--shortstat", "-r"] + revisions + ["--"] + paths,
+                directory,
+            )
+            return out[0].rstrip()
+
+        out, _ = git.exec(
+            ["git", "diff", "--name-only", "-r"] + revisions + ["--"] + paths,
+            directory,
+        )
+        count = len(out[0].split("\n")) - 1
+        if not count:
+            return ""
+        return f"{count} file{'s' if count > 1 else ''} changed"
+
+    @property
+    def is_shallow(self) -> bool:
+        """
+        true if the repository is a shallow clone, with a truncated history.
+        """
+        return os.path.exists(os.path.join(self.common_dir, "shallow"))
+
+    @property
+    def shallow_commits(self) -> Set[str]:
+        """
+        the commits at the boundary of a shallow clone, of which the parents are missing.
+        """
+        try:
+            with open(os.path.join(self.common_dir, "shallow"), "r") as f:
+                return set(f.read().split())
+        except OSError:
+            return set()
+
+    @property
+    def is_partial_clone(self) -> bool:
+        """
+        true if objects of the repository are fetched from a remote on demand, as in a
+        clone with `--filter=blob:none`.
+        """
+        return bool(self.promisor_remote)
+
+    def _read_promisor_remote(self) -> Optional[str]:
+        try:
+            entries = list(config_entries([os.path.join(self.common_dir, "config")]))
+        except ValueError:
+            out, _ = git.exec(
+                [
+                    "git",
+                    "config",
+                    "--get-regexp",
+                    r"^(extensions\.partialclone|remote\..*\.promisor)$",
+                ],
+                self.directory,
+                fail_on_error=False,
+            )
+            entries = [l.partition(" ")[::2] for l in out[0].split("\n") if l]
+
+        for name, value in entries:
+            if name == "extensions.partialclone" and value:
+                return value
+            if (
+                name.startswith("remote.")
+                and name.endswith(".promisor")
+                and value == "true"
+            ):
+                return name[len("remote.") : -len(".promisor")]
+        return None
+
+    @property
+    def promisor_remote(self) -> Optional[str]:
+        """
+        the remote from which missing objects are fetched in a partial clone. It is read
+        once from the configuration file of the repository.
+        """
+        if self._promisor_remote is None:
+            self._promisor_remote = [self._read_promisor_remote()]
+        return self._promisor_remote[0]
+
+    @property
+    def remote(self) -> str:
+        """
+        the remote to fetch missing history from.
+        """
+        remote = self.promisor_remote
+        if not remote:
+            remotes = self.git_query(["git", "remote"]).split()
+            remote = "origin" if "origin" in remotes or not remotes else remotes[0]
+        return remote
+
+    def has_commit(self, revision: str) -> bool:
+        _, process = git.exec(
+            ["git", "cat-file", "-e", f"{revision}^{{commit}}"],
+            self.directory,
+            fail_on_error=False,
+        )
+        return process.returncode == 0
+
+    def fetch_tag(self, tag: str):
+        """
+        makes the commit of `tag` available in a shallow clone, according to the
+        `shallow_strategy`: `error` raises a ShallowHistoryError, `fetch` fetches only the
+        tagged commit and `deepen` deepens the history until it contains the tagged commit.
+        """
+        if self.has_commit(tag):
+            return
+        if self.shallow_strategy not in ["fetch", "deepen"]:
+            raise ShallowHistoryError(
+                f"tag {tag} is not in the shallow history of {self.directory}, fetch "
+                f"it or use --shallow fetch or --shallow deepen"
+            )
+
+        remote = self.remote
+        if self.shallow_strategy == "fetch":
+            log.info(f"fetching tag {tag} from {remote}")
+            git.exec(
+                ["git", "fetch", "-q", "--no-tags", "--depth=1", remote, "tag", tag],
+                self.directory,
+            )
+        else:
+            out, _ = git.exec(
+                [
+                    "git",
+                    "ls-remote",
+                    remote,
+                    f"refs/tags/{tag}",
+                    f"refs/tags/{tag}^{{}}",
+                ],
+                self.directory,
+            )
+            lines = sorted(out[0].split("\n"), key=lambda l: not l.endswith("^{}"))
+            commit = lines[0].split("\t")[0] if lines[0] else None
+            if not commit:
+                raise ShallowHistoryError(f"tag {tag} does not exist on {remote}")
+
+            self._deepen(lambda: self.has_commit(commit), f"to find {tag}")
+            if not self.has_commit(commit):
+                raise ShallowHistoryError(
+                    f"tag {tag} is not in the history of the branches fetched from {remote}"
+                )
+            git.exec(
+                ["git", "fetch", "-q", "--no-tags", remote, "tag", tag],
+                self.directory,
+            )
+        self.refresh()
+
+    def _deepen(self, complete: Callable[[], bool], purpose: str):
+        """
+        deepens the shallow history in growing steps, until it is `complete`. The tags
+        pointing into the deepened history are fetched along.
+        """
+        depth = 50
+        while self.is_shallow and not complete():
+            log.info(f"deepening {self.directory} by {depth} commits {purpose}")
+            git.exec(
+                ["git", "fetch", "-q", f"--deepen={depth}", self.remote],
+                self.directory,
+            )
+            depth *= 2
+
+    def fetch_last_changes(self, release_info: "ReleaseInfo"):
+        """
+        makes the commits which last changed the components available in a shallow clone.
+        A commit at the boundary of the shallow history appears to change all files, as its
+        parents are missing. With the `shallow_strategy` `error` a ShallowHistoryError is
+        raised, otherwise the history is deepened until no last change is at the boundary.
+        The last changes of all components are determined together, and the history is
+        deepened once for all of them.
+        """
+
+        def at_boundary() -> List[str]:
+            shallow = self.shallow_commits
+            return sorted(
+                i.directory
+                for i, (commit, _) in self.last_changes(release_info).items()
+                if commit in shallow
+            )
+
+        directories = at_boundary()
+        if not directories:
+            return
+        if self.shallow_strategy not in ["fetch", "deepen"]:
+            raise ShallowHistoryError(
+                f"the last change of {', '.join(directories)} is not in the shallow history "
+                f"of {self.directory}, fetch it or use --shallow fetch or --shallow deepen"
+            )
+
+        def complete() -> bool:
+            self._last_changes = None
+            return not at_boundary()
+
+        self._deepen(complete, f"to find the last change of {', '.join(directories)}")
+        self.refresh()
+
+    def _merged_tags(self, head: str) -> Set[str]:
+        """
+        the commits of all tags reachable from `head`, determined in a single walk.
+        """
+        result = self._merged_tag_commits.get(head)
+        if result is None:
+            result = set()
+            for line in git.stream(
+                [
+                    "git",
+                    "for-each-ref",
+                    f"--merged={head}",
+                    "--format=%(objectname) %(*objectname)",
+                    "refs/tags",
+                ],
+                self.directory,
+            ):
+                fields = line.split(" ")
+                if len(fields) == 2:
+                    result.add(fields[1] if fields[1] else fields[0])
+            self._merged_tag_commits[head] = result
+        return result
+
+    def is_ancestor(self, commit: str, head: str) -> bool:
+        """
+        true if `commit` is reachable from `head`. Without a commit-graph, all tags
+        reachable from `head` are determined at once. Results are memoized and, as
+        commits are immutable, cached without expiry.
+        """
+        key = (commit, head)
+        result = self._ancestry.get(key)
+        if result is not None:
+            return result
+
+        if self.cache:
+            result = self.cache.get("ancestry", f"{commit} {head}")
+
+        if result is None:
+            if commit == head:
+                result = True
+            elif not self.has_commit_graph and commit in self._merged_tags(head):
+                result = True
+            elif not self.has_commit_graph and commit in self.tag_index.values():
+                result = False
+            else:
+                _, process = git.exec(
+                    ["git", "merge-base", "--is-ancestor", commit, head],
+                    self.directory,
+                    fail_on_error=False,
+                )
+                if process.returncode > 1:
+                    raise GitError(
+                        ["git", "merge-base", "--is-ancestor", commit, head],
+                        self.directory,
+                        process.returncode,
+                        "",
+                    )
+                result = process.returncode == 0
+            if self.cache:
+                self.cache.put("ancestry", f"{commit} {head}", result)
+
+        self._ancestry[key] = result
+        return result
+
+    @property
+    def abbrev_length(self) -> Optional[int]:
+        """
+        the explicitly configured minimum length of abbreviated commit hashes, the `abbrev`
+        or GIT_RELEASE_TAG_ABBREV, or None to leave the abbreviation to git and core.abbrev.
+        """
+        if self.abbrev is not None:
+            return self.abbrev
+        return _setting("GIT_RELEASE_TAG_ABBREV", int, 4, 40)
+
+    @property
+    def abbrev_arguments(self) -> List[str]:
+        """
+        the arguments of git log, which abbreviate commit hashes to the `abbrev_length`. Git
+        uses more characters if needed to keep a hash unique.
+        """
+        return [f"--abbrev={self.abbrev_length}"] if self.abbrev_length else []
+
+    def query_last_change(self, release_info: "ReleaseInfo") -> Tuple[str, str]:
+        """
+        the commit which last changed the component and its abbreviation, queried from git.
+        """
+        out, _ = git.exec(
+            ["git", "log", "-n", "1", "--format=%H %h"]
+            + self.abbrev_arguments
+            + ["--"]
+            + release_info.tag_on_changes_in,
+            release_info.directory,
+        )
+        commit, _, short_commit = out[0].strip().partition(" ")
+        return commit, short_commit
+
+    def last_changes(
+        self, release_info: "ReleaseInfo"
+    ) -> Dict["ReleaseInfo", Tuple[str, str]]:
+        """
+        the commits which last changed the components in the repository and their
+        abbreviations, including `release_info`. The commits of all components are
+        determined together.
+        """
+        if self._last_changes is None or release_info not in self._last_changes:
+            release_infos = list(self.release_infos)
+            if release_info not in release_infos:
+                release_infos.append(release_info)
+            if len(release_infos) > 1:
+                self._last_changes = self._last_commits(release_infos)
+            else:
+                self._last_changes = {
+                    release_info: self.query_last_change(release_info)
+                }
+        return self._last_changes
+
+    def short_revision(self, release_info: "ReleaseInfo") -> str:
+        """
+        the abbreviated commit which last changed the component. In a shallow clone, the
+        commit is fetched according to the `shallow_strategy`.
+        """
+        if self.is_shallow:
+            self.fetch_last_changes(release_info)
+        return self.last_changes(release_info)[release_info][1]
+
+    def _last_commits(
+        self, release_infos: List["ReleaseInfo"]
+    ) -> Dict["ReleaseInfo", Tuple[str, str]]:
+        """
+        walks the first parents of HEAD once, until the last commit changing each of the
+        components is found. Merges are compared with their first parent. A component
+        changed by a merge may have last changed on the merged branch, and is looked up
+        on its own, like a component which is not found.
+        """
+        from git_release_tag.trie import ComponentIndex
+
+        index = ComponentIndex(release_infos)
+        top_level = os.path.realpath(self.directory)
+        pending = set(release_infos)
+        merged = set()
+        result = {}
+        commit = None
+        is_merge = False
+        for line in git.stream(
+            [
+                "git",
+                "-c",
+                "core.quotePath=false",
+                "log",
+                "--no-renames",
+                "--name-only",
+                "-m",
+                "--first-parent",
+                "--format=%x00%H %h %P",
+            ]
+            + self.abbrev_arguments
+            + ["HEAD"],
+            self.directory,
+        ):
+            if line.startswith("\0"):
+                fields = line[1:].split(" ")
+                commit = (fields[0], fields[1])
+                is_merge = len(fields) > 3
+            elif line and commit:
+                for info in index.components(_unquote(line), top_level) & pending:
+                    if is_merge:
+                        merged.add(info)
+                    else:
+                        result[info] = commit
+                    pending.remove(info)
+                if not pending:
+                    break
+
+        for info in pending | merged:
+            result[info] = self.query_last_change(info)
+        return result
+
+    def outstanding_changes(
+        self, release_info: "ReleaseInfo"
+    ) -> Dict["ReleaseInfo", bool]:
+        """
+        whether the components in the repository have outstanding changes in the working
+        tree, including `release_info`. The changes of all components are determined by a
+        single git status, which is kept until the repository is refreshed. With
+        `index_reader_enabled`, git is only run if a component is not known to be clean.
+        """
+        if (
+            self._outstanding_changes is None
+            or release_info not in self._outstanding_changes
+        ):
+            release_infos = list(self.release_infos)
+            if release_info not in release_infos:
+                release_infos.append(release_info)
+            self._outstanding_changes = self._changed_components(release_infos)
+        return self._outstanding_changes
+
+    def _changed_components(
+        self, release_infos: List["ReleaseInfo"]
+    ) -> Dict["ReleaseInfo", bool]:
+        """
+        attributes the paths reported by git status to the components. An untracked
+        directory changes the components it contains as well.
+        """
+        from git_release_tag.trie import ComponentIndex
+
+        states = {}
+        if self.index_reader_enabled:
+            for info in release_infos:
+                state = WorktreeState.capture(info.directory, info.tag_on_changes_in)
+                if state:
+                    states[info] = state
+            if all(
+                info in states and states[info].is_clean() for info in release_infos
+            ):
+                return {info: False for info in release_infos}
+
+        index = ComponentIndex(release_infos)
+        top_level = os.path.realpath(self.directory)
+        result = {info: False for info in release_infos}
+        out, _ = git.exec(["git", "status", "--porcelain", "-z"], self.directory)
+        entries = iter(out[0].split("\0"))
+        paths = []
+        for entry in entries:
+            if not entry:
+                continue
+            paths.append(entry[3:])
+            if entry[0] in "RC":
+                paths.append(next(entries, ""))
+
+        for path in paths:
+            for info in index.components(path, top_level):
+                result[info] = True
+            if path.endswith("/"):
+                directory = os.path.join(top_level, path)
+                for info in release_infos:
+                    if any(
+                        os.path.join(
+                            os.path.realpath(os.path.join(info.directory, d)), ""
+                        ).startswith(directory)
+                        for d in info.tag_on_changes_in
+                    ):
+                        result[info] = True
+
+        for info, state in states.items():
+            if not result[info]:
+                state.remember_clean()
+        return result
+
+    def refresh_status(self):
+        """
+        discards the outstanding changes of the components, after the working tree changed.
+        """
+        self._outstanding_changes = None
+
+    def refresh_revisions(self):
+        """
+        discards the revisions and the outstanding changes of the components, after a
+        commit.
+        """
+        self._last_changes = None
+        self._outstanding_changes = None
+
+    def add_tag(self, tag: str):
+        if self._tags is not None and tag not in self._tags:
+            self._tags.append(tag)
+        if self._tag_index is not None:
+            self._tag_index[tag] = None
+        if self._release_tags is not None:
+            self._release_tags.add(tag)
+        self._merged_tag_commits = {}
+
+    def refresh(self):
+        """
+        discards the snapshot, so that it is read from git on next access.
+        """
+        self._tags = None
+        self._tag_index = None
+        self._release_tags = None
+        self._release_tag_prefixes = set()
+        self._merged_tag_commits = {}
+        self._last_changes = None
+        self._outstanding_changes = None
+
+    @staticmethod
+    def attach(release_infos: List["ReleaseInfo"]):
+        """
+        shares a single Repository between all release infos in the same git repository.
+        """
+        repositories = {}
+        for release_info in release_infos:
+            if not release_info.top_level:
+                continue
+            repository = repositories.get(release_info.top_level)
+            if not repository:
+                repository = Repository(release_info.top_level)
+                repositories[release_info.top_level] = repository
+            release_info.repository = repository
+            repository.release_infos.append(release_info)
+
+
+def _unquote(path: str) -> str:
+    """
+    the path as quoted by git, when it contains special characters.
+    """
+    if len(path) > 1 and path[0] == '"' and path[-1] == '"':
+        return codecs.escape_decode(path[1:-1].encode("utf-8"))[0].decode("utf-8")
+    return path
@@ -0,0 +1,290 @@
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from git_release_tag import git
+from git_release_tag.exceptions import ConfigurationError, GitError
+from git_release_tag.logger import log
+
+_OUTDATED = ["non-fast-forward", "fetch first", "already exists", "stale info"]
+
+
+class Transaction(object):
+    """
+    a set of releases which are tagged all together, or not at all.
+
+    The releases are committed one by one, but their tags are only created when the
+    transaction is committed, in a single `git update-ref --stdin` transaction. If the
+    transaction fails, the branch is reset to the original HEAD and the paths written or
+    staged by the transaction are reverted. Other changes in the index and the working
+    tree are left as they are.
+    """
+
+    def __init__(self, directory: str, dry_run: bool = False):
+        super(Transaction, self).__init__()
+        self.directory = directory
+        self.dry_run = dry_run
+        self.tags: List[Tuple[str, str]] = []
+        self.original_head: Optional[str] = None
+        self.original_index: Optional[str] = None
+        self.original_changes: Dict[str, str] = {}
+        self.paths: Set[str] = set()
+
+    def __repr__(self):
+        return self.directory
+
+    def git_query(self, cmd: List[str], fail_on_error: bool = True) -> str:
+        out, _ = git.exec(cmd, self.directory, fail_on_error=fail_on_error)
+        return out[0]
+
+    @property
+    def head(self) -> Optional[str]:
+        out, process = git.exec(
+            ["git", "rev-parse", "--verify", "-q", "HEAD"],
+            self.directory,
+            fail_on_error=False,
+        )
+        return out[0].strip() if process.returncode == 0 else None
+
+    @property
+    def branch(self) -> Optional[str]:
+        out, process = git.exec(
+            ["git", "symbolic-ref", "-q", "--short", "HEAD"],
+            self.directory,
+            fail_on_error=False,
+        )
+        return out[0].strip() if process.returncode == 0 else None
+
+    def status(
+        self, directory: Optional[str] = None, paths: List[str] = []
+    ) -> Dict[str, str]:
+        """
+        the paths with outstanding changes in the working tree, relative to the top level.
+        The `paths` restrict the status, and are relative to `directory`.
+        """
+        result = {}
+        out, _ = git.exec(
+            ["git", "status", "--porcelain", "-z", "--untracked-files=all", "--"]
+            + paths,
+            directory if directory else self.directory,
+        )
+        entries = iter(out[0].split("\0"))
+        for entry in entries:
+            if not entry:
+                continue
+            result[entry[3:]] = entry[:2]
+            if entry[0] in "RC":
+                next(entries, None)
+        return result
+
+    def begin(self):
+        self.tags = []
+        self.paths = set()
+        if self.dry_run:
+            return
+        self.original_head = self.head
+        out, process = git.exec(
+            ["git", "write-tree"], self.directory, fail_on_error=False
+        )
+        self.original_index = out[0].strip() if process.returncode == 0 else None
+        self.original_changes = self.status()
+
+    def record(self, paths: List[str]):
+        """
+        adds the `paths` to the paths written or staged by the transaction.
+        """
+        top_level = os.path.realpath(self.directory)
+        self.paths.update(
+            os.path.relpath(os.path.realpath(p), top_level) for p in paths
+        )
+
+    @contextmanager
+    def recording(self, directory: str, paths: List[str]) -> Iterator[None]:
+        """
+        records the `paths` of `directory` which are written, staged or committed in the
+        context, such as the output of a pre tag command and the commit of its changes.
+        """
+        if self.dry_run:
+            yield
+            return
+
+        before = self.status(directory, paths)
+        head = self.head
+        try:
+            yield
+        finally:
+            after = self.status(directory, paths)
+            self.paths.update(
+                p for p in set(before) | set(after) if before.get(p) != after.get(p)
+            )
+            if self.head != head:
+                cmd = ["git", "diff", "--name-only", "-z", head, "HEAD"]
+                if head is None:
+                    cmd = ["git", "ls-tree", "-r", "-z", "--name-only", "HEAD"]
+                self.paths.update(set(self.git_query(cmd).split("\0")) - {""})
+
+    def tag(self, tag: str, commit: str):
+        """
+        adds the `tag` on `commit` to the transaction.
+        """
+        self.tags.append((tag, commit))
+
+    def commit(self):
+        """
+        creates all tags in a single reference transaction.
+        """
+        if not self.tags:
+            return
+
+        instructions = ["start"]
+        instructions.extend(
+            f"create refs/tags/{tag} {commit}" for tag, commit in self.tags
+        )
+        instructions.extend(["prepare", "commit"])
+        git.exec(
+            ["git", "update-ref", "--stdin"],
+            self.directory,
+            dry_run=self.dry_run,
+            input="\n".join(instructions) + "\n",
+        )
+        for tag, _ in self.tags:
+            log.debug(f"created tag {tag}")
+
+    def _known_paths(self, tree: Optional[str], paths: List[str]) -> Set[str]:
+        """
+        the `paths` which are in `tree`, or in the index if `tree` is None.
+        """
+        if tree:
+            cmd = ["git", "ls-tree", "-r", "-z", "--name-only", "--full-tree", tree]
+        else:
+            cmd = ["git", "ls-files", "-z", "--full-name"]
+        return set(self.git_query(cmd + ["--"] + paths).split("\0")) - {""}
+
+    def rollback(self):
+        """
+        resets the branch to the original HEAD, and restores the paths written or staged by
+        the transaction in the index and the working tree. Paths which had outstanding
+        changes before the transaction began, keep their content in the working tree.
+        """
+        if self.dry_run:
+            return
+
+        if self.original_head and self.head != self.original_head:
+            log.warning(f"resetting {self.directory} to {self.original_head}")
+            self.git_query(["git", "reset", "-q", "--soft", self.original_head])
+
+        paths = sorted(self.paths)
+        if paths:
+            source = self.original_index or self.original_head
+            staged = self._known_paths(source, paths) | self._known_paths(None, paths)
+            if source and staged:
+                self.git_query(
+                    ["git", "restore", "--staged", f"--source={source}", "--"]
+                    + sorted(staged)
+                )
+            elif staged:
+                self.git_query(["git", "rm", "-q", "--cached", "--"] + sorted(staged))
+
+            written = [p for p in paths if p not in self.original_changes]
+            tracked = (
+                self._known_paths(self.original_head, written)
+                if self.original_head and written
+                else set()
+            )
+            if tracked:
+                log.debug(f"restoring {', '.join(sorted(tracked))}")
+                self.git_query(
+                    [
+                        "git",
+                        "restore",
+                        "--worktree",
+                        f"--source={self.original_head}",
+                        "--",
+                    ]
+                    + sorted(tracked)
+                )
+            for path in written:
+                if path not in tracked and os.path.isfile(
+                    os.path.join(self.directory, path)
+                ):
+                    log.debug(f"removing {path}")
+                    os.remove(os.path.join(self.directory, path))
+        self.tags = []
+        self.paths = set()
+
+    def push(self, remote: str) -> bool:
+        """
+        pushes the tags and the branch update of the committed transaction to `remote`, in
+        a single atomic push. Returns False if the remote rejected the push, because it has
+        commits or tags which are not in the repository.
+        """
+        refs = [f"refs/tags/{tag}" for tag, _ in self.tags]
+        if not refs:
+            return True
+        if self.head != self.original_head:
+            branch = self.branch
+            if not branch:
+                raise ConfigurationError(
+                    f"cannot push the release commits in {self.directory}, HEAD is detached"
+                )
+            refs.insert(0, f"HEAD:refs/heads/{branch}")
+
+        log.info(f"pushing {', '.join(refs)} to {remote}")
+        out, process = git.exec(
+            ["git", "push", "--atomic", "--porcelain", remote] + refs,
+            self.directory,
+            dry_run=self.dry_run,
+            fail_on_error=False,
+        )
+        if self.dry_run or process.returncode == 0:
+            return True
+
+        reasons = [
+            line.split("\t")[-1]
+            for line in out[0].split("\n")
+            if line.startswith("!\t")
+        ]
+        if any(s in r for r in reasons for s in _OUTDATED):
+            log.warning(f"{remote} rejected the push, {', '.join(reasons)}")
+            return False
+        raise GitError(
+            ["git", "push", "--atomic", remote] + refs,
+            self.directory,
+            process.returncode,
+            out[0] + out[1],
+        )
+
+    def undo(self):
+        """
+        deletes the tags of the committed transaction and rolls back its commits.
+        """
+        if self.dry_run:
+            return
+        if self.tags:
+            instructions = ["start"]
+            instructions.extend(
+                f"delete refs/tags/{tag} {commit}" for tag, commit in self.tags
+            )
+            instructions.extend(["prepare", "commit"])
+            git.exec(
+                ["git", "update-ref", "--stdin"],
+                self.directory,
+                input="\n".join(instructions) + "\n",
+            )
+        self.rollback()
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.rollback()
+            return False
+
+        try:
+            self.commit()
+        except Exception:
+            self.rollback()
+            raise
+        return False
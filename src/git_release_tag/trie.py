@@ -0,0 +1,116 @@
+import os
+from typing import Dict, Generic, Iterable, List, Optional, Set, TypeVar
+
+from git_release_tag.release_info import ReleaseInfo, dependency_graph
+
+T = TypeVar("T")
+
+_VALUES = "\0"
+
+
+def _split(path: str) -> List[str]:
+    return [p for p in os.path.normpath(path).split(os.sep) if p]
+
+
+class PathTrie(Generic[T]):
+    """
+    maps directories to values. Looking up a path returns the values of all directories
+    containing the path, in time proportional to the depth of the path.
+    """
+
+    def __init__(self):
+        super(PathTrie, self).__init__()
+        self._root: Dict[str, dict] = {}
+
+    def add(self, directory: str, value: T):
+        node = self._root
+        for part in _split(directory):
+            node = node.setdefault(part, {})
+        node.setdefault(_VALUES, set()).add(value)
+
+    def lookup(self, path: str) -> Set[T]:
+        """
+        the values of all directories containing `path`, including `path` itself.
+        """
+        result = set()
+        node = self._root
+        values = node.get(_VALUES)
+        if values:
+            result.update(values)
+        for part in _split(path):
+            node = node.get(part)
+            if node is None:
+                break
+            values = node.get(_VALUES)
+            if values:
+                result.update(values)
+        return result
+
+
+class ComponentIndex(object):
+    """
+    attributes changed paths to the components whose tag_on_changes_in directories
+    contain them, and to the components depending on those.
+    """
+
+    def __init__(self, release_infos: List[ReleaseInfo]):
+        super(ComponentIndex, self).__init__()
+        self.release_infos = release_infos
+        self.trie: PathTrie[ReleaseInfo] = PathTrie()
+        for info in release_infos:
+            for directory in info.tag_on_changes_in:
+                self.trie.add(
+                    os.path.realpath(os.path.join(info.directory, directory)), info
+                )
+
+        infos = {os.path.abspath(r.directory): r for r in release_infos}
+        self.dependents: Dict[ReleaseInfo, Set[ReleaseInfo]] = {
+            info: set() for info in release_infos
+        }
+        for directory, dependencies in dependency_graph(release_infos).items():
+            if directory not in infos:
+                continue
+            for dependency in dependencies:
+                if dependency in infos:
+                    self.dependents[infos[dependency]].add(infos[directory])
+
+    def components(
+        self, path: str, relative_to: Optional[str] = None
+    ) -> Set[ReleaseInfo]:
+        """
+        the components whose directories contain the `path`. A path relative to
+        `relative_to`, like the paths reported by git relative to the top level, is looked
+        up as is: `relative_to` must not contain symbolic links. Other paths are resolved.
+        """
+        if relative_to:
+            return self.trie.lookup(os.path.join(relative_to, path))
+        return self.trie.lookup(os.path.realpath(path))
+
+    def all_dependents(self, release_infos: Iterable[ReleaseInfo]) -> Set[ReleaseInfo]:
+        """
+        the release infos and all components which directly or indirectly depend on them.
+        """
+        result = set()
+        pending = list(release_infos)
+        while pending:
+            info = pending.pop()
+            if info not in result:
+                result.add(info)
+                pending.extend(self.dependents.get(info, []))
+        return result
+
+    def affected(
+        self,
+        paths: Iterable[str],
+        relative_to: Optional[str] = None,
+        transitive: bool = False,
+    ) -> Set[ReleaseInfo]:
+        """
+        the components affected by changes to the `paths`. If `transitive` is set, the
+        components depending on those are included, as they are affected when these
+        are released.
+        """
+        result = set()
+        for path in paths:
+            result.update(self.components(path, relative_to))
+        return self.all_dependents(result) if transitive else result
@@ -0,0 +1,316 @@
+"""
+watches the component directories and git references, and reports version changes.
+
+On Linux, changes are detected through inotify. Elsewhere, or when inotify is not
+available, the directories are polled.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from git_release_tag.logger import log
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.trie import ComponentIndex
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+_EVENT = struct.Struct("iIII")
+
+
+def _directories(roots: Iterable[str], recursive: bool) -> Set[str]:
+    """
+    the roots and, if recursive, all directories below them except git directories.
+    """
+    result = set()
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        result.add(root)
+        if recursive:
+            for directory, subdirectories, _ in os.walk(root):
+                subdirectories[:] = [d for d in subdirectories if d != ".git"]
+                result.update(os.path.join(directory, d) for d in subdirectories)
+    return result
+
+
+class Watcher(ABC):
+    """
+    reports the paths changed in the watched directories. `directories` are watched
+    recursively, `git_directories` only at the top level.
+    """
+
+    def __init__(self, directories: Iterable[str], git_directories: Iterable[str]):
+        super(Watcher, self).__init__()
+        self.directories = set(map(os.path.abspath, directories))
+        self.git_directories = set(map(os.path.abspath, git_directories))
+
+    @abstractmethod
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        waits at most `timeout` seconds for changes and returns the changed paths.
+        """
+
+    def close(self):
+        pass
+
+
+class PollingWatcher(Watcher):
+    def __init__(
+        self,
+        directories: Iterable[str],
+        git_directories: Iterable[str],
+        interval: float = 1.0,
+    ):
+        super(PollingWatcher, self).__init__(directories, git_directories)
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        result = {}
+        watched = self.git_directories | _directories(self.directories, True)
+        for directory in watched:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                result[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return result
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            state = self._scan()
+            changed = set(
+                path
+                for path in set(state.keys()) | set(self._state.keys())
+                if state.get(path) != self._state.get(path)
+            )
+            self._state = state
+            if changed:
+                return changed
+            if deadline is not None and time.time() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+
+class InotifyWatcher(Watcher):
+    def __init__(self, directories: Iterable[str], git_directories: Iterable[str]):
+        super(InotifyWatcher, self).__init__(directories, git_directories)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: Dict[int, str] = {}
+        for directory in self.git_directories:
+            self._watch(directory)
+        for directory in _directories(self.directories, True):
+            self._watch(directory)
+
+    def _watch(self, directory: str):
+        wd = self._add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            log.debug("failed to watch %s, errno %s", directory, ctypes.get_errno())
+        else:
+            self._watches[wd] = directory
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        try:
+            buffer = os.read(self._fd, 1024 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = _EVENT.unpack_from(buffer, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(buffer[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return set(self.directories) | set(self.git_directories)
+
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name) if name else directory
+            changed.add(path)
+
+            recursive = directory not in self.git_directories
+            if recursive and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                for d in _directories([path], True):
+                    self._watch(d)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(
+    directories: Iterable[str], git_directories: Iterable[str], interval: float = 1.0
+) -> Watcher:
+    """
+    creates an inotify watcher if available, otherwise a polling watcher.
+    """
+    directories, git_directories = list(directories), list(git_directories)
+    try:
+        return InotifyWatcher(directories, git_directories)
+    except (OSError, AttributeError) as error:
+        log.debug("inotify not available, polling for changes: %s", error)
+        return PollingWatcher(directories, git_directories, interval)
+
+
+class VersionMonitor(object):
+    """
+    keeps the current versions of the components up to date, recomputing only the
+    versions of components whose directories have changed.
+    """
+
+    def __init__(self, release_infos: List[ReleaseInfo]):
+        super(VersionMonitor, self).__init__()
+        self.release_infos = release_infos
+        self.versions = {info: info.current_version for info in release_infos}
+        self.directories = {
+            info: [
+                os.path.abspath(os.path.join(info.directory, d))
+                for d in info.tag_on_changes_in
+            ]
+            for info in release_infos
+        }
+        self.index = ComponentIndex(release_infos)
+        self.git_directories = set()
+        for info in release_infos:
+            if info.repository:
+                git_dir = info.repository.git_dir
+                common_dir = info.repository.common_dir
+                self.git_directories.update(
+                    [git_dir, common_dir, os.path.join(git_dir, "logs")]
+                )
+                self.git_directories.update(
+                    _directories(
+                        [
+                            os.path.join(common_dir, "refs", "heads"),
+                            os.path.join(common_dir, "refs", "tags"),
+                        ],
+                        True,
+                    )
+                )
+
+    def is_reference_change(self, path: str) -> bool:
+        """
+        true if the path is a git reference, or the reflog of HEAD.
+        """
+        directory, name = os.path.split(path)
+        if directory not in self.git_directories:
+            return False
+        return name in ["HEAD", "packed-refs"] or f"{os.sep}refs{os.sep}" in path
+
+    def affected(self, paths: Iterable[str]) -> List[ReleaseInfo]:
+        """
+        the components affected by changes to the specified paths.
+        """
+        paths = list(paths)
+        if any(self.is_reference_change(p) for p in paths):
+            return self.release_infos
+
+        paths = [p for p in paths if os.path.dirname(p) not in self.git_directories]
+        affected = self.index.affected(paths)
+        return [info for info in self.release_infos if info in affected]
+
+    def update(self, paths: Iterable[str]) -> List[ReleaseInfo]:
+        """
+        recomputes the versions of the components affected by changes to `paths` and
+        returns the components whose version changed.
+        """
+        paths = set(paths)
+        affected = self.affected(paths)
+        for repository in set(i.repository for i in affected if i.repository):
+            if affected is self.release_infos:
+                repository.refresh()
+            else:
+                repository.refresh_status()
+
+        result = []
+        for info in affected:
+            if info.path in paths and info.has_release_configuration:
+                info.read()
+            version = info.current_version
+            if version != self.versions.get(info):
+                self.versions[info] = version
+                result.append(info)
+        return result
+
+    def watch(
+        self,
+        emit: Callable[[ReleaseInfo, str], None],
+        watcher: Optional[Watcher] = None,
+        interval: float = 1.0,
+        settle: float = 0.1,
+    ):
+        """
+        emits the current version of all components, and then every version change.
+        Changes arriving within `settle` seconds of each other are processed together.
+        """
+        if watcher is None:
+            watcher = create_watcher(
+                set(d for dirs in self.directories.values() for d in dirs),
+                self.git_directories,
+                interval,
+            )
+        try:
+            for info in self.release_infos:
+                emit(info, self.versions[info])
+            while True:
+                paths = watcher.wait()
+                while True:
+                    more = watcher.wait(settle)
+                    if not more:
+                        break
+                    paths.update(more)
+                for info in self.update(paths):
+                    emit(info, self.versions[info])
+        finally:
+            watcher.close()
@@ -0,0 +1,53 @@
+import os
+from typing import Dict, List, Optional
+
+import pytest
+
+from git_release_tag.release_info import ReleaseInfo
+
+
+@pytest.fixture
+def create_repository():
+    """
+    a factory of git repositories with released components.
+    """
+
+    def create(
+        top: str,
+        components: List[str],
+        base_tag: Optional[str] = None,
+        pre_tag_command: str = "echo @@RELEASE@@ > release.txt",
+        dependencies: Dict[str, List[str]] = {},
+        files: Dict[str, str] = {},
+    ) -> ReleaseInfo:
+        """
+        creates the repository `top` with the `components`, each released as 0.1.0 and
+        tagged with `base_tag` or its name followed by a dash. The component "." is the
+        repository itself. The `files` are committed before the components are released.
+        Returns the top of the repository.
+        """
+        os.makedirs(top, exist_ok=True)
+        i = ReleaseInfo(path=top)
+        i.git_init()
+        if files:
+            for name, content in files.items():
+                os.makedirs(os.path.dirname(os.path.join(top, name)), exist_ok=True)
+                with open(os.path.join(top, name), "w") as f:
+                    f.write(content)
+            i.git_update(["git", "add", "."])
+            i.git_update(["git", "commit", "-m", "initial"])
+        for c in components:
+            os.makedirs(os.path.join(top, c), exist_ok=True)
+            ReleaseInfo.initialize(
+                directory=os.path.normpath(os.path.join(top, c)),
+                semver="0.1.0",
+                base_tag=base_tag if base_tag is not None else f"{c}-",
+                pre_tag_command=pre_tag_command,
+                tag_on_changes_in=dependencies.get(c, ["."]),
+                dry_run=False,
+            )
+        if "." in components:
+            i.read()
+        return i
+
+    return create
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from git_release_tag import aio
+from git_release_tag.git import GitError
+
+
+def test_current_version(create_repository):
+    dir = f"/tmp/git-release-tag/aio/{uuid.uuid4()}"
+    i = create_repository(dir, ["."], base_tag="v")
+
+    assert asyncio.run(aio.current_version(i)) == i.current_version == "0.1.0"
+    assert asyncio.run(aio.all_tags(i)) == i.all_tags == ["v0.1.0"]
+    assert asyncio.run(aio.release_info(dir)).tag == i.tag
+
+    with open(os.path.join(dir, "release.txt"), "w") as f:
+        f.write("changed")
+    assert asyncio.run(aio.change_list(i)) == i.change_list
+    assert asyncio.run(aio.current_version(i)) == i.current_version
+    assert asyncio.run(aio.current_version(i)).endswith("-dirty")
+
+
+def test_concurrent_repositories(create_repository):
+    infos = [
+        create_repository(
+            f"/tmp/git-release-tag/aio/{uuid.uuid4()}", ["."], base_tag="v"
+        )
+        for _ in range(4)
+    ]
+
+    async def query_all():
+        return await asyncio.gather(*[aio.current_version(i) for i in infos])
+
+    aio.set_max_concurrency(2)
+    try:
+        assert asyncio.run(query_all()) == ["0.1.0"] * len(infos)
+    finally:
+        aio.set_max_concurrency(16)
+
+
+def test_failure_raises(create_repository):
+    dir = f"/tmp/git-release-tag/aio/{uuid.uuid4()}"
+    i = create_repository(dir, ["."], base_tag="v")
+    i.base_tag = "does-not-exist-"
+
+    with pytest.raises(GitError) as error:
+        asyncio.run(aio.changes_since_tag(i))
+    assert error.value.returncode != 0
+    assert error.value.cwd == dir
+
+
+def test_short_revision_only_when_needed(monkeypatch, create_repository):
+    dir = f"/tmp/git-release-tag/aio/{uuid.uuid4()}"
+    i = create_repository(dir, ["."], base_tag="v")
+
+    async def short_revision(release_info):
+        raise AssertionError("the short revision of a released version is not needed")
+
+    monkeypatch.setattr(aio, "short_revision", short_revision)
+    assert asyncio.run(aio.current_version(i)) == "0.1.0"
+
+
+def test_cancel_kills_process():
+    dir = f"/tmp/git-release-tag/aio/{uuid.uuid4()}"
+    os.makedirs(dir)
+
+    async def cancel():
+        task = asyncio.ensure_future(
+            aio.exec(["sh", "-c", "echo $$ > pid; exec sleep 60"], dir)
+        )
+        while not os.path.exists(f"{dir}/pid") or not open(f"{dir}/pid").read():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(open(f"{dir}/pid").read()), 0)
@@ -0,0 +1,113 @@
+import functools
+import json
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag import batch
+from git_release_tag.batch import process_repository, read_manifest
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.repository import Repository
+from git_release_tag.transaction import Transaction
+
+
+def test_read_manifest():
+    dir = f"/tmp/git-release-tag/batch/{uuid.uuid4()}"
+    os.makedirs(dir, exist_ok=True)
+    manifest = os.path.join(dir, "manifest")
+    with open(manifest, "w") as f:
+        f.write("# repositories\n\na\n/tmp/b\n")
+    assert read_manifest(manifest) == [os.path.join(dir, "a"), "/tmp/b"]
+
+
+def test_batch(create_repository):
+    dir = f"/tmp/git-release-tag/batch/{uuid.uuid4()}"
+    create_repository(f"{dir}/one", ["a", "b"])
+    create_repository(f"{dir}/two", ["c"])
+    with open(f"{dir}/manifest", "w") as f:
+        f.write("one\ntwo\nthree\n")
+
+    result = CliRunner().invoke(
+        main, ["batch", "--action", "show", "--output", "json", f"{dir}/manifest"]
+    )
+    assert result.exit_code == 1
+    report = json.loads(result.stdout)
+    assert [r["ok"] for r in report] == [True, True, False]
+    assert sorted(c["directory"] for c in report[0]["components"]) == ["a", "b"]
+    assert [c["version"] for c in report[1]["components"]] == ["0.1.0"]
+    assert report[2]["components"] == []
+
+    with open(f"{dir}/one/a/release.txt", "w") as f:
+        f.write("changed")
+    result = process_repository(f"{dir}/one", "bump", level=ReleaseInfo.PATCH)
+    assert result["ok"]
+    versions = {c["directory"]: c["version"] for c in result["components"]}
+    assert versions == {"a": "0.1.1", "b": "0.1.0"}
+
+
+def test_bump_nested_repositories(create_repository):
+    dir = f"/tmp/git-release-tag/batch/{uuid.uuid4()}"
+    top = create_repository(dir, ["a"], files={".gitignore": "nested/\n"})
+    nested = create_repository(f"{dir}/nested", ["b"])
+
+    result = process_repository(dir, "bump", ReleaseInfo.PATCH, force=True)
+    assert result["ok"], result["messages"]
+    assert "a-0.1.1" in top.git_query(["git", "tag"]).split()
+    assert "b-0.1.1" in nested.git_query(["git", "tag"]).split()
+
+
+def test_unexpected_error(monkeypatch, create_repository):
+    dir = f"/tmp/git-release-tag/batch/{uuid.uuid4()}"
+    create_repository(dir, ["a"])
+
+    def fail(release_infos):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ReleaseInfo, "validate", fail)
+    result = process_repository(dir, "validate")
+    assert not result["ok"]
+    assert "disk full" in result["messages"][0]
+
+
+def test_bump_holds_lock_while_tagging(monkeypatch, create_repository):
+    dir = f"/tmp/git-release-tag/batch/{uuid.uuid4()}"
+    create_repository(dir, ["a", "b"])
+    lock = Repository(dir).lock()
+    locked = []
+    commit = Transaction.commit
+
+    def check_locked(transaction):
+        locked.append(lock.is_locked)
+        commit(transaction)
+
+    monkeypatch.setattr(Transaction, "commit", check_locked)
+    result = process_repository(dir, "bump", ReleaseInfo.PATCH, force=True)
+    assert result["ok"], result["messages"]
+    assert locked == [True]
+    assert not lock.is_locked
+
+
+def test_spawned_workers_use_settings(monkeypatch, create_repository):
+    dir = f"/tmp/git-release-tag/batch/{uuid.uuid4()}"
+    top = create_repository(dir, ["a"])
+    with open(f"{dir}/a/release.txt", "w") as f:
+        f.write("changed")
+    top.git_update(["git", "commit", "-q", "-a", "-m", "change a"])
+
+    monkeypatch.setattr(
+        batch,
+        "ProcessPoolExecutor",
+        functools.partial(
+            ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")
+        ),
+    )
+    monkeypatch.setattr(Repository, "abbrev", 12)
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(batch.__file__)))
+    [result] = batch.process_repositories([dir], "show", workers=1)
+    assert result["ok"], result["messages"]
+    [component] = result["components"]
+    assert len(component["version"]) == len("0.1.0-") + 12
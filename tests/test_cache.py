@@ -0,0 +1,141 @@
+import os
+import uuid
+
+import pytest
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag.cache import RepositoryCache
+from git_release_tag.exceptions import ConfigurationError, LockTimeoutError
+from git_release_tag.lock import FileLock
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.repository import Repository
+
+
+def test_get_or_compute():
+    dir = f"/tmp/git-release-tag/cache/{uuid.uuid4()}"
+    cache = RepositoryCache(dir)
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return {"a": "b"}
+
+    assert cache.get("ns", "key") is None
+    assert cache.get_or_compute("ns", "key", compute) == {"a": "b"}
+    assert cache.get_or_compute("ns", "key", compute) == {"a": "b"}
+    assert RepositoryCache(dir).get("ns", "key") == {"a": "b"}
+    assert len(computed) == 1
+
+
+def test_prune_least_recently_used(monkeypatch):
+    dir = f"/tmp/git-release-tag/cache/{uuid.uuid4()}"
+    cache = RepositoryCache(dir)
+    for n in range(5):
+        cache.put("ns", f"key-{n}", n)
+        os.utime(cache._path("ns", f"key-{n}"), ns=(n * 10**9, n * 10**9))
+    assert cache.get("ns", "key-0") == 0
+
+    cache.prune("ns", max_entries=3)
+    assert [cache.get("ns", f"key-{n}") for n in range(5)] == [0, None, None, 3, 4]
+
+    monkeypatch.setattr(RepositoryCache, "max_entries", 1)
+    cache = RepositoryCache(dir)
+    cache.put("ns", "key-5", 5)
+    assert [cache.get("ns", f"key-{n}") for n in range(6)] == [
+        None,
+        None,
+        None,
+        None,
+        None,
+        5,
+    ]
+
+
+def test_prune_by_size(monkeypatch):
+    dir = f"/tmp/git-release-tag/cache/{uuid.uuid4()}"
+    cache = RepositoryCache(dir)
+    for n in range(4):
+        cache.put("ns", f"key-{n}", "x" * 1000)
+        os.utime(cache._path("ns", f"key-{n}"), ns=(n * 10**9, n * 10**9))
+
+    cache.prune("ns", max_bytes=2500)
+    assert [cache.get("ns", f"key-{n}") is not None for n in range(4)] == [
+        False,
+        False,
+        True,
+        True,
+    ]
+
+    cache.prune("ns", max_bytes=10)
+    assert cache.get("ns", "key-3") is not None
+
+    monkeypatch.setenv("GIT_RELEASE_TAG_CACHE_MAX_BYTES", "many")
+    with pytest.raises(ConfigurationError):
+        cache.prune("ns")
+
+
+def test_lock_timeout():
+    path = f"/tmp/git-release-tag/cache/{uuid.uuid4()}/lock"
+    with FileLock(path) as lock:
+        with lock:
+            assert lock.is_locked
+        assert lock.is_locked
+        with pytest.raises(LockTimeoutError):
+            FileLock(path, timeout=0.1).acquire()
+    assert not lock.is_locked
+    with FileLock(path, timeout=0.1):
+        pass
+
+
+def test_shared_between_worktrees(monkeypatch):
+    monkeypatch.setattr(Repository, "cache_enabled", True)
+    dir = f"/tmp/git-release-tag/cache/{uuid.uuid4()}"
+    os.makedirs(f"{dir}/main/a", exist_ok=True)
+    ReleaseInfo(path=f"{dir}/main").git_init()
+    ReleaseInfo.initialize(
+        directory=f"{dir}/main/a",
+        semver="0.1.0",
+        base_tag="a-",
+        pre_tag_command="echo @@RELEASE@@ > release.txt",
+        dry_run=False,
+    )
+    with open(f"{dir}/main/a/file.txt", "w") as f:
+        f.write("changed")
+    info = ReleaseInfo(path=f"{dir}/main/a")
+    info.git_update(["git", "add", "."])
+    info.git_update(["git", "commit", "-m", "change"])
+    info.git_update(["git", "worktree", "add", f"{dir}/worktree"])
+
+    infos = ReleaseInfo.find_all([f"{dir}/main"], True, True)
+    worktree_infos = ReleaseInfo.find_all([f"{dir}/worktree"], True, True)
+    repository = infos[0].repository
+    assert repository.common_dir == worktree_infos[0].repository.common_dir
+    assert repository.tag_index == worktree_infos[0].repository.tag_index
+
+    reference = ReleaseInfo(path=f"{dir}/main/a")
+    assert infos[0].current_version == reference.current_version
+    assert worktree_infos[0].current_version == reference.current_version
+    assert os.path.isdir(os.path.join(repository.common_dir, "git-release-tag"))
+
+    info.git_update(["git", "tag", "a-0.1.1"])
+    infos = ReleaseInfo.find_all([f"{dir}/worktree"], True, True)
+    assert "a-0.1.1" in infos[0].repository.tag_index
+    assert len(os.listdir(os.path.join(repository.cache.directory, "tag-index"))) == 1
+
+
+def test_clear(monkeypatch):
+    monkeypatch.setattr(Repository, "cache_enabled", True)
+    dir = f"/tmp/git-release-tag/cache/{uuid.uuid4()}"
+    os.makedirs(f"{dir}/a", exist_ok=True)
+    ReleaseInfo(path=dir).git_init()
+    ReleaseInfo.initialize(
+        directory=f"{dir}/a", semver="0.1.0", base_tag="a-", dry_run=False
+    )
+    ReleaseInfo.find_all([dir], True, True)[0].repository.tag_index
+    assert os.path.isdir(f"{dir}/.git/git-release-tag/cache")
+
+    result = CliRunner().invoke(main, ["cache", "clear", f"{dir}/a"])
+    assert result.exit_code == 0
+    assert not os.path.exists(f"{dir}/.git/git-release-tag/cache")
+    assert ReleaseInfo(f"{dir}/a").current_version == "0.1.0"
@@ -0,0 +1,137 @@
+import os
+import subprocess
+import uuid
+
+import pytest
+from click.testing import CliRunner
+
+from git_release_tag import git
+from git_release_tag.__main__ import main
+from git_release_tag.exceptions import ShallowHistoryError
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.repository import Repository
+
+
+@pytest.fixture
+def origin(create_repository) -> str:
+    """
+    a repository with a released component followed by a number of commits.
+    """
+    origin = f"/tmp/git-release-tag/clone/{uuid.uuid4()}/origin"
+    i = create_repository(origin, ["a"])
+    i.git_update(["git", "config", "uploadpack.allowFilter", "true"])
+    for n in range(5):
+        with open(f"{origin}/file-{n}.txt", "w") as f:
+            f.write(f"{n}")
+        i.git_update(["git", "add", "."])
+        i.git_update(["git", "commit", "-m", f"change {n}"])
+    with open(f"{origin}/a/file.txt", "w") as f:
+        f.write("changed")
+    i.git_update(["git", "add", "."])
+    i.git_update(["git", "commit", "-m", "change a"])
+    return origin
+
+
+def clone(origin: str, directory: str, *options: str):
+    subprocess.check_call(
+        ["git", "clone", "-q", *options, f"file://{origin}", directory]
+    )
+
+
+def test_shallow_clone(monkeypatch, origin):
+    top = os.path.dirname(origin)
+    expected = ReleaseInfo(path=f"{origin}/a").current_version
+    assert expected.startswith("0.1.0-")
+
+    clone(origin, f"{top}/error", "--depth=2")
+    info = ReleaseInfo(path=f"{top}/error/a")
+    assert info._get_repository().is_shallow
+    with pytest.raises(ShallowHistoryError):
+        info.current_version
+    result = CliRunner().invoke(main, ["show", f"{top}/error/a"])
+    assert result.exit_code == ShallowHistoryError.exit_code
+
+    for name in ["fetch", "deepen"]:
+        monkeypatch.setattr(Repository, "shallow_strategy", name)
+        clone(origin, f"{top}/{name}", "--depth=2")
+        assert ReleaseInfo(path=f"{top}/{name}/a").current_version == expected
+        assert ReleaseInfo(path=f"{top}/{name}/a")._get_repository().is_shallow == (
+            name == "fetch"
+        )
+
+
+def test_last_change_beyond_shallow_history(monkeypatch, origin):
+    top = os.path.dirname(origin)
+    i = ReleaseInfo(path=origin)
+    with open(f"{origin}/file-5.txt", "w") as f:
+        f.write("5")
+    i.git_update(["git", "add", "."])
+    i.git_update(["git", "commit", "-m", "change 5"])
+    expected = ReleaseInfo(path=f"{origin}/a").current_version
+
+    clone(origin, f"{top}/error", "--depth=1")
+    info = ReleaseInfo(path=f"{top}/error/a")
+    info.git_update(["git", "fetch", "-q", "--depth=1", "origin", "tag", "a-0.1.0"])
+    with pytest.raises(ShallowHistoryError):
+        info.current_version
+
+    for name in ["fetch", "deepen"]:
+        monkeypatch.setattr(Repository, "shallow_strategy", name)
+        clone(origin, f"{top}/{name}", "--depth=1")
+        info = ReleaseInfo(path=f"{top}/{name}/a")
+        assert info.current_version == expected
+        assert info.short_revision == ReleaseInfo(f"{origin}/a").short_revision
+
+
+def test_last_changes_of_many_components(monkeypatch, create_repository):
+    origin = f"/tmp/git-release-tag/clone/{uuid.uuid4()}/origin"
+    i = create_repository(origin, ["a", "b", "c"])
+    for n in range(60):
+        with open(f"{origin}/{'ab'[n % 2] if n < 2 else 'c'}/file.txt", "w") as f:
+            f.write(f"{n}")
+        i.git_update(["git", "add", "."])
+        i.git_update(["git", "commit", "-q", "-m", f"change {n}"])
+    expected = {
+        c: ReleaseInfo(path=f"{origin}/{c}").current_version for c in ["a", "b", "c"]
+    }
+
+    top = os.path.dirname(origin)
+    clone(origin, f"{top}/deepen", "--depth=1")
+    monkeypatch.setattr(Repository, "shallow_strategy", "deepen")
+    commands = []
+    exec = git.exec
+
+    def record(cmd, *args, **kwargs):
+        commands.append(" ".join(cmd[:4]))
+        return exec(cmd, *args, **kwargs)
+
+    monkeypatch.setattr(git, "exec", record)
+    infos = ReleaseInfo.find_all([f"{top}/deepen"], True, True)
+    assert {os.path.basename(i.directory): i.current_version for i in infos} == expected
+    assert commands.count("git fetch -q --deepen=50") == 1
+    assert not [c for c in commands if c.startswith("git log -n 1")]
+
+
+def test_partial_clone(origin):
+    top = os.path.dirname(origin)
+    expected = ReleaseInfo(path=f"{origin}/a").current_version
+
+    clone(origin, f"{top}/partial", "--filter=blob:none", "--no-checkout")
+    info = ReleaseInfo(path=f"{top}/partial")
+    info.git_update(["git", "checkout", "-q", "HEAD", "--", "a"])
+    info = ReleaseInfo(path=f"{top}/partial/a")
+    repository = info._get_repository()
+    assert repository.is_partial_clone
+    assert repository.promisor_remote == "origin"
+    assert not Repository(origin).is_partial_clone
+
+    def missing_objects():
+        return info.git_query(
+            ["git", "rev-list", "--objects", "--missing=print", "--all"]
+        ).count("\n?")
+
+    missing = missing_objects()
+    assert missing > 0
+    assert info.changes_since_tag == "1 file changed"
+    assert info.current_version == expected
+    assert missing_objects() == missing
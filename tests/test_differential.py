@@ -0,0 +1,368 @@
+import asyncio
+import os
+import random
+import subprocess
+import time
+import uuid
+from typing import Optional
+
+import pytest
+
+from git_release_tag import aio
+from git_release_tag.release_info import ReleaseInfo, order_release_infos, parse_release
+from git_release_tag.repository import Repository
+
+# seeds generating repositories with merges, nested components and 3 to 7 components
+PINNED_SEEDS = [0, 1, 3, 6, 9, 10, 11, 12, 15, 29]
+
+# the number of additional seeds
+RUNS = int(os.getenv("GIT_RELEASE_TAG_DIFFERENTIAL_RUNS", "4"))
+
+SEEDS = PINNED_SEEDS + list(range(100, 100 + RUNS))
+
+# reports the speedup of each engine over the reference
+TIMINGS = os.getenv("GIT_RELEASE_TAG_DIFFERENTIAL_TIMINGS", "") not in ["", "0"]
+
+# the engines which must not be slower than the reference
+FAST_ENGINES = ["attached", "warm cache", "index again"]
+
+# the number of times each engine is timed, of which the fastest counts
+REPEAT = 5
+
+
+def git(directory: str, *args: str) -> str:
+    return subprocess.check_output(
+        ["git"] + list(args), cwd=directory, universal_newlines=True
+    )
+
+
+def write(path: str, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def write_release(directory: str, release: str, base_tag: str, dependencies=[]):
+    content = f"release={release}\ntag={base_tag}{release}\n"
+    if dependencies:
+        content += f"tag_on_changes_in={' '.join(dependencies)}\n"
+    write(os.path.join(directory, ".release"), content)
+
+
+def generate(top: str, rng: random.Random) -> list:
+    """
+    generates a repository with random components, dependencies, commits, merges, tags,
+    ignored files and outstanding changes, and returns the directories of the components.
+    """
+    os.makedirs(top, exist_ok=True)
+    git(top, "init", "-q")
+    write(f"{top}/README", "random repository\n")
+    write(f"{top}/.gitignore", "*.log\n")
+    write(f"{top}.excludes", "*.tmp\n")
+    git(top, "config", "core.excludesFile", f"{top}.excludes")
+
+    components = []
+    for i in range(rng.randint(3, 7)):
+        parent = rng.choice(components) if components and rng.random() < 0.3 else ""
+        components.append(os.path.join(parent, f"c{i}"))
+    shared = ["shared/a", "shared/b"]
+    for directory in components + shared:
+        write(f"{top}/{directory}/file-0", directory)
+
+    for i, component in enumerate(components):
+        candidates = components[:i] + shared
+        dependencies = [
+            os.path.relpath(f"{top}/{d}", f"{top}/{component}")
+            for d in rng.sample(candidates, min(len(candidates), rng.randint(0, 2)))
+        ]
+        release = f"0.{rng.randint(0, 3)}.{rng.randint(0, 9)}"
+        write_release(f"{top}/{component}", release, f"c{i}-", dependencies)
+    git(top, "add", "-A")
+    git(top, "commit", "-q", "-m", "initial")
+    for component in components:
+        tag = parse_release(open(f"{top}/{component}/.release").read(), component)[
+            "tag"
+        ]
+        if rng.random() < 0.5:
+            git(top, "tag", "-a", "-m", tag, tag)
+        else:
+            git(top, "tag", tag)
+
+    main = git(top, "symbolic-ref", "--short", "HEAD").strip()
+    directories = components + shared + [""]
+    for n in range(rng.randint(5, 25)):
+        operation = rng.choice(["change", "change", "bump", "merge", "tag"])
+        if operation == "change":
+            write(f"{top}/{rng.choice(directories)}/file-{n}", str(n))
+            git(top, "add", "-A")
+            git(top, "commit", "-q", "-m", f"change {n}")
+        elif operation == "bump":
+            component = rng.choice(components)
+            configuration = parse_release(
+                open(f"{top}/{component}/.release").read(), component
+            )
+            major, minor, patch = configuration["release"].split(".")
+            release = f"{major}.{minor}.{int(patch) + 1}"
+            dependencies = [d for d in configuration["tag_on_changes_in"] if d != "."]
+            write_release(
+                f"{top}/{component}", release, configuration["base_tag"], dependencies
+            )
+            git(top, "commit", "-q", "-a", "-m", f"bump {component}")
+            git(top, "tag", f"{configuration['base_tag']}{release}")
+        elif operation == "merge":
+            git(top, "checkout", "-q", "-b", f"branch-{n}")
+            write(f"{top}/{rng.choice(directories)}/branch-{n}", str(n))
+            git(top, "add", "-A")
+            git(top, "commit", "-q", "-m", f"branch {n}")
+            git(top, "checkout", "-q", main)
+            write(f"{top}/{rng.choice(directories)}/main-{n}", str(n))
+            git(top, "add", "-A")
+            git(top, "commit", "-q", "-m", f"main {n}")
+            git(top, "merge", "-q", "--no-ff", "--no-edit", f"branch-{n}")
+        else:
+            git(top, "tag", f"build-{n}")
+
+    for directory in rng.sample(directories, rng.randint(1, 3)):
+        write(f"{top}/{directory}/ignored.{rng.choice(['log', 'tmp'])}", "ignored")
+
+    for directory in rng.sample(directories, rng.randint(0, 3)):
+        change = rng.choice(["modify", "untracked", "staged", "deleted"])
+        if change == "modify":
+            write(f"{top}/{directory}/file-0", "modified")
+        elif change == "untracked":
+            write(f"{top}/{directory}/untracked", "untracked")
+        elif change == "staged":
+            write(f"{top}/{directory}/staged", "staged")
+            git(
+                top, "add", os.path.join(directory, "staged") if directory else "staged"
+            )
+        elif os.path.exists(f"{top}/{directory}/file-0"):
+            os.remove(f"{top}/{directory}/file-0")
+    return components
+
+
+def backdate(top: str):
+    """
+    moves the modification times of the files in `top` a minute back, as in a worktree
+    which was not just written, so that the index has no racily clean entries.
+    """
+    past = time.time() - 60
+    for root, directories, files in os.walk(top):
+        directories[:] = [d for d in directories if d != ".git"]
+        for name in files:
+            os.utime(os.path.join(root, name), (past, past))
+    git(top, "update-index", "-q", "--refresh")
+
+
+def reference(top: str, components: list, abbrev: Optional[int] = None) -> dict:
+    """
+    the versions computed with plain git commands per component, with the commit
+    abbreviated by git to at least `abbrev` characters.
+    """
+    result = {}
+    for component in components:
+        directory = os.path.join(top, component)
+        configuration = parse_release(open(f"{directory}/.release").read(), component)
+        paths = configuration["tag_on_changes_in"]
+        if "." not in paths:
+            paths.append(".")
+        changes = [
+            l for l in git(directory, "status", "-s", "--", *paths).split("\n") if l
+        ]
+        since_tag = git(
+            directory, "diff", "--shortstat", configuration["tag"], "--", *paths
+        ).rstrip()
+        options = [f"--abbrev={abbrev}"] if abbrev else []
+        revision = git(
+            directory, "log", "-n", "1", "--format=%h", *options, "--", *paths
+        ).strip()
+        if changes:
+            version = f"{configuration['release']}-{revision}-dirty"
+        elif since_tag:
+            version = f"{configuration['release']}-{revision}"
+        else:
+            version = configuration["release"]
+        result[component] = (version, sorted(changes), since_tag)
+    return result
+
+
+SETTINGS = {
+    "cache_enabled": False,
+    "index_reader_enabled": False,
+    "abbrev": None,
+    "shallow_strategy": "error",
+}
+
+
+def per_component(top: str, components: list) -> dict:
+    return {c: ReleaseInfo(os.path.join(top, c)) for c in components}
+
+
+def attached(top: str, components: list) -> dict:
+    return {
+        os.path.relpath(i.directory, top): i
+        for i in ReleaseInfo.find_all([top], True, False)
+    }
+
+
+def versions(infos: dict) -> dict:
+    return {c: i.current_version for c, i in infos.items()}
+
+
+def asynchronous_versions(infos: dict) -> dict:
+    async def gather():
+        return await asyncio.gather(*[aio.current_version(i) for i in infos.values()])
+
+    return dict(zip(infos.keys(), asyncio.run(gather())))
+
+
+def details(infos: dict) -> dict:
+    return {c: (sorted(i.change_list), i.changes_since_tag) for c, i in infos.items()}
+
+
+def asynchronous_details(infos: dict) -> dict:
+    async def gather():
+        return await asyncio.gather(
+            *[
+                asyncio.gather(aio.change_list(i), aio.changes_since_tag(i))
+                for i in infos.values()
+            ]
+        )
+
+    return {
+        c: (sorted(changes), since_tag)
+        for c, (changes, since_tag) in zip(infos.keys(), asyncio.run(gather()))
+    }
+
+
+ENGINES = [
+    ("per component", per_component, versions, details, {}),
+    ("attached", attached, versions, details, {}),
+    ("cold cache", attached, versions, details, {"cache_enabled": True}),
+    ("warm cache", attached, versions, details, {"cache_enabled": True}),
+    ("index", attached, versions, details, {"index_reader_enabled": True}),
+    ("index again", attached, versions, details, {"index_reader_enabled": True}),
+    ("asyncio", attached, asynchronous_versions, asynchronous_details, {}),
+    ("abbrev", attached, versions, details, {"abbrev": 12}),
+    ("abbrev per component", per_component, versions, details, {"abbrev": 12}),
+]
+
+# partial clones report the number of changed files instead of lines since the tag
+CLONES = [
+    ("shallow clone, fetch", ["--depth=1"], {"shallow_strategy": "fetch"}),
+    ("shallow clone, deepen", ["--depth=1"], {"shallow_strategy": "deepen"}),
+    ("partial clone", ["--filter=blob:none"], {}),
+]
+
+
+def check_order(top: str, infos: list):
+    """
+    asserts that each component comes after the components it depends on.
+    """
+    position = {os.path.abspath(i.directory): n for n, i in enumerate(infos)}
+    for info in infos:
+        directory = os.path.abspath(info.directory)
+        for dependency in info.tag_on_changes_in:
+            dependency = os.path.abspath(os.path.join(directory, dependency))
+            if dependency != directory and dependency in position:
+                assert position[dependency] < position[directory], (
+                    f"{os.path.relpath(directory, top)} is ordered before "
+                    f"{os.path.relpath(dependency, top)}"
+                )
+
+
+def compare(top: str, components: list, engines: list, seed: int, monkeypatch):
+    """
+    asserts that the `engines` compute the versions and changes of the reference.
+    """
+    expected = {None: reference(top, components)}
+    for name, load, version, detail, flags in engines:
+        for attribute, default in SETTINGS.items():
+            monkeypatch.setattr(Repository, attribute, flags.get(attribute, default))
+        abbrev = flags.get("abbrev")
+        if abbrev not in expected:
+            expected[abbrev] = reference(top, components, abbrev)
+        infos = load(top, components)
+        actual = version(infos)
+        actual = {c: (actual[c],) + changes for c, changes in detail(infos).items()}
+        message = f"{name} differs from the reference, seed {seed}"
+        assert actual == expected[abbrev], message
+
+
+def measure(top: str, components: list, engines: list, monkeypatch) -> list:
+    """
+    the shortest of `REPEAT` times the reference and each of the `engines` take to
+    compute the versions. The runs are interleaved, so that a busy machine slows all of
+    them down, and follow the comparison, so that the caches are warm.
+    """
+    runs = [("reference", {}, lambda: reference(top, components))] + [
+        (name, flags, lambda load=load, version=version: version(load(top, components)))
+        for name, load, version, _, flags in engines
+    ]
+    timings = {}
+    for _ in range(REPEAT):
+        for name, flags, run in runs:
+            for attribute, default in SETTINGS.items():
+                monkeypatch.setattr(
+                    Repository, attribute, flags.get(attribute, default)
+                )
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            timings[name] = min(timings.get(name, elapsed), elapsed)
+    return [(name, timings[name]) for name, _, _ in runs]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_fast_paths_match_reference(seed, capsys, monkeypatch):
+    rng = random.Random(seed)
+    top = f"/tmp/git-release-tag/differential/{uuid.uuid4()}"
+    components = generate(top, rng)
+    if seed in PINNED_SEEDS:
+        assert git(top, "rev-list", "--merges", "HEAD").strip(), f"seed {seed}"
+    backdate(top)
+
+    compare(top, components, ENGINES, seed, monkeypatch)
+    timed = [e for e in ENGINES if TIMINGS or e[0] in FAST_ENGINES]
+    timings = measure(top, components, timed, monkeypatch)
+    for name, elapsed in timings[1:]:
+        if name in FAST_ENGINES:
+            assert elapsed <= timings[0][1], f"{name} is slower, seed {seed}"
+
+    tags = sorted(l for l in git(top, "tag").split("\n") if l)
+    assert sorted(ReleaseInfo(os.path.join(top, components[0])).all_tags) == tags
+    infos = ReleaseInfo.find_all([top], True, False)
+    assert sorted(infos[0].all_tags) == tags
+    check_order(top, infos)
+    shuffled = list(infos)
+    rng.shuffle(shuffled)
+    check_order(top, order_release_infos(shuffled))
+
+    for path in rng.sample([f"{top}/.gitignore", f"{top}.excludes"], rng.randint(1, 2)):
+        write(path, "")
+    index = [e for e in ENGINES if e[4].get("index_reader_enabled")]
+    compare(top, components, index, seed, monkeypatch)
+
+    git(top, "config", "uploadpack.allowFilter", "true")
+    git(top, "clone", "-q", f"file://{top}", f"{top}-clone")
+    expected = {
+        c: (version, changes, bool(since_tag))
+        for c, (version, changes, since_tag) in reference(
+            f"{top}-clone", components
+        ).items()
+    }
+    for n, (name, options, flags) in enumerate(CLONES):
+        clone = f"{top}-clone-{n}"
+        git(top, "clone", "-q", *options, f"file://{top}", clone)
+        for attribute, default in SETTINGS.items():
+            monkeypatch.setattr(Repository, attribute, flags.get(attribute, default))
+        actual = {
+            c: (i.current_version, sorted(i.change_list), bool(i.changes_since_tag))
+            for c, i in attached(clone, components).items()
+        }
+        assert actual == expected, f"{name} differs from the reference, seed {seed}"
+
+    if TIMINGS:
+        ratios = ", ".join(f"{n} {timings[0][1] / t:.2f}x" for n, t in timings[1:])
+        with capsys.disabled():
+            print(f"\nseed {seed}, {len(components)} components, {ratios}")
@@ -0,0 +1,49 @@
+import uuid
+
+import pytest
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag.exceptions import (
+    ConfigurationError,
+    GitError,
+    PreTagCommandError,
+    TagConflictError,
+)
+from git_release_tag.release_info import ReleaseInfo
+
+
+def test_configuration_error():
+    with pytest.raises(ConfigurationError):
+        ReleaseInfo(path=f"/tmp/git-release-tag/errors/{uuid.uuid4()}")
+
+
+def test_tag_conflict(create_repository):
+    dir = f"/tmp/git-release-tag/errors/{uuid.uuid4()}"
+    i = create_repository(dir, ["."], base_tag="v")
+    i.git_update(["git", "tag", "v0.1.1"])
+
+    with pytest.raises(TagConflictError):
+        i.tag_next_release(ReleaseInfo.PATCH, force=True)
+
+
+def test_pre_tag_command_failure(create_repository):
+    dir = f"/tmp/git-release-tag/errors/{uuid.uuid4()}"
+    i = create_repository(dir, ["."], base_tag="v")
+    i.pre_tag_command = "echo @@RELEASE@@ && false"
+
+    with pytest.raises(PreTagCommandError) as error:
+        i.tag_next_release(ReleaseInfo.PATCH, force=True)
+    assert error.value.returncode == 1
+
+
+def test_git_error_exit_code(create_repository):
+    dir = f"/tmp/git-release-tag/errors/{uuid.uuid4()}"
+    i = create_repository(dir, ["."], base_tag="v")
+    i.git_update(["git", "tag", "-d", "v0.1.0"])
+
+    with pytest.raises(GitError):
+        i.changes_since_tag
+
+    result = CliRunner().invoke(main, ["show", dir])
+    assert result.exit_code == GitError.exit_code
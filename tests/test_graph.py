@@ -0,0 +1,78 @@
+import json
+import os
+import uuid
+
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag.graph import load_graph, release_blobs, to_dot
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.repository import Repository
+
+DEPENDENCIES = {"util": [".", "../lib"], "app": [".", "../lib", "../util", "../docs"]}
+
+
+def test_graph(create_repository):
+    top = f"/tmp/git-release-tag/graph/{uuid.uuid4()}"
+    os.makedirs(f"{top}/docs")
+    create_repository(top, ["lib", "util", "app"], dependencies=DEPENDENCIES)
+
+    result = CliRunner().invoke(main, ["graph", top])
+    assert result.exit_code == 0, result.output
+    graph = json.loads(result.output)
+    assert graph["format"] == 1
+    components = {c["directory"]: c for c in graph["components"]}
+    assert [c["directory"] for c in graph["components"]] == ["lib", "util", "app"]
+    assert components["lib"]["level"] == 0
+    assert components["util"]["level"] == 1
+    assert components["app"]["level"] == 2
+    assert components["app"]["depends_on"] == ["docs", "lib", "util"]
+    assert components["app"]["tag"] == "app-0.1.0"
+    assert components["app"]["version"] == "0.1.0"
+    assert ["util", "lib"] in graph["edges"]
+
+    dot = to_dot(graph)
+    assert '"app" -> "util";' in dot
+    assert '"docs" [style=dashed];' in dot
+
+
+def test_graph_cached_on_release_blobs(monkeypatch, create_repository):
+    top = f"/tmp/git-release-tag/graph/{uuid.uuid4()}"
+    os.makedirs(f"{top}/docs")
+    i = create_repository(top, ["lib", "util", "app"], dependencies=DEPENDENCIES)
+    repository = Repository(ReleaseInfo.git_top_level(top))
+    blobs = release_blobs(repository, top)
+    assert [path for path, _ in blobs] == [
+        "app/.release",
+        "lib/.release",
+        "util/.release",
+    ]
+
+    monkeypatch.setattr(Repository, "cache_enabled", True)
+    assert load_graph(top)["components"][0]["release"] == "0.1.0"
+
+    lib = ReleaseInfo(path=os.path.join(top, "lib"))
+    lib.semver = "0.2.0"
+    lib.write()
+    assert release_blobs(repository, top) != blobs
+    assert load_graph(top)["components"][0]["release"] == "0.2.0"
+
+    i.git_update(["git", "add", "."])
+    i.git_update(["git", "commit", "-m", "lib 0.2.0"])
+    assert load_graph(top)["components"][0]["release"] == "0.2.0"
+
+
+def test_graph_versions_are_not_cached(monkeypatch, create_repository):
+    top = f"/tmp/git-release-tag/graph/{uuid.uuid4()}"
+    i = create_repository(top, ["lib"])
+    monkeypatch.setattr(Repository, "cache_enabled", True)
+    assert load_graph(top, versions=True)["components"][0]["version"] == "0.1.0"
+    assert "version" not in load_graph(top)["components"][0]
+
+    with open(os.path.join(top, "lib", "main.py"), "w") as f:
+        f.write("print('changed')\n")
+    i.git_update(["git", "add", "."])
+    i.git_update(["git", "commit", "-m", "change lib"])
+    version = load_graph(top, versions=True)["components"][0]["version"]
+    assert version == ReleaseInfo(path=os.path.join(top, "lib")).current_version
+    assert version != "0.1.0"
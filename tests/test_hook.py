@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+import uuid
+
+from git_release_tag.hook import pre_receive
+from git_release_tag.release_info import ReleaseInfo
+
+
+def install_hook(server: str):
+    path = os.path.join(server, "hooks", "pre-receive")
+    with open(path, "w") as f:
+        f.write(
+            f"#!/bin/sh\nexec {sys.executable} -m git_release_tag hook pre-receive\n"
+        )
+    os.chmod(path, 0o755)
+
+
+def push(directory: str, server: str, *refs: str) -> subprocess.CompletedProcess:
+    source = os.path.join(os.path.dirname(__file__), os.pardir, "src")
+    return subprocess.run(
+        ["git", "push", "-q", server, *refs],
+        cwd=directory,
+        env=dict(os.environ, PYTHONPATH=os.path.abspath(source)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+
+def test_pre_receive(create_repository):
+    top = f"/tmp/git-release-tag/hook/{uuid.uuid4()}"
+    work = f"{top}/work"
+    server = f"{top}/server.git"
+    i = create_repository(work, ["a"])
+    subprocess.check_call(["git", "clone", "-q", "--bare", work, server])
+    install_hook(server)
+
+    a = ReleaseInfo(path=f"{work}/a")
+    a.tag_next_release(ReleaseInfo.PATCH, force=True)
+    assert push(work, server, "HEAD:refs/heads/master").returncode == 0
+    assert push(work, server, "refs/tags/a-0.1.1").returncode == 0
+
+    i.git_update(["git", "tag", "build-1"])
+    assert push(work, server, "refs/tags/build-1").returncode == 0
+
+    i.git_update(["git", "tag", "-a", "-m", "wrong", "a-0.3.0"])
+    result = push(work, server, "refs/tags/a-0.3.0")
+    assert result.returncode != 0
+    assert "tag a-0.3.0 does not match a/.release" in result.stderr
+
+    a.semver = "0.0.5"
+    a.write()
+    i.git_update(["git", "commit", "-q", "-a", "-m", "downgrade"])
+    i.git_update(["git", "tag", "a-0.0.5"])
+    assert push(work, server, "HEAD:refs/heads/master").returncode == 0
+    result = push(work, server, "refs/tags/a-0.0.5")
+    assert result.returncode != 0
+    assert "tag a-0.0.5 is not newer than release a-0.1.1" in result.stderr
+
+    head = i.git_query(["git", "rev-parse", "HEAD"]).strip()
+    assert pre_receive([f"{'0' * 40} {head} refs/tags/build-2\n"], server)
+    assert not pre_receive(
+        [
+            f"{'0' * 40} {head} refs/tags/a-0.0.5\n",
+            f"{'0' * 40} {head} refs/tags/a-0.0.6\n",
+            f"{'0' * 40} {head} refs/heads/other\n",
+        ],
+        server,
+    )
+
+
+def test_reject_invalid_release(create_repository):
+    top = f"/tmp/git-release-tag/hook/{uuid.uuid4()}"
+    work = f"{top}/work"
+    server = f"{top}/server.git"
+    i = create_repository(work, ["a", "b"])
+    subprocess.check_call(["git", "clone", "-q", "--bare", work, server])
+    install_hook(server)
+
+    with open(f"{work}/a/.release", "w") as f:
+        f.write("release=0.2.0\n")
+    with open(f"{work}/b/.release", "wb") as f:
+        f.write(b"release=0.2.0\ntag=b-0.2.0\nbase_tag=b-\n# \xff\n")
+    i.git_update(["git", "commit", "-q", "-a", "-m", "invalid releases"])
+    i.git_update(["git", "tag", "a-0.2.0"])
+    i.git_update(["git", "tag", "b-0.2.0"])
+    assert push(work, server, "HEAD:refs/heads/master").returncode == 0
+
+    result = push(work, server, "refs/tags/a-0.2.0")
+    assert result.returncode != 0
+    assert "a/.release in" in result.stderr
+    assert "does not contain release and/or tag values" in result.stderr
+    result = push(work, server, "refs/tags/b-0.2.0")
+    assert result.returncode != 0
+    assert "b/.release in" in result.stderr and "not valid UTF-8" in result.stderr
+
+
+def test_delete_in_sha256_repository():
+    server = f"/tmp/git-release-tag/hook/{uuid.uuid4()}/server.git"
+    subprocess.check_call(
+        ["git", "init", "-q", "--bare", "--object-format=sha256", server]
+    )
+    assert pre_receive([f"{'1' * 64} {'0' * 64} refs/tags/a-0.1.0\n"], server)
@@ -0,0 +1,210 @@
+import os
+import uuid
+
+import pytest
+
+from git_release_tag import git
+from git_release_tag.index import GitIndex, WorktreeState, config_value
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.repository import Repository
+
+
+def create_component(top: str) -> ReleaseInfo:
+    os.makedirs(f"{top}/a/src", exist_ok=True)
+    os.makedirs(f"{top}/b", exist_ok=True)
+    i = ReleaseInfo(path=top)
+    i.git_init()
+    for name in ["a/src/x.txt", "a/src/y.txt", "a/z.txt", "a-b.txt", "b/c.txt"]:
+        with open(f"{top}/{name}", "w") as f:
+            f.write(name)
+    ReleaseInfo.initialize(
+        directory=f"{top}/a",
+        semver="0.1.0",
+        base_tag="a-",
+        pre_tag_command="echo @@RELEASE@@ > release.txt",
+        dry_run=False,
+    )
+    i.git_update(["git", "add", "."])
+    i.git_update(["git", "commit", "-q", "-m", "files"])
+    backdate(i, top)
+    return i
+
+
+def backdate(i: ReleaseInfo, top: str):
+    """
+    moves the modification times of all files into the past, so that no index entry is
+    racily clean.
+    """
+    for root, _, files in os.walk(top):
+        for name in files:
+            if "/.git" not in root:
+                past = os.stat(os.path.join(root, name)).st_mtime - 10
+                os.utime(os.path.join(root, name), (past, past))
+    i.git_update(["git", "update-index", "-q", "--refresh"])
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_read_index(version):
+    top = f"/tmp/git-release-tag/index/{uuid.uuid4()}"
+    i = create_component(top)
+    i.git_update(["git", "update-index", "--index-version", str(version)])
+    if version == 3:
+        with open(f"{top}/a/new.txt", "w") as f:
+            f.write("new")
+        i.git_update(["git", "add", "-N", "a/new.txt"])
+
+    with GitIndex(f"{top}/.git/index") as index:
+        assert index.version == version
+        assert [os.fsdecode(p) for p in index.paths] == i.git_query(
+            ["git", "ls-files"]
+        ).split()
+        assert (
+            [e.path for e in index.entries(b"a")]
+            == [
+                b"a/.release",
+                b"a/release.txt",
+                b"a/src/x.txt",
+                b"a/src/y.txt",
+                b"a/z.txt",
+            ]
+            if version != 3
+            else [
+                b"a/.release",
+                b"a/new.txt",
+                b"a/release.txt",
+                b"a/src/x.txt",
+                b"a/src/y.txt",
+                b"a/z.txt",
+            ]
+        )
+        if version == 3:
+            assert index.entries(b"a")[1].extended_flags
+        entry = index.entries(b"a/src")[0]
+        assert entry.path == b"a/src/x.txt"
+        assert entry.size == len("a/src/x.txt")
+        assert entry.mode == 0o100644
+
+
+def test_clean_without_git(monkeypatch):
+    monkeypatch.setattr(Repository, "index_reader_enabled", True)
+    top = f"/tmp/git-release-tag/index/{uuid.uuid4()}"
+    i = create_component(top)
+    info = ReleaseInfo(path=f"{top}/a")
+
+    assert info.change_list == []
+    assert info.change_list == []
+    state = WorktreeState.capture(info.directory, info.tag_on_changes_in)
+    assert state.is_clean()
+
+    def no_git(*args, **kwargs):
+        raise AssertionError("git should not be executed")
+
+    with monkeypatch.context() as m:
+        m.setattr(git, "exec", no_git)
+        assert info.change_list == []
+
+    with open(f"{top}/b/c.txt", "w") as f:
+        f.write("changed outside the component")
+    assert "b" not in state.state["directories"]
+    with monkeypatch.context() as m:
+        m.setattr(git, "exec", no_git)
+        assert info.change_list == []
+
+    with open(f"{top}/a/src/x.txt", "w") as f:
+        f.write("modified")
+    assert info.change_list == [" M src/x.txt"]
+    i.git_update(["git", "checkout", "--", "a/src/x.txt"])
+    assert info.change_list == []
+
+    with open(f"{top}/a/src/new.txt", "w") as f:
+        f.write("untracked")
+    assert info.change_list == ["?? src/new.txt"]
+    os.remove(f"{top}/a/src/new.txt")
+    assert info.change_list == []
+
+    i.git_update(["git", "rm", "-q", "--cached", "a/z.txt"])
+    assert info.change_list == ["D  z.txt", "?? z.txt"]
+    i.git_update(["git", "add", "a/z.txt"])
+    assert info.change_list == []
+
+
+def test_top_level_without_git(monkeypatch):
+    top = f"/tmp/git-release-tag/index/{uuid.uuid4()}"
+    create_component(top)
+    for directory in [top, f"{top}/a/src", f"{top}/.git/objects"]:
+        expected, _ = git.exec(
+            ["git", "rev-parse", "--show-toplevel"], directory, fail_on_error=False
+        )
+        assert ReleaseInfo.git_top_level(directory) == expected[0].strip()
+
+    def no_git(*args, **kwargs):
+        raise AssertionError("git should not be executed")
+
+    monkeypatch.setattr(git, "exec", no_git)
+    assert ReleaseInfo.git_top_level(f"{top}/a/src") == os.path.realpath(top)
+
+
+def test_clean_after_status_refreshed_the_index(monkeypatch):
+    monkeypatch.setattr(Repository, "index_reader_enabled", True)
+    top = f"/tmp/git-release-tag/index/{uuid.uuid4()}"
+    create_component(top)
+    past = os.stat(f"{top}/a/z.txt").st_mtime - 10
+    os.utime(f"{top}/a/z.txt", (past, past))
+    index = os.stat(f"{top}/.git/index").st_mtime_ns
+
+    info = ReleaseInfo(path=f"{top}/a")
+    assert info.change_list == []
+    assert os.stat(f"{top}/.git/index").st_mtime_ns != index
+    assert WorktreeState.capture(info.directory, info.tag_on_changes_in).is_clean()
+
+
+def test_ignore_files_changed(monkeypatch):
+    monkeypatch.setattr(Repository, "index_reader_enabled", True)
+    top = f"/tmp/git-release-tag/index/{uuid.uuid4()}"
+    i = create_component(top)
+    with open(f"{top}/.gitignore", "w") as f:
+        f.write("*.log\n")
+    with open(f"{top}/excludes", "w") as f:
+        f.write("*.tmp\n")
+    i.git_update(["git", "config", "core.excludesFile", f"{top}/excludes"])
+    i.git_update(["git", "add", ".gitignore"])
+    i.git_update(["git", "commit", "-q", "-m", "ignore logs"])
+    for name in ["a/x.log", "a/src/y.tmp"]:
+        with open(f"{top}/{name}", "w") as f:
+            f.write(name)
+    backdate(i, top)
+
+    info = ReleaseInfo(path=f"{top}/a")
+    for _ in range(3):
+        assert info.change_list == []
+    assert WorktreeState.capture(info.directory, info.tag_on_changes_in).is_clean()
+
+    with open(f"{top}/.gitignore", "w") as f:
+        f.write("")
+    assert info.change_list == ["?? x.log"]
+    with open(f"{top}/.gitignore", "w") as f:
+        f.write("*.log\n")
+    for _ in range(3):
+        assert info.change_list == []
+
+    with open(f"{top}/excludes", "w") as f:
+        f.write("")
+    assert info.change_list == ["?? src/y.tmp"]
+
+
+def test_config_value():
+    dir = f"/tmp/git-release-tag/index/{uuid.uuid4()}"
+    os.makedirs(dir)
+    with open(f"{dir}/global", "w") as f:
+        f.write('[core]\n\texcludesFile = "~/my ignores" ; comment\n')
+    with open(f"{dir}/local", "w") as f:
+        f.write('[core "other"]\n\texcludesfile = other\n[Core] bare = true\n')
+    with open(f"{dir}/include", "w") as f:
+        f.write('[includeIf "gitdir:~/work/"]\n\tpath = work\n')
+
+    files = [f"{dir}/global", f"{dir}/missing", f"{dir}/local"]
+    assert config_value(files, "core.excludesFile") == "~/my ignores"
+    assert config_value(files, "core.bare") == "true"
+    assert config_value(files, "core.abbrev") is None
+    with pytest.raises(ValueError):
+        config_value(files + [f"{dir}/include"], "core.excludesFile")
@@ -1,6 +1,11 @@
 import pytest
 import os
 import uuid
+
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag.exceptions import TagConflictError
 from git_release_tag.release_info import ReleaseInfo
 
 
@@ -54,3 +59,65 @@ def test_initialize_in_workspace():
         assert info.semver == f"0.{i}.0"
         assert info.directory == dir
         assert info.path == os.path.join(dir, ".release")
+
+
+def test_initialize_many_components_in_one_commit(monkeypatch):
+    topdir = f"/tmp/git-release-tag/init/{uuid.uuid4()}"
+    components = ["a", "b", "c", "d"]
+    for c in components:
+        os.makedirs(os.path.join(topdir, "services", c), exist_ok=True)
+    os.makedirs(os.path.join(topdir, "libs", "e"), exist_ok=True)
+    with open(os.path.join(topdir, "manifest.txt"), "w") as f:
+        f.write("# libraries\nlibs/e\n")
+    info = ReleaseInfo(path=topdir)
+    info.git_init()
+    monkeypatch.chdir(topdir)
+
+    result = CliRunner().invoke(
+        main,
+        [
+            "initialize",
+            "--initial-release",
+            "1.0.0",
+            "--pre-tag-command",
+            "echo @@RELEASE@@ > release.txt",
+            "--glob",
+            f"{topdir}/services/*",
+            "--manifest",
+            os.path.join(topdir, "manifest.txt"),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert info.git_query(["git", "rev-list", "--count", "HEAD"]).strip() == "1"
+    head = info.git_query(["git", "rev-parse", "HEAD"])
+    for c, directory in [(c, f"services/{c}") for c in components] + [("e", "libs/e")]:
+        component = ReleaseInfo(path=os.path.join(topdir, directory))
+        assert component.tag == f"{c}-1.0.0"
+        assert info.git_query(["git", "rev-parse", f"{c}-1.0.0^{{commit}}"]) == head
+        with open(os.path.join(topdir, directory, "release.txt")) as f:
+            assert f.read() == "1.0.0\n"
+    # the default --tag-on-changes-in . is the current directory, including the manifest
+    assert info.git_query(["git", "status", "--porcelain"]).strip() == ""
+
+    os.makedirs(os.path.join(topdir, "services", "f"), exist_ok=True)
+    result = CliRunner().invoke(main, ["initialize", "--glob", f"{topdir}/services/*"])
+    assert result.exit_code == 0, result.output
+    assert ReleaseInfo(path=os.path.join(topdir, "services", "f")).tag == "f-0.0.0"
+
+
+def test_initialize_many_components_with_a_used_prefix(monkeypatch):
+    topdir = f"/tmp/git-release-tag/init/{uuid.uuid4()}"
+    for c in ["a", "b"]:
+        os.makedirs(os.path.join(topdir, c), exist_ok=True)
+    info = ReleaseInfo(path=topdir)
+    info.git_init()
+    monkeypatch.chdir(topdir)
+    info.git_update(["git", "commit", "-q", "--allow-empty", "-m", "initial"])
+    info.git_update(["git", "tag", "b-2.0.0"])
+
+    result = CliRunner().invoke(
+        main, ["initialize", os.path.join(topdir, "a"), os.path.join(topdir, "b")]
+    )
+    assert result.exit_code == TagConflictError.exit_code
+    assert not os.path.exists(os.path.join(topdir, "a", ".release"))
+    assert info.git_query(["git", "rev-list", "--count", "HEAD"]).strip() == "1"
@@ -0,0 +1,94 @@
+import threading
+import uuid
+
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag.exceptions import ConfigurationError, LockTimeoutError
+from git_release_tag.lock import FileLock
+from git_release_tag.release_info import ReleaseInfo
+
+
+def test_bump_waits_for_lock(create_repository):
+    dir = f"/tmp/git-release-tag/lock/{uuid.uuid4()}"
+    i = create_repository(dir, ["."], base_tag="v")
+    path = i._get_repository().lock().path
+
+    with FileLock(path):
+        result = CliRunner().invoke(
+            main, ["bump", "--lock-timeout", "0.1", "--force", "--level", "patch", dir]
+        )
+        assert result.exit_code == LockTimeoutError.exit_code
+        assert ReleaseInfo(path=dir).current_version == "0.1.0"
+
+        result = CliRunner().invoke(main, ["show", dir])
+        assert result.exit_code == 0
+        assert result.output.strip() == "0.1.0"
+
+    result = CliRunner().invoke(
+        main, ["bump", "--lock-timeout", "0.1", "--force", "--level", "patch", dir]
+    )
+    assert result.exit_code == 0
+    assert ReleaseInfo(path=dir).current_version == "0.1.1"
+
+
+def test_lock_timeout_from_environment(monkeypatch, create_repository):
+    dir = f"/tmp/git-release-tag/lock/{uuid.uuid4()}"
+    i = create_repository(dir, ["."], base_tag="v")
+    path = i._get_repository().lock().path
+
+    monkeypatch.setenv("GIT_RELEASE_TAG_LOCK_TIMEOUT", "0.1")
+    with FileLock(path):
+        result = CliRunner().invoke(main, ["bump", "--force", "--level", "patch", dir])
+        assert result.exit_code == LockTimeoutError.exit_code
+
+    monkeypatch.setenv("GIT_RELEASE_TAG_LOCK_TIMEOUT", "soon")
+    result = CliRunner().invoke(main, ["bump", "--force", "--level", "patch", dir])
+    assert result.exit_code == ConfigurationError.exit_code
+    assert ReleaseInfo(path=dir).current_version == "0.1.0"
+
+
+def test_configuration_read_again_after_concurrent_release(create_repository):
+    dir = f"/tmp/git-release-tag/lock/{uuid.uuid4()}"
+    stale = create_repository(dir, ["."], base_tag="v")
+
+    other = ReleaseInfo(path=dir)
+    other.tag_next_release(ReleaseInfo.MINOR, force=True)
+    assert other.tag == "v0.2.0"
+
+    stale.tag_next_release(ReleaseInfo.PATCH, force=True)
+    assert stale.tag == "v0.2.1"
+    assert ReleaseInfo(path=dir).current_version == "0.2.1"
+
+
+def test_threads_exclude_each_other():
+    path = f"/tmp/git-release-tag/lock/{uuid.uuid4()}/release.lock"
+    lock = FileLock(path)
+    acquired = threading.Event()
+
+    def hold():
+        try:
+            with FileLock(path, timeout=0):
+                acquired.set()
+        except LockTimeoutError:
+            pass
+
+    with lock:
+        with lock:
+            assert lock.depth == 2
+        thread = threading.Thread(target=hold)
+        thread.start()
+        thread.join(0.3)
+        assert not acquired.is_set()
+        assert lock.depth == 1
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(lock.depth))
+        thread.start()
+        thread.join()
+        assert other == [0]
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    thread.join()
+    assert acquired.is_set()
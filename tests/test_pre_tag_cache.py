@@ -0,0 +1,48 @@
+import os
+import uuid
+
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.repository import Repository
+
+
+def test_replay_pre_tag_command(monkeypatch):
+    monkeypatch.setattr(Repository, "pre_tag_command_cache_enabled", True)
+    top = f"/tmp/git-release-tag/pre-tag-cache/{uuid.uuid4()}"
+    os.makedirs(f"{top}/repository/a", exist_ok=True)
+    counter = f"{top}/runs"
+    i = ReleaseInfo(path=f"{top}/repository")
+    i.git_init()
+    ReleaseInfo.initialize(
+        directory=f"{top}/repository/a",
+        semver="0.1.0",
+        base_tag="a-",
+        pre_tag_command=f"echo @@RELEASE@@ > release.txt && echo run >> {counter} && rm -f obsolete.txt",
+        dry_run=False,
+    )
+    assert open(counter).read() == "run\n"
+
+    with open(f"{top}/repository/a/obsolete.txt", "w") as f:
+        f.write("obsolete")
+    i.git_update(["git", "add", "."])
+    i.git_update(["git", "commit", "-m", "obsolete"])
+    base = i.git_query(["git", "rev-parse", "HEAD"]).strip()
+
+    trees = []
+    for _ in range(2):
+        info = ReleaseInfo(path=f"{top}/repository/a")
+        info.tag_next_release(ReleaseInfo.PATCH, force=True)
+        assert info.tag == "a-0.1.1"
+        assert open(f"{top}/repository/a/release.txt").read() == "0.1.1\n"
+        assert not os.path.exists(f"{top}/repository/a/obsolete.txt")
+        trees.append(i.git_query(["git", "rev-parse", "HEAD^{tree}"]).strip())
+
+        i.git_update(["git", "tag", "-d", "a-0.1.1"])
+        i.git_update(["git", "reset", "-q", "--hard", base])
+
+    assert trees[0] == trees[1]
+    assert open(counter).read() == "run\nrun\n"
+
+    info = ReleaseInfo(path=f"{top}/repository/a")
+    info.tag_next_release(ReleaseInfo.MINOR, force=True)
+    assert open(f"{top}/repository/a/release.txt").read() == "0.2.0\n"
+    assert open(counter).read() == "run\nrun\nrun\n"
@@ -0,0 +1,121 @@
+import os
+import subprocess
+import uuid
+
+import pytest
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag.release_info import ReleaseInfo
+
+
+@pytest.fixture
+def create_clones(create_repository):
+    """
+    a factory of a bare server repository with released components, and clones of it.
+    """
+
+    def create(top: str, components: [str], clones: [str]) -> str:
+        create_repository(f"{top}/work", components)
+        server = f"{top}/server.git"
+        subprocess.check_call(["git", "clone", "-q", "--bare", f"{top}/work", server])
+        for clone in clones:
+            subprocess.check_call(["git", "clone", "-q", server, f"{top}/{clone}"])
+        return server
+
+    return create
+
+
+def change(directory: str, name: str):
+    with open(os.path.join(directory, name), "w") as f:
+        f.write(str(uuid.uuid4()))
+    info = ReleaseInfo(path=directory)
+    info.git_update(["git", "add", name])
+    info.git_update(["git", "commit", "-q", "-m", f"changed {name}"])
+
+
+def git_query(directory: str, cmd: [str]) -> str:
+    return ReleaseInfo(path=directory).git_query(cmd)
+
+
+def test_push_only_new_releases(create_clones):
+    top = f"/tmp/git-release-tag/push/{uuid.uuid4()}"
+    server = create_clones(top, ["a", "b"], ["one"])
+    one = f"{top}/one"
+    change(f"{one}/a", "x.txt")
+    git_query(one, ["git", "tag", "unrelated"])
+
+    result = CliRunner().invoke(
+        main, ["bump", "-r", "--level", "patch", "--push", "origin", one]
+    )
+    assert result.exit_code == 0, result.output
+    assert git_query(server, ["git", "tag"]).split() == [
+        "a-0.1.0",
+        "a-0.1.1",
+        "b-0.1.0",
+    ]
+    assert git_query(server, ["git", "rev-parse", "HEAD"]) == git_query(
+        one, ["git", "rev-parse", "HEAD"]
+    )
+
+
+def test_push_retries_after_concurrent_release(create_clones):
+    top = f"/tmp/git-release-tag/push/{uuid.uuid4()}"
+    server = create_clones(top, ["a", "b"], ["one", "two"])
+    one, two = f"{top}/one", f"{top}/two"
+
+    change(f"{two}/b", "x.txt")
+    result = CliRunner().invoke(
+        main, ["bump", "-r", "--level", "patch", "--push", "origin", two]
+    )
+    assert result.exit_code == 0, result.output
+
+    change(f"{one}/a", "x.txt")
+    change(f"{one}/b", "y.txt")
+    result = CliRunner().invoke(
+        main, ["bump", "-r", "--level", "patch", "--push", "origin", one]
+    )
+    assert result.exit_code == 0, result.output
+    assert sorted(git_query(server, ["git", "tag"]).split()) == [
+        "a-0.1.0",
+        "a-0.1.1",
+        "b-0.1.0",
+        "b-0.1.1",
+        "b-0.1.2",
+    ]
+    assert git_query(server, ["git", "rev-parse", "HEAD"]) == git_query(
+        one, ["git", "rev-parse", "HEAD"]
+    )
+    assert os.path.exists(f"{one}/b/x.txt")
+    with open(f"{one}/b/release.txt") as f:
+        assert f.read().strip() == "0.1.2"
+    assert git_query(one, ["git", "status", "--porcelain"]) == ""
+
+
+def test_push_fails_after_retries(create_clones):
+    top = f"/tmp/git-release-tag/push/{uuid.uuid4()}"
+    server = create_clones(top, ["a"], ["one", "two"])
+    one, two = f"{top}/one", f"{top}/two"
+    change(f"{two}/a", "x.txt")
+    subprocess.check_call(["git", "push", "-q", "origin", "HEAD"], cwd=two)
+    head = git_query(one, ["git", "rev-parse", "HEAD"])
+
+    change(f"{one}/a", "y.txt")
+    result = CliRunner().invoke(
+        main,
+        [
+            "bump",
+            "-r",
+            "--level",
+            "patch",
+            "--push",
+            "origin",
+            "--push-retries",
+            "0",
+            one,
+        ],
+    )
+    assert result.exit_code == 9
+    assert git_query(server, ["git", "tag"]).split() == ["a-0.1.0"]
+    assert git_query(one, ["git", "tag"]).split() == ["a-0.1.0"]
+    assert git_query(one, ["git", "rev-parse", "HEAD^"]) == head
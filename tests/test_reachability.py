@@ -0,0 +1,51 @@
+import os
+import uuid
+
+from git_release_tag.release_info import ReleaseInfo
+
+
+def test_release_on_other_branch():
+    top = f"/tmp/git-release-tag/reachability/{uuid.uuid4()}"
+    dir = f"{top}/a"
+    os.makedirs(dir, exist_ok=True)
+    ReleaseInfo(path=top).git_init()
+    i = ReleaseInfo(path=dir)
+    ReleaseInfo.initialize(
+        directory=dir,
+        semver="0.1.0",
+        base_tag="a-",
+        pre_tag_command="echo @@RELEASE@@ > release.txt",
+        dry_run=False,
+    )
+    i.read()
+    main_branch = i.git_query(["git", "rev-parse", "--abbrev-ref", "HEAD"]).strip()
+    i.git_update(["git", "branch", "other"])
+
+    with open(os.path.join(dir, "file.txt"), "w") as f:
+        f.write("changed")
+    i.tag_next_release(ReleaseInfo.PATCH, force=True)
+    assert i.tag == "a-0.1.1"
+    assert i.is_released_on_branch
+    assert not i.has_unreleased_commits
+    assert i.branch_aware_version == "0.1.1"
+
+    i.git_update(["git", "checkout", "-q", "other"])
+    with open(os.path.join(top, "unrelated.txt"), "w") as f:
+        f.write("unrelated")
+    i.git_update(["git", "add", top])
+    i.git_update(["git", "commit", "-m", "unrelated change"])
+    i.git_update(["git", "cherry-pick", main_branch])
+    for with_commit_graph in [False, True]:
+        if with_commit_graph:
+            i.git_update(["git", "commit-graph", "write", "--reachable"])
+        info = ReleaseInfo(path=dir)
+        assert info.current_version == "0.1.1"
+        assert not info.is_released_on_branch
+        assert info.has_unreleased_commits
+        assert info.branch_aware_version == f"0.1.1-{info.short_revision}"
+        assert info.repository.has_commit_graph == with_commit_graph
+
+    i.git_update(["git", "checkout", "-q", main_branch])
+    info = ReleaseInfo(path=dir)
+    assert info.is_released_on_branch
+    assert info.branch_aware_version == "0.1.1"
@@ -0,0 +1,158 @@
+import os
+import uuid
+
+import pytest
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag.exceptions import ConfigurationError
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.repository import Repository
+
+
+def commit(top: ReleaseInfo, path: str, message: str):
+    with open(os.path.join(top.directory, path), "w") as f:
+        f.write(message)
+    top.git_update(["git", "add", "."])
+    top.git_update(["git", "commit", "-m", message])
+
+
+def assert_batched_revisions_match(dir: str):
+    infos = ReleaseInfo.find_all([dir], True, True)
+    assert len(infos[0].repository.release_infos) == len(infos)
+    for info in infos:
+        assert info.short_revision == info.query_short_revision()
+
+
+def test_linear_history(create_repository):
+    dir = f"/tmp/git-release-tag/short-revision/{uuid.uuid4()}"
+    top = create_repository(dir, ["a", "b", "c"], pre_tag_command="")
+    commit(top, "a/file.txt", "change a")
+    commit(top, 'b/"quoted"\tname.txt', "change b")
+    commit(top, "README.md", "change top")
+    commit(top, "a/file.txt", "change a again")
+
+    assert_batched_revisions_match(dir)
+
+
+def test_history_with_merges(create_repository):
+    dir = f"/tmp/git-release-tag/short-revision/{uuid.uuid4()}"
+    top = create_repository(dir, ["a", "b", "c"], pre_tag_command="")
+    branch = top.git_query(["git", "rev-parse", "--abbrev-ref", "HEAD"]).strip()
+    top.git_update(["git", "checkout", "-q", "-b", "feature"])
+    commit(top, "b/file.txt", "change b on feature")
+    top.git_update(["git", "checkout", "-q", branch])
+    commit(top, "a/file.txt", "change a")
+    top.git_update(["git", "merge", "--no-edit", "feature"])
+    commit(top, "c/file.txt", "change c")
+
+    assert_batched_revisions_match(dir)
+
+
+def test_changes_before_merges(monkeypatch, create_repository):
+    dir = f"/tmp/git-release-tag/short-revision/{uuid.uuid4()}"
+    top = create_repository(dir, ["a", "b", "c", "d"], pre_tag_command="")
+    commit(top, "a/file.txt", "change a")
+    commit(top, "d/file.txt", "change d")
+    branch = top.git_query(["git", "rev-parse", "--abbrev-ref", "HEAD"]).strip()
+    for n in range(3):
+        top.git_update(["git", "checkout", "-q", "-b", f"feature-{n}"])
+        commit(top, f"b/file-{n}.txt", f"change b on feature {n}")
+        top.git_update(["git", "checkout", "-q", branch])
+        commit(top, "c/file.txt", f"change c {n}")
+        top.git_update(["git", "merge", "--no-edit", f"feature-{n}"])
+
+    queried = []
+    query_last_change = Repository.query_last_change
+
+    def query(repository, release_info):
+        queried.append(os.path.basename(release_info.directory))
+        return query_last_change(repository, release_info)
+
+    monkeypatch.setattr(Repository, "query_last_change", query)
+    assert_batched_revisions_match(dir)
+    assert queried == ["b"]
+
+
+def test_batched_outstanding_changes(create_repository):
+    dir = f"/tmp/git-release-tag/short-revision/{uuid.uuid4()}"
+    files = {"a/file.txt": "a", "b/old.txt": "b"}
+    top = create_repository(
+        dir,
+        ["a", "b", "c", "d", "e"],
+        pre_tag_command="",
+        dependencies={"d": [".", "../c"]},
+        files=files,
+    )
+    with open(f"{dir}/a/file.txt", "w") as f:
+        f.write("changed")
+    top.git_update(["git", "mv", "b/old.txt", "c/new.txt"])
+    os.makedirs(f"{dir}/f/g")
+    with open(f"{dir}/f/g/.release", "w") as f:
+        f.write("release=0.1.0\ntag=g-0.1.0\n")
+
+    infos = ReleaseInfo.find_all([dir], True, True)
+    changed = {
+        os.path.relpath(i.directory, dir) for i in infos if i.has_outstanding_changes
+    }
+    assert changed == {"a", "b", "c", "d", "f/g"}
+    for info in infos:
+        assert info.has_outstanding_changes == bool(info.change_list)
+
+
+def test_abbreviation_length(monkeypatch, create_repository):
+    dir = f"/tmp/git-release-tag/short-revision/{uuid.uuid4()}"
+    top = create_repository(dir, ["a", "b"], pre_tag_command="")
+    commit(top, "a/file.txt", "change a")
+
+    infos = ReleaseInfo.find_all([dir], True, True)
+    assert infos[0].repository.abbrev_length is None
+
+    monkeypatch.setattr(Repository, "abbrev", 12)
+    single = ReleaseInfo(f"{dir}/a")
+    assert len(single.short_revision) == 12
+    infos = ReleaseInfo.find_all([dir], True, True)
+    for info in infos:
+        assert len(info.short_revision) == 12
+        assert info.query_revision().startswith(info.short_revision)
+
+    monkeypatch.setattr(Repository, "abbrev", None)
+    top.git_update(["git", "config", "core.abbrev", "9"])
+    infos = ReleaseInfo.find_all([dir], True, True)
+    assert [len(i.short_revision) for i in infos] == [9, 9]
+
+
+def test_abbreviation_length_from_environment(monkeypatch, create_repository):
+    dir = f"/tmp/git-release-tag/short-revision/{uuid.uuid4()}"
+    top = create_repository(dir, ["a"], pre_tag_command="")
+    commit(top, "a/file.txt", "change a")
+
+    monkeypatch.setenv("GIT_RELEASE_TAG_ABBREV", "10")
+    assert len(ReleaseInfo(f"{dir}/a").short_revision) == 10
+    result = CliRunner().invoke(main, ["show", f"{dir}/a"])
+    assert len(result.output.strip()) == len("0.1.0-") + 10
+
+    monkeypatch.setenv("GIT_RELEASE_TAG_ABBREV", "3")
+    with pytest.raises(ConfigurationError):
+        ReleaseInfo(f"{dir}/a").short_revision
+    result = CliRunner().invoke(main, ["show", f"{dir}/a"])
+    assert result.exit_code == ConfigurationError.exit_code
+
+
+def test_show_single_and_recursive_agree(create_repository):
+    dir = f"/tmp/git-release-tag/short-revision/{uuid.uuid4()}"
+    top = create_repository(dir, ["a", "b"], pre_tag_command="")
+    commit(top, "a/file.txt", "change a")
+    commit(top, "b/file.txt", "change b")
+
+    for abbrev in [None, "9"]:
+        if abbrev:
+            top.git_update(["git", "config", "core.abbrev", abbrev])
+        single = CliRunner().invoke(main, ["show", f"{dir}/a"])
+        recursive = CliRunner().invoke(main, ["show", "-r", dir])
+        assert single.exit_code == 0 and recursive.exit_code == 0
+        versions = dict(l.split("\t") for l in recursive.output.splitlines())
+        assert versions[f"{dir}/a"] == single.output.strip()
+
+    expected = top.git_query(["git", "log", "-n", "1", "--format=%H", "--", "a"])
+    assert single.output.strip() == f"0.1.0-{expected[:9]}"
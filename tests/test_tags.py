@@ -0,0 +1,41 @@
+import os
+import uuid
+
+from git_release_tag.release_info import ReleaseInfo
+
+
+def test_release_tags():
+    top = f"/tmp/git-release-tag/tags/{uuid.uuid4()}"
+    for name in ["a", "b"]:
+        os.makedirs(f"{top}/{name}", exist_ok=True)
+    i = ReleaseInfo(path=top)
+    i.git_init()
+    for name in ["a", "b"]:
+        ReleaseInfo.initialize(
+            directory=f"{top}/{name}",
+            semver="0.1.0",
+            base_tag=f"{name}-",
+            pre_tag_command="echo @@RELEASE@@ > release.txt",
+            dry_run=False,
+        )
+    for n in range(100):
+        i.git_update(["git", "tag", f"build-{n}"])
+
+    a = ReleaseInfo(path=f"{top}/a")
+    assert a.release_tags == {"a-0.1.0"}
+    assert len(a.all_tags) == 102
+
+    infos = ReleaseInfo.find_all([top], True, True)
+    repository = infos[0].repository
+    assert {r.base_tag: r.release_tags for r in infos} == {
+        "a-": {"a-0.1.0"},
+        "b-": {"b-0.1.0"},
+    }
+    assert repository._release_tags == {"a-0.1.0", "b-0.1.0"}
+
+    a = ReleaseInfo(path=f"{top}/a")
+    with open(f"{top}/a/file.txt", "w") as f:
+        f.write("changed")
+    a.tag_next_release(ReleaseInfo.MINOR, force=True)
+    assert a.release_tags == {"a-0.1.0", "a-0.2.0"}
+    assert ReleaseInfo.validate([a, ReleaseInfo(path=f"{top}/b")])
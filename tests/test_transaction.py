@@ -0,0 +1,56 @@
+import uuid
+
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag.exceptions import PreTagCommandError
+from git_release_tag.release_info import ReleaseInfo
+
+
+def test_bump_all_components(create_repository):
+    dir = f"/tmp/git-release-tag/transaction/{uuid.uuid4()}"
+    top = create_repository(dir, ["a", "b", "c"])
+
+    result = CliRunner().invoke(
+        main, ["bump", "-r", "--level", "minor", "--force", dir]
+    )
+    assert result.exit_code == 0
+    tags = top.git_query(["git", "tag"]).split()
+    assert set(["a-0.2.0", "b-0.2.0", "c-0.2.0"]).issubset(tags)
+    for c in ["a", "b", "c"]:
+        tag_commit = top.git_query(["git", "rev-parse", f"{c}-0.2.0^{{commit}}"])
+        log = top.git_query(["git", "log", "-n", "1", "--format=%H", "--", c])
+        assert tag_commit == log
+
+
+def test_rollback_on_failure(create_repository):
+    dir = f"/tmp/git-release-tag/transaction/{uuid.uuid4()}"
+    top = create_repository(dir, ["a", "b", "c"], files={"README.md": "readme"})
+    with open(f"{dir}/c/.release", "a") as f:
+        f.write(
+            "pre_tag_command=echo @@RELEASE@@ > release.txt && touch ../other.txt && false\n"
+        )
+    top.git_update(["git", "add", "c/.release"])
+    top.git_update(["git", "commit", "-m", "failing pre tag command"])
+    with open(f"{dir}/outstanding.txt", "w") as f:
+        f.write("outstanding change")
+    with open(f"{dir}/README.md", "w") as f:
+        f.write("staged change")
+    top.git_update(["git", "add", "README.md"])
+    head = top.git_query(["git", "rev-parse", "HEAD"])
+    tags = top.git_query(["git", "tag"])
+
+    result = CliRunner().invoke(
+        main, ["bump", "-r", "--level", "minor", "--force", dir]
+    )
+    assert result.exit_code == PreTagCommandError.exit_code
+    assert top.git_query(["git", "rev-parse", "HEAD"]) == head
+    assert top.git_query(["git", "tag"]) == tags
+    assert top.git_query(["git", "status", "--porcelain"]).split("\n") == [
+        "M  README.md",
+        "?? other.txt",
+        "?? outstanding.txt",
+        "",
+    ]
+    for c in ["a", "b", "c"]:
+        assert ReleaseInfo(f"{dir}/{c}").semver == "0.1.0"
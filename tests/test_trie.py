@@ -0,0 +1,52 @@
+import os
+import uuid
+
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.trie import ComponentIndex, PathTrie
+
+
+def test_path_trie():
+    trie = PathTrie()
+    trie.add("/repo/a", "a")
+    trie.add("/repo/a/b", "b")
+    trie.add("/repo/ab", "ab")
+    trie.add("/repo", "top")
+
+    assert trie.lookup("/repo/a/b/file.txt") == {"a", "b", "top"}
+    assert trie.lookup("/repo/a/file.txt") == {"a", "top"}
+    assert trie.lookup("/repo/ab/file.txt") == {"ab", "top"}
+    assert trie.lookup("/repo/a") == {"a", "top"}
+    assert trie.lookup("/other/file.txt") == set()
+
+
+def test_component_index():
+    dir = os.path.realpath(f"/tmp/git-release-tag/trie/{uuid.uuid4()}")
+    depends = {f"{dir}/b": ["../a"], f"{dir}/c": ["../b"]}
+    os.makedirs(dir, exist_ok=True)
+    ReleaseInfo(path=dir).git_init()
+    for d in [f"{dir}/a", f"{dir}/b", f"{dir}/c", f"{dir}/d"]:
+        os.makedirs(d, exist_ok=True)
+        ReleaseInfo.initialize(
+            directory=d,
+            semver="0.1.0",
+            base_tag=f"{os.path.basename(d)}-",
+            tag_on_changes_in=depends.get(d, ["."]),
+            dry_run=False,
+        )
+
+    infos = {
+        os.path.basename(i.directory): i
+        for i in ReleaseInfo.find_all([dir], True, True)
+    }
+    index = ComponentIndex(list(infos.values()))
+
+    assert index.components("a/file.txt", dir) == {infos["a"], infos["b"]}
+    assert index.components(f"{dir}/b/file.txt") == {infos["b"], infos["c"]}
+    assert index.components("README.md", dir) == set()
+    assert index.dependents[infos["a"]] == {infos["b"]}
+    assert index.affected(["a/file.txt"], dir) == {infos["a"], infos["b"]}
+    assert index.affected(["a/file.txt"], dir, transitive=True) == {
+        infos["a"],
+        infos["b"],
+        infos["c"],
+    }
@@ -0,0 +1,56 @@
+import logging
+import os
+import uuid
+
+from click.testing import CliRunner
+
+from git_release_tag.__main__ import main
+from git_release_tag.release_info import ReleaseInfo
+
+
+def test_validate_deep(caplog, create_repository):
+    top = f"/tmp/git-release-tag/validate/{uuid.uuid4()}"
+    i = create_repository(top, ["a", "b", "c"], files={"README.md": "components"})
+    infos = ReleaseInfo.find_all([top], True, True)
+    assert ReleaseInfo.validate(infos, deep=True)
+
+    i.git_update(["git", "tag", "-f", "a-0.1.0", "HEAD~3"])
+    b = ReleaseInfo(path=f"{top}/b")
+    b.semver = "0.2.0"
+    b.write()
+    i.git_update(["git", "tag", "b-0.2.0"])
+
+    infos = ReleaseInfo.find_all([top], True, True)
+    assert ReleaseInfo.validate(infos)
+
+    caplog.clear()
+    with caplog.at_level(logging.ERROR):
+        assert not ReleaseInfo.validate(infos, deep=True)
+    errors = [r.getMessage() for r in caplog.records if r.levelno == logging.ERROR]
+    assert sorted(errors) == [
+        "a/.release in tag a-0.1.0 does not exist",
+        f"b/.release in tag b-0.2.0 has release 0.1.0, {top}/b/.release has 0.2.0",
+        f"b/.release in tag b-0.2.0 has tag b-0.1.0, {top}/b/.release has b-0.2.0",
+    ]
+
+    result = CliRunner().invoke(main, ["validate", "--deep", "-r", top])
+    assert result.exit_code == 1
+    result = CliRunner().invoke(main, ["validate", "--deep", f"{top}/c"])
+    assert result.exit_code == 0
+
+
+def test_directory_without_release_configuration(caplog, create_repository):
+    top = f"/tmp/git-release-tag/validate/{uuid.uuid4()}"
+    create_repository(top, ["a", "b", "c"], files={"README.md": "components"})
+    os.makedirs(f"{top}/d", exist_ok=True)
+
+    result = CliRunner().invoke(main, ["validate", f"{top}/a", f"{top}/d"])
+    assert result.exit_code == 1
+    assert not isinstance(result.exception, TypeError)
+    assert f"in {top}/d/.release does not exist in repository" in caplog.text
+
+    result = CliRunner().invoke(
+        main, ["bump", "--level", "patch", f"{top}/a", f"{top}/d"]
+    )
+    assert result.exit_code == 1
+    assert not isinstance(result.exception, TypeError)
@@ -0,0 +1,60 @@
+import os
+import uuid
+
+import pytest
+
+from git_release_tag.release_info import ReleaseInfo
+from git_release_tag.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    VersionMonitor,
+    Watcher,
+)
+
+
+def test_watchers():
+    dir = f"/tmp/git-release-tag/watch/{uuid.uuid4()}"
+    os.makedirs(f"{dir}/a", exist_ok=True)
+    os.makedirs(f"{dir}/refs", exist_ok=True)
+    for create in [
+        lambda: InotifyWatcher([f"{dir}/a"], [f"{dir}/refs"]),
+        lambda: PollingWatcher([f"{dir}/a"], [f"{dir}/refs"], interval=0.1),
+    ]:
+        watcher = create()
+        assert watcher.wait(0.1) == set()
+        name = str(uuid.uuid4())
+        with open(f"{dir}/a/{name}", "w") as f:
+            f.write("changed")
+        with open(f"{dir}/refs/{name}", "w") as f:
+            f.write("changed")
+        changed = watcher.wait(2)
+        changed.update(watcher.wait(0.2))
+        assert f"{dir}/a/{name}" in changed
+        assert f"{dir}/refs/{name}" in changed
+        watcher.close()
+
+    with pytest.raises(TypeError):
+        Watcher([f"{dir}/a"], [f"{dir}/refs"])
+
+
+def test_version_monitor(create_repository):
+    dir = f"/tmp/git-release-tag/watch/{uuid.uuid4()}"
+    create_repository(dir, ["a", "b"])
+    infos = ReleaseInfo.find_all([dir], True, True)
+    monitor = VersionMonitor(infos)
+    a = next(i for i in infos if i.directory.endswith("/a"))
+    assert set(monitor.versions.values()) == set(["0.1.0"])
+
+    with open(f"{dir}/a/file.txt", "w") as f:
+        f.write("changed")
+    assert monitor.affected([f"{dir}/a/file.txt"]) == [a]
+    assert monitor.update([f"{dir}/a/file.txt"]) == [a]
+    assert monitor.versions[a].endswith("-dirty")
+
+    ReleaseInfo(f"{dir}/a").git_update(["git", "add", "."])
+    ReleaseInfo(f"{dir}/a").git_update(["git", "commit", "-m", "change"])
+    assert monitor.is_reference_change(os.path.join(a.repository.git_dir, "HEAD"))
+    changed = monitor.update([os.path.join(a.repository.git_dir, "logs", "HEAD")])
+    assert changed == [a]
+    assert not monitor.versions[a].endswith("-dirty")
+    assert monitor.update([os.path.join(a.repository.git_dir, "index")]) == []